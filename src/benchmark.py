@@ -0,0 +1,295 @@
+# Reproducible benchmarks for the estimation hot paths.
+#
+#     python src/benchmark.py --modules 5000 --output bench.json
+#     python src/benchmark.py --modules 5000 --compare bench.json
+#
+# Workloads come from the seeded SyntheticGenerator, so two runs with the same arguments time the same projects.
+# Results are saved as JSON; --compare loads an earlier result file and reports (and fails on) regressions.
+# tui_cold_start times a fresh interpreter from importing cocomo_app to the app's first frame, and fails the
+# run when its best time is above --startup-target.
+
+from pathlib import Path
+from typing import Callable, Optional
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from calibration_fit import HistoricalData, calibrate
+from cocomo import Module, Project
+from constants import *
+from cost_tables import LANGUAGES
+from function_points import FunctionCounts, language_codes, pack_function_counts
+from instrument import timed
+from journal import ProjectJournal
+from optimizer import pareto_front
+from parallel import estimate_parallel
+from portfolio import estimate_portfolio
+from scenario import Scenario
+from staffing import phase_split, staffing_profile
+from synthetic import SyntheticGenerator
+
+STARTUP_TARGET_SECONDS: float = 1.0
+
+# Run in a subprocess so every repetition pays for the imports again; prints the seconds to the first frame.
+_COLD_START_SCRIPT: str = """
+import time
+start = time.perf_counter()
+import asyncio, sys
+sys.path.insert(0, sys.argv[1])
+from cocomo_app import CocomoApp
+
+async def first_frame():
+    async with CocomoApp().run_test():
+        print(time.perf_counter() - start)
+
+asyncio.run(first_frame())
+"""
+
+
+class Benchmark:
+    # setup runs before every repetition and is not timed; its return value is passed to run. With
+    # self_timed, run measures itself (in a subprocess, say) and returns its seconds.
+    def __init__(self, name: str, items: int, run: Callable, setup: Optional[Callable]=None, self_timed: bool=False):
+        self.name: str = name
+        self.items: int = items
+        self.run: Callable = run
+        self.setup: Optional[Callable] = setup
+        self.self_timed: bool = self_timed
+
+    def measure(self, repeat: int) -> dict:
+        timings: list[float] = []
+        for _ in range(repeat):
+            state = self.setup() if self.setup is not None else None
+            start = time.perf_counter()
+            seconds = self.run(state)
+            timings.append(seconds if self.self_timed else time.perf_counter() - start)
+        best: float = min(timings)
+        return {
+            "items": self.items,
+            "repeat": repeat,
+            "seconds_min": best,
+            "seconds_median": statistics.median(timings),
+            "ns_per_item": best / self.items * 1e9 if self.items else 0.0,
+        }
+
+
+def _mark_all_changed(project: Project) -> Project:
+    # Forces the next Project.estimate_effort to fold in every module again, as after loading a project.
+    for module in project.modules:
+        module._eaf = None
+        project._module_changed(module)
+    return project
+
+
+def _add(a: int, b: int) -> int:
+    return a + b
+
+
+_timed_add: Callable = timed("benchmark.add")(_add)
+
+
+# 100000 calls of _add as it is and decorated with timed while instrumentation is off; the difference between
+# the two is the overhead every timed function pays when nobody is profiling.
+def _calls(function: Callable) -> Callable:
+    def run(_) -> None:
+        for _ in range(100000):
+            function(1, 2)
+    return run
+
+
+def _cold_start(_) -> float:
+    result = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, str(Path(__file__).parent)],
+                            capture_output=True, text=True, check=True, timeout=60)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def build_benchmarks(modules: int, seed: int) -> list[Benchmark]:
+    generator = SyntheticGenerator(seed)
+    project: Project = generator.project(modules)
+    project.estimate_effort()
+    function_counts = [generator.function_counts() for _ in range(1000)]
+    encoded: str = json.dumps(project.encode())
+    edited: int = len(project.modules) // 2
+    portfolio: list[Project] = generator.portfolio(max(1, modules // 25))
+    portfolio_estimate = estimate_portfolio(portfolio, update=False)
+    split = phase_split(portfolio_estimate.project_effort, portfolio_estimate.project_schedule)
+    bulk_counts = FunctionCounts([], pack_function_counts(function_counts),
+                            language_codes(LANGUAGES[i % len(LANGUAGES)] for i in range(len(function_counts))))
+
+    def module_estimates(_) -> None:
+        for module in project.modules:
+            module.estimate_effort()
+
+    # The edit benchmarks work on a fresh estimated copy each repetition, so the shared project, and with it
+    # every other benchmark, is the same whatever --repeat and --only are.
+    def edited_project() -> Project:
+        copy: Project = Project.project_from_dict(json.loads(encoded))
+        copy.estimate_effort()
+        return copy
+
+    def single_edits(state: Project) -> None:
+        module: Module = state.modules[edited]
+        for _ in range(1000):
+            module.sloc += 1
+            state.estimate_effort()
+
+    def open_journal() -> tuple[tempfile.TemporaryDirectory, ProjectJournal]:
+        directory = tempfile.TemporaryDirectory()
+        return directory, ProjectJournal(Path(directory.name, "project.json"), edited_project(), compact_after=10**9)
+
+    # Each journaled edit is appended by the journal's thread; close waits for the batch to reach the disk.
+    def journal_edits(state: tuple[tempfile.TemporaryDirectory, ProjectJournal]) -> None:
+        directory, journal = state
+        module: Module = journal.project.modules[edited]
+        for _ in range(1000):
+            module.sloc += 1
+            journal.set_sloc(module)
+        journal.close()
+
+    # One SLOC and one rating override each, so every estimate replaces the contributions of two modules.
+    scenarios: list[Scenario] = []
+    for i in range(min(1000, len(project.modules))):
+        scenario = Scenario(project, f"scenario {i}")
+        scenario.set_sloc(project.modules[i], project.modules[i].sloc + 1000)
+        scenario.set_effort_modifier(project.modules[-i - 1], EffortModifier.TOOL, RatingLevel.VERY_HIGH)
+        scenarios.append(scenario)
+
+    def scenario_estimates(_) -> None:
+        for scenario in scenarios:
+            scenario.estimate_effort()
+
+    # Seeded history of projects whose effort follows A = 2.5, B = 1.05 with 10% noise.
+    rng = np.random.default_rng(seed)
+    ksloc = rng.uniform(1, 1000, 100000)
+    scale_factor_sum = rng.uniform(0, 30, len(ksloc))
+    multiplier = rng.uniform(0.5, 2, len(ksloc))
+    effort = 2.5 * ksloc**(1.05 + 0.01 * scale_factor_sum) * multiplier * rng.lognormal(0, 0.1, len(ksloc))
+    history = HistoricalData(ksloc, multiplier, np.ones(len(ksloc)), np.full(len(ksloc), 100.0), scale_factor_sum, effort)
+
+    def function_points(_) -> None:
+        module = Module("function points")
+        for counts in function_counts:
+            module.calculate_function_points(counts)
+
+    benchmarks: list[Benchmark] = [
+        Benchmark("module_estimate_effort", modules, module_estimates),
+        Benchmark("project_estimate_effort", modules, lambda state: state.estimate_effort(),
+                  setup=lambda: _mark_all_changed(project)),
+        Benchmark("project_estimate_effort_single_edit", 1000, single_edits, setup=edited_project),
+        Benchmark("journal_edit", 1000, journal_edits, setup=open_journal),
+        Benchmark("scenario_estimate", len(scenarios), scenario_estimates),
+        Benchmark("untimed_call", 100000, _calls(_add)),
+        Benchmark("timed_call_disabled", 100000, _calls(_timed_add)),
+        Benchmark("calculate_function_points", len(function_counts), function_points),
+        Benchmark("json_encode", modules, lambda _: json.dumps(project.encode())),
+        Benchmark("json_decode", modules, lambda _: Project.project_from_dict(json.loads(encoded))),
+        Benchmark("calibrate", len(ksloc), lambda _: calibrate(history, "Benchmark")),
+        Benchmark("estimate_portfolio", sum(len(item.modules) for item in portfolio),
+                  lambda _: estimate_portfolio(portfolio)),
+        Benchmark("bulk_function_points", len(function_counts), lambda _: bulk_counts.sloc),
+        Benchmark("rating_pareto_front", modules, lambda _: pareto_front(project)),
+        Benchmark("estimate_parallel", modules, lambda _: estimate_parallel(project, update=False, min_rows=1000)),
+        Benchmark("staffing_profiles", len(portfolio),
+                  lambda _: (staffing_profile(split, "phases"), staffing_profile(split, "rayleigh"))),
+    ]
+
+    try:
+        from cocomo_app import CocomoApp
+        app = CocomoApp()
+        app.project = project
+        benchmarks.append(Benchmark("build_summary", modules, lambda _: app.build_summary()))
+        benchmarks.append(Benchmark("tui_cold_start", 1, _cold_start, self_timed=True))
+    except ImportError:
+        print("textual is not installed, skipping build_summary", file=sys.stderr)
+
+    return benchmarks
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmarks(modules: int, seed: int, repeat: int, only: Optional[list[str]]=None) -> dict:
+    results: dict = {}
+    for benchmark in build_benchmarks(modules, seed):
+        if only and benchmark.name not in only:
+            continue
+        results[benchmark.name] = benchmark.measure(repeat)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "modules": modules,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# Ratios of new to old best times; benchmarks present in only one of the files are skipped.
+def compare(old: dict, new: dict) -> dict[str, float]:
+    ratios: dict[str, float] = {}
+    for name, result in new["results"].items():
+        previous = old["results"].get(name)
+        if previous and previous["seconds_min"] > 0:
+            ratios[name] = result["seconds_min"] / previous["seconds_min"]
+    return ratios
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the COCOMO estimation hot paths.")
+    parser.add_argument("--modules", type=int, default=2000, help="modules in the synthetic project (default: 2000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic workload (default: 0)")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions per benchmark, the best is kept (default: 5)")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio counted as a regression with --compare (default: 1.25)")
+    parser.add_argument("--startup-target", type=float, default=STARTUP_TARGET_SECONDS,
+                        help=f"most seconds tui_cold_start may take (default: {STARTUP_TARGET_SECONDS})")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.modules, args.seed, args.repeat, args.only)
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['seconds_min'] * 1000:10.3f} ms {result['ns_per_item']:12.1f} ns/item")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=4))
+
+    failed: bool = False
+    cold_start: Optional[dict] = report["results"].get("tui_cold_start")
+    if cold_start is not None and cold_start["seconds_min"] > args.startup_target:
+        print(f"tui_cold_start took {cold_start['seconds_min']:.3f} s, above the {args.startup_target:.3f} s target")
+        failed = True
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text())
+        if old["meta"].get("modules") != args.modules or old["meta"].get("seed") != args.seed:
+            print("warning: the compared results used a different workload", file=sys.stderr)
+        regressions: int = 0
+        for name, ratio in compare(old, report).items():
+            marker = "  REGRESSION" if ratio > args.threshold else ""
+            regressions += bool(marker)
+            print(f"{name:40} {ratio:6.2f}x{marker}")
+        failed = failed or regressions > 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
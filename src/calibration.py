@@ -0,0 +1,85 @@
+# Named sets of the COCOMO II equation constants.
+#
+#     PM   = A * Size^E * EM            with E = B + 0.01 * sum(SF)
+#     TDEV = C * PM_NS^F * SCED% / 100  with F = D + 0.2 * (E - B)
+#
+# Every Project estimates with its calibration profile, COCOMO_II_2000 unless another one is set. Profiles
+# fitted to an organisation's own history (see calibration_fit.py) are kept in a JSON file, by name.
+
+from pathlib import Path
+from typing import Optional, Union
+import json
+import math
+
+import constants
+
+
+class CalibrationProfile:
+    def __init__(self, name: str, A: float, B: float, C: float=constants.C, D: float=constants.D, projects: int=0):
+        for constant, value in (("A", A), ("B", B), ("C", C), ("D", D)):
+            if not math.isfinite(value) or value <= 0:
+                raise ValueError(f"calibration profile {name!r} has an invalid {constant} of {value!r}")
+        self.name: str = name
+        self.A: float = A
+        self.B: float = B
+        self.C: float = C
+        self.D: float = D
+        # How many historical projects the constants were fitted to, 0 for published values.
+        self.projects: int = projects
+
+    def constants(self) -> tuple[float, float, float, float]:
+        return self.A, self.B, self.C, self.D
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CalibrationProfile) and (self.name, self.constants()) == (other.name, other.constants())
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.constants()))
+
+    def __repr__(self) -> str:
+        return f"CalibrationProfile({self.name!r}, A={self.A}, B={self.B}, C={self.C}, D={self.D})"
+
+    def encode(self) -> dict:
+        return {"name": self.name, "A": self.A, "B": self.B, "C": self.C, "D": self.D, "projects": self.projects}
+
+    @staticmethod
+    def profile_from_dict(data: dict) -> 'CalibrationProfile':
+        return CalibrationProfile(data["name"], data["A"], data["B"], data["C"], data["D"], data.get("projects", 0))
+
+
+COCOMO_II_2000: CalibrationProfile = CalibrationProfile("COCOMO II.2000", constants.A, constants.B, constants.C, constants.D)
+
+
+def load_profiles(path: Union[str, Path]) -> dict[str, CalibrationProfile]:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {COCOMO_II_2000.name: COCOMO_II_2000}
+    profiles = {COCOMO_II_2000.name: COCOMO_II_2000}
+    for entry in data["profiles"]:
+        profile = CalibrationProfile.profile_from_dict(entry)
+        profiles[profile.name] = profile
+    return profiles
+
+
+def save_profiles(profiles: dict[str, CalibrationProfile], path: Union[str, Path]) -> None:
+    entries = [profile.encode() for name, profile in sorted(profiles.items()) if profile != COCOMO_II_2000]
+    Path(path).write_text(json.dumps({"profiles": entries}, indent=4), encoding="utf-8")
+
+
+# Adds or replaces one profile in the profiles file at path.
+def store_profile(profile: CalibrationProfile, path: Union[str, Path]) -> None:
+    if profile.name == COCOMO_II_2000.name:
+        raise ValueError(f"{COCOMO_II_2000.name!r} is built in and cannot be replaced")
+    profiles = load_profiles(path)
+    profiles[profile.name] = profile
+    save_profiles(profiles, path)
+
+
+def get_profile(name: Optional[str], path: Optional[Union[str, Path]]=None) -> CalibrationProfile:
+    if name is None or name == COCOMO_II_2000.name:
+        return COCOMO_II_2000
+    profiles = load_profiles(path) if path is not None else {}
+    if name not in profiles:
+        raise ValueError(f"there is no calibration profile named {name!r}")
+    return profiles[name]
@@ -0,0 +1,173 @@
+# Fits calibration profiles to the recorded actual effort, and optionally schedule, of finished projects.
+#
+# Taking logs of the effort equation, with S the size in KSLOC and EM the effort multipliers including SCED,
+#
+#     log(PM) - log(EM) - 0.01 * sum(SF) * log(S) = log(A) + B * log(S)
+#
+# so A and B are the intercept and slope of a least squares line through one point per project. The schedule
+# equation, with PM_NS = PM / SCED, is linear in the same way:
+#
+#     log(TDEV) - log(SCED% / 100) - 0.2 * 0.01 * sum(SF) * log(PM_NS) = log(C) + D * log(PM_NS)
+#
+# Both fits are a few array operations, so 100k historical projects fit in milliseconds once they are packed.
+#
+#     python src/calibration_fit.py history/ --name "Our history" --profiles profiles.json
+
+from pathlib import Path
+from typing import Iterable, Optional
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from calibration import COCOMO_II_2000, CalibrationProfile, store_profile
+from cocomo import Project
+from portfolio import (SCHEDULE_PERCENT_TABLE, SCHEDULE_TABLE, effort_adjustment_factors, pack_portfolio,
+                       scale_factor_sums)
+
+
+class HistoricalData:
+    # One entry per finished project. actual_schedule is NaN where the schedule was not recorded.
+    def __init__(self, ksloc: np.ndarray, effort_multiplier: np.ndarray, schedule_multiplier: np.ndarray,
+                 schedule_percent: np.ndarray, scale_factor_sum: np.ndarray, actual_effort: np.ndarray,
+                 actual_schedule: Optional[np.ndarray]=None):
+        self.ksloc: np.ndarray = np.asarray(ksloc, dtype=np.float64)
+        self.effort_multiplier: np.ndarray = np.asarray(effort_multiplier, dtype=np.float64)
+        self.schedule_multiplier: np.ndarray = np.asarray(schedule_multiplier, dtype=np.float64)
+        self.schedule_percent: np.ndarray = np.asarray(schedule_percent, dtype=np.float64)
+        self.scale_factor_sum: np.ndarray = np.asarray(scale_factor_sum, dtype=np.float64)
+        self.actual_effort: np.ndarray = np.asarray(actual_effort, dtype=np.float64)
+        if actual_schedule is None:
+            actual_schedule = np.full(len(self.ksloc), np.nan)
+        self.actual_schedule: np.ndarray = np.asarray(actual_schedule, dtype=np.float64)
+
+        if len({len(self.ksloc), len(self.effort_multiplier), len(self.schedule_multiplier), len(self.schedule_percent),
+                len(self.scale_factor_sum), len(self.actual_effort), len(self.actual_schedule)}) != 1:
+            raise ValueError("every historical data array must have one entry per project")
+        if (self.ksloc <= 0).any() or (self.actual_effort <= 0).any():
+            raise ValueError("historical projects must have a positive size and actual effort")
+
+    def __len__(self) -> int:
+        return len(self.ksloc)
+
+
+class CalibrationFit:
+    # The errors are root mean square differences of log(actual) and log(estimate); 0.1 is roughly 10 %.
+    def __init__(self, profile: CalibrationProfile, effort_error: float, schedule_projects: int,
+                 schedule_error: Optional[float]):
+        self.profile: CalibrationProfile = profile
+        self.effort_error: float = effort_error
+        self.schedule_projects: int = schedule_projects
+        self.schedule_error: Optional[float] = schedule_error
+
+
+# Projects without a recorded actual effort or without any SLOC are skipped.
+def historical_data(projects: Iterable[Project]) -> HistoricalData:
+    projects = [project for project in projects
+                if project.actual_effort and any(module.sloc > 0 for module in project.modules)]
+    arrays = pack_portfolio(projects)
+    eaf = effort_adjustment_factors(arrays.ratings)
+    aggregate_sloc = np.bincount(arrays.project_index, weights=arrays.sloc, minlength=arrays.project_count)
+    weighted_sloc = np.bincount(arrays.project_index, weights=arrays.sloc * eaf, minlength=arrays.project_count)
+    sced = SCHEDULE_TABLE[arrays.schedule_factors]
+    if np.isnan(sced).any():
+        raise ValueError("a project uses a rating level that is not defined for the schedule factor")
+
+    return HistoricalData(
+        aggregate_sloc / 1000.0,
+        weighted_sloc / aggregate_sloc * sced,
+        sced,
+        SCHEDULE_PERCENT_TABLE[arrays.schedule_factors],
+        scale_factor_sums(arrays.scale_factors),
+        [project.actual_effort for project in projects],
+        [np.nan if project.actual_schedule is None else project.actual_schedule for project in projects],
+    )
+
+
+def _fit_line(x: np.ndarray, y: np.ndarray, fixed_slope: Optional[float]) -> tuple[float, float, float]:
+    # Least squares intercept and slope of y = intercept + slope * x, and the RMS residual.
+    if fixed_slope is None:
+        x_mean = x.mean()
+        spread = x - x_mean
+        variance = float(spread @ spread)
+        if len(x) < 2 or variance <= 1e-12 * len(x):
+            raise ValueError("fitting the exponent needs at least two historical projects of different sizes")
+        slope = float(spread @ (y - y.mean())) / variance
+    else:
+        slope = fixed_slope
+    intercept = float((y - slope * x).mean())
+    residual = y - intercept - slope * x
+    return intercept, slope, float(np.sqrt(residual @ residual / len(x)))
+
+
+# Fits A and B, and C and D where at least two projects recorded their schedule. fit_exponents=False keeps
+# B and D at their COCOMO II.2000 values and fits only the multipliers A and C, which is the safer choice
+# for a small history.
+def calibrate(data: HistoricalData, name: str, fit_schedule: bool=True, fit_exponents: bool=True) -> CalibrationFit:
+    if len(data) == 0:
+        raise ValueError("there are no historical projects with an actual effort to calibrate with")
+
+    log_size = np.log(data.ksloc)
+    y = np.log(data.actual_effort) - np.log(data.effort_multiplier) - 0.01 * data.scale_factor_sum * log_size
+    log_a, b, effort_error = _fit_line(log_size, y, None if fit_exponents else COCOMO_II_2000.B)
+
+    c, d = COCOMO_II_2000.C, COCOMO_II_2000.D
+    schedule_error: Optional[float] = None
+    recorded = np.isfinite(data.actual_schedule) & (data.actual_schedule > 0)
+    schedule_projects: int = int(recorded.sum())
+    if fit_schedule and schedule_projects >= (2 if fit_exponents else 1):
+        log_effort = np.log(data.actual_effort[recorded] / data.schedule_multiplier[recorded])
+        y = (np.log(data.actual_schedule[recorded]) - np.log(data.schedule_percent[recorded] / 100.0)
+             - 0.2 * 0.01 * data.scale_factor_sum[recorded] * log_effort)
+        log_c, d, schedule_error = _fit_line(log_effort, y, None if fit_exponents else COCOMO_II_2000.D)
+        c = float(np.exp(log_c))
+    else:
+        schedule_projects = 0
+
+    profile = CalibrationProfile(name, float(np.exp(log_a)), b, c, d, projects=len(data))
+    return CalibrationFit(profile, effort_error, schedule_projects, schedule_error)
+
+
+def calibrate_projects(projects: Iterable[Project], name: str, fit_schedule: bool=True,
+                       fit_exponents: bool=True) -> CalibrationFit:
+    return calibrate(historical_data(projects), name, fit_schedule, fit_exponents)
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    from main import find_project_files
+
+    parser = argparse.ArgumentParser(description="Fit a calibration profile to finished projects.")
+    parser.add_argument("paths", nargs="+", help="project JSON files with actual_effort, directories of them, or glob patterns")
+    parser.add_argument("--name", required=True, help="name of the calibration profile")
+    parser.add_argument("--profiles", default="calibration_profiles.json",
+                        help="profiles file to store the result in (default: calibration_profiles.json)")
+    parser.add_argument("--no-schedule", action="store_true", help="keep C and D at their COCOMO II.2000 values")
+    parser.add_argument("--multipliers-only", action="store_true",
+                        help="keep B and D at their COCOMO II.2000 values and fit only A and C")
+    args = parser.parse_args(argv)
+
+    projects: list[Project] = []
+    for path in find_project_files(args.paths):
+        try:
+            projects.append(Project.project_from_dict(json.loads(Path(path).read_text())))
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            print(f"{path}: {type(error).__name__}: {error}", file=sys.stderr)
+
+    try:
+        fit = calibrate_projects(projects, args.name, not args.no_schedule, not args.multipliers_only)
+        store_profile(fit.profile, args.profiles)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    profile = fit.profile
+    print(f"{profile.name}: A={profile.A:.4f} B={profile.B:.4f} C={profile.C:.4f} D={profile.D:.4f}")
+    print(f"effort fitted to {profile.projects} projects, RMS log error {fit.effort_error:.3f}")
+    if fit.schedule_error is not None:
+        print(f"schedule fitted to {fit.schedule_projects} projects, RMS log error {fit.schedule_error:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,114 @@
-from typing import Union
+from typing import Iterable, Iterator, Optional, Union
 import json
 
+from calibration import COCOMO_II_2000, CalibrationProfile
 from constants import *
+from instrument import timed
+from cost_tables import (check_rating, effort_adjustment_factor, scale_factor_sum, schedule_multiplier, schedule_percent,
+                         sloc_per_function_point)
+
+# Time to Develop (TDEV) equation of the COCOMO II.2000 model, in months.
+# PM_NS is the effort estimated without the SCED effort multiplier, SCED% stretches or compresses the result.
+def estimate_schedule(effort_without_sced: float, E: float, schedule_factor: RatingLevel,
+                      calibration: CalibrationProfile=COCOMO_II_2000) -> float:
+    F: float = calibration.D + 0.2 * (E - calibration.B)
+    return calibration.C * effort_without_sced**F * schedule_percent(schedule_factor) / 100.0
+
+# Single module equation: effort, schedule and average staffing of sloc lines with effort adjustment factor eaf
+# in a project with scale exponent E. It reads nothing else, so it can run on values copied from a module.
+def estimate_module(sloc: int, eaf: float, E: float, schedule_factor: RatingLevel,
+                    calibration: CalibrationProfile=COCOMO_II_2000) -> tuple[float, float, float]:
+    effort_without_sced: float = calibration.A * (sloc / 1000.0)**E * eaf
+    effort: float = effort_without_sced * schedule_multiplier(schedule_factor)
+    schedule: float = estimate_schedule(effort_without_sced, E, schedule_factor, calibration)
+    return effort, schedule, effort / schedule if schedule > 0 else 0.0
+
+# A ratings dict that calls its owner back whenever a rating changes, so cached values can be invalidated
+# while code keeps assigning ratings with module.effort_modifiers[key] = value.
+class RatingDict(dict):
+    def __init__(self, ratings=(), on_change=None):
+        super().__init__(ratings)
+        self._on_change = on_change
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self._changed()
+
+# A node of a project's subsystem tree, such as subsystem -> component. Modules belong to the node of their
+# subsystem path, or to the project's root node when they have none. Every node holds sum(SLOC_i) and
+# sum(SLOC_i * EAF_i) over all the modules below it, kept up to date by Project._update_aggregates, which
+# adds the change in a module's terms to each node on the way from the module's node to the root.
+class Subsystem:
+    def __init__(self, name: str, parent: Optional['Subsystem']=None):
+        self.name: str = name
+        self.parent: Optional[Subsystem] = parent
+        self.children: dict[str, Subsystem] = {}
+        # Modules directly in this subsystem, not counting those of its children.
+        self.module_count: int = 0
+        self.sloc: int = 0
+        self.weighted_sloc: float = 0.0
+
+    @property
+    def path(self) -> tuple[str, ...]:
+        names: list[str] = []
+        node: Subsystem = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    # sum(SLOC_i * EAF_i) / sum(SLOC_i), the SLOC weighted average EAF of the subsystem's modules.
+    @property
+    def effort_adjustment_factor(self) -> float:
+        return self.weighted_sloc / self.sloc if self.sloc > 0 else 0.0
+
+    # This node and all the nodes below it, parents before their children.
+    def walk(self) -> Iterator['Subsystem']:
+        yield self
+        for child in self.children.values():
+            yield from child.walk()
+
+    def _add(self, sloc: int, weighted_sloc: float) -> None:
+        node: Optional[Subsystem] = self
+        while node is not None:
+            node.sloc += sloc
+            node.weighted_sloc += weighted_sloc
+            node = node.parent
+
+def check_subsystem_path(path: Iterable[str]) -> tuple[str, ...]:
+    path = tuple(path)
+    for name in path:
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"subsystem names must be non-empty strings, not {name!r}")
+    return path
 
 class Module:
     def __init__(self, name: str):
         self.name: str = name
         self.project: Project = None
-        self.sloc: int = 0
+        self._sloc: int = 0
+        self._eaf: Optional[float] = None
+
+        # Names from the top of the project's subsystem tree down to the subsystem the module belongs to.
+        self._subsystem: tuple[str, ...] = ()
+        self._subsystem_node: Optional[Subsystem] = None
+
+        # The part of the project's running sums that this module currently accounts for, see Project.estimate_effort.
+        self._counted_sloc: int = 0
+        self._counted_weighted_sloc: float = 0.0
+
         self.effort_modifiers: dict[EffortModifier, RatingLevel] = {
             EffortModifier.RELY: RatingLevel.NOMINAL,
             EffortModifier.DATA: RatingLevel.NOMINAL,
@@ -32,20 +133,55 @@ class Module:
         
         self.nominal_effort: float = 0.0
         self.nominal_schedule: float = 0.0
+        self.average_staffing: float = 0.0
+
+    @property
+    def sloc(self) -> int:
+        return self._sloc
+
+    @sloc.setter
+    def sloc(self, sloc: int) -> None:
+        self._sloc = sloc
+        if self.project is not None:
+            self.project._module_changed(self)
+
+    @property
+    def subsystem(self) -> tuple[str, ...]:
+        return self._subsystem
+
+    @subsystem.setter
+    def subsystem(self, path: Iterable[str]) -> None:
+        self._subsystem = check_subsystem_path(path)
+        if self.project is not None:
+            self.project._move_to_subsystem(self)
+
+    @property
+    def effort_modifiers(self) -> dict[EffortModifier, RatingLevel]:
+        return self._effort_modifiers
+
+    @effort_modifiers.setter
+    def effort_modifiers(self, effort_modifiers: dict[EffortModifier, RatingLevel]) -> None:
+        self._effort_modifiers = RatingDict(effort_modifiers, self._ratings_changed)
+        self._ratings_changed()
+
+    def _ratings_changed(self) -> None:
+        self._eaf = None
+        if self.project is not None:
+            self.project._module_changed(self)
+
+    # Product of the module's effort multipliers without SCED, cached until a rating changes.
+    @property
+    def effort_adjustment_factor(self) -> float:
+        if self._eaf is None:
+            self._eaf = effort_adjustment_factor(self._effort_modifiers)
+        return self._eaf
 
     # The Nomainal Effort Estimation Equation is found on page 13 of the COCOMO II.2000 documentation
+    # The schedule is estimated alongside the effort, see estimate_schedule above.
     def estimate_effort(self):
-        effort_modifier_prod: float = 1.0
-        for key, value in self.effort_modifiers.items():
-            effort_modifier_prod *= EFFORT_MODIFIER_COST_DRIVERS[key][value]
-        effort_modifier_prod *= SCHEDULE_COST_DRIVER[self.project.schedule_factor]
-        
-        scale_factor_sum = 0
-        for key, value in self.project.scale_factors.items():
-            scale_factor_sum += SCALE_FACTOR_VALUES[key][value]
-        
-        E: float = B + 0.01 * scale_factor_sum
-        self.nominal_effort = A * (self.sloc / 1000.0)**E * effort_modifier_prod
+        self.nominal_effort, self.nominal_schedule, self.average_staffing = estimate_module(
+            self.sloc, self.effort_adjustment_factor, self.project.scale_exponent, self.project.schedule_factor,
+            self.project.calibration)
 
     def calculate_function_points(self, function_counts: dict[str, tuple[int, int, int]]) -> None:
         fp: int = 0
@@ -56,7 +192,7 @@ class Module:
         self.function_points = fp
 
     def function_points_to_sloc(self) -> None:
-        self.sloc = self.function_points * FUNCTION_POINT_LANGUAGE_RATIOS[self.language]
+        self.sloc = self.function_points * sloc_per_function_point(self.language)
 
     # JSON related methods are below
     def encode(self):
@@ -65,15 +201,28 @@ class Module:
     def module_from_dict(data: dict) -> 'Module':
         module = Module(data["name"])
         module.sloc = data["sloc"]
-        module.effort_modifiers = {EffortModifier[key]: RatingLevel[value] for key, value in data["effort_modifiers"].items()}
+        for key, value in data["effort_modifiers"].items():
+            check_rating(EffortModifier[key], RatingLevel[value])
+            module.effort_modifiers[EffortModifier[key]] = RatingLevel[value]
         module.function_points = data["function_points"]
         module.language = Language[data["language"]]
+        module.subsystem = data.get("subsystem", ())
         return module
 
 class Project:
     def __init__(self, name: str):
         self.name = name
 
+        # The root of the subsystem tree holds the running sums of the multiple module equation, sum(SLOC_i)
+        # and sum(SLOC_i * EAF_i). Modules that changed since the last estimate are queued in _changed_modules
+        # and folded in lazily.
+        self.subsystems: Subsystem = Subsystem("")
+        self._changed_modules: dict[Module, None] = {}
+        self._updates_since_rebuild: int = 0
+        self._scale_factor_sum: Optional[float] = None
+        self._effort_dirty: bool = True
+        self._calibration: CalibrationProfile = COCOMO_II_2000
+
         self.scale_factors: dict[ScaleFactor, RatingLevel] = {
             ScaleFactor.PREC: RatingLevel.NOMINAL,
             ScaleFactor.FLEX: RatingLevel.NOMINAL,
@@ -85,17 +234,134 @@ class Project:
         self.schedule_factor = RatingLevel.NOMINAL
         self.modules: list[Module] = []
         self.nominal_effort: float = 0.0
+        self.nominal_schedule: float = 0.0
+        self.average_staffing: float = 0.0
+
+        # Recorded outcome of a finished project, used to fit calibration profiles.
+        self.actual_effort: Optional[float] = None
+        self.actual_schedule: Optional[float] = None
+
+    @property
+    def scale_factors(self) -> dict[ScaleFactor, RatingLevel]:
+        return self._scale_factors
+
+    @scale_factors.setter
+    def scale_factors(self, scale_factors: dict[ScaleFactor, RatingLevel]) -> None:
+        self._scale_factors = RatingDict(scale_factors, self._scale_factors_changed)
+        self._scale_factors_changed()
+
+    def _scale_factors_changed(self) -> None:
+        self._scale_factor_sum = None
+        self._effort_dirty = True
+
+    @property
+    def schedule_factor(self) -> RatingLevel:
+        return self._schedule_factor
+
+    @schedule_factor.setter
+    def schedule_factor(self, schedule_factor: RatingLevel) -> None:
+        self._schedule_factor = schedule_factor
+        self._effort_dirty = True
+
+    # The constants A, B, C and D of the effort and schedule equations.
+    @property
+    def calibration(self) -> CalibrationProfile:
+        return self._calibration
+
+    @calibration.setter
+    def calibration(self, calibration: CalibrationProfile) -> None:
+        self._calibration = calibration
+        self._effort_dirty = True
+
+    # E = B + 0.01 * sum(SF), cached until a scale factor changes.
+    @property
+    def scale_exponent(self) -> float:
+        if self._scale_factor_sum is None:
+            self._scale_factor_sum = scale_factor_sum(self._scale_factors)
+        return self._calibration.B + 0.01 * self._scale_factor_sum
+
+    # sum(SLOC_i) and sum(SLOC_i * EAF_i) of the multiple module equation, brought up to date first.
+    @property
+    def aggregates(self) -> tuple[int, float]:
+        self._update_aggregates()
+        return self.subsystems.sloc, self.subsystems.weighted_sloc
 
+    # The subsystem at path with its sums brought up to date, in O(depth) per module changed since the last
+    # update. Raises ValueError if no module is in or below it.
+    def subsystem(self, *path: str) -> Subsystem:
+        self._update_aggregates()
+        node: Subsystem = self.subsystems
+        for name in path:
+            if name not in node.children:
+                raise ValueError(f"no subsystem {'/'.join(path)!r} in project {self.name!r}")
+            node = node.children[name]
+        return node
+
+    # The part of the project's effort that goes to a subsystem. The multiple module equation gives module i
+    # PM_basic * SLOC_i / sum(SLOC) * EAF_i * SCED, so a subsystem's part is its share of sum(SLOC_i * EAF_i).
+    def subsystem_effort(self, *path: str) -> float:
+        node: Subsystem = self.subsystem(*path)
+        self.estimate_effort()
+        total: float = self.subsystems.weighted_sloc
+        return self.nominal_effort * node.weighted_sloc / total if total > 0 else 0.0
+
+    def _node_at(self, path: tuple[str, ...]) -> Subsystem:
+        node: Subsystem = self.subsystems
+        for name in path:
+            child: Optional[Subsystem] = node.children.get(name)
+            if child is None:
+                child = node.children[name] = Subsystem(name, node)
+            node = child
+        return node
+
+    # Takes a module out of its node, removing the nodes left without modules.
+    def _detach(self, module: Module) -> None:
+        node: Subsystem = module._subsystem_node
+        node._add(-module._counted_sloc, -module._counted_weighted_sloc)
+        node.module_count -= 1
+        module._subsystem_node = None
+        while node.parent is not None and node.module_count == 0 and not node.children:
+            del node.parent.children[node.name]
+            node = node.parent
+
+    def _attach(self, module: Module) -> None:
+        node: Subsystem = self._node_at(module.subsystem)
+        node.module_count += 1
+        node._add(module._counted_sloc, module._counted_weighted_sloc)
+        module._subsystem_node = node
+
+    # Moves what a module is counted for from its old path to its new one; pending changes stay queued.
+    def _move_to_subsystem(self, module: Module) -> None:
+        self._detach(module)
+        self._attach(module)
+
+    def _module_changed(self, module: Module) -> None:
+        self._changed_modules[module] = None
+        self._effort_dirty = True
+
+    # A module that belongs to another project is moved: it is taken out of that project first.
     def add_module(self, module: Module, position: int=-1) -> None:
-        if module not in self.modules:
+        if module.project is not self:
+            if module.project is not None:
+                module.project.remove_module(module.project.modules.index(module))
             module.project = self
+            module._counted_sloc = 0
+            module._counted_weighted_sloc = 0.0
             if position < 0:
                 self.modules.append(module)
             else:
                 self.modules.insert(position, module)
+            self._attach(module)
+            self._module_changed(module)
 
     def remove_module(self, position: int) -> None:
-        self.modules.pop(position)
+        module: Module = self.modules.pop(position)
+        module.project = None
+        self._changed_modules.pop(module, None)
+        self._detach(module)
+        if not self.modules:
+            self.subsystems.weighted_sloc = 0.0
+        self._effort_dirty = True
     
     def move_module(self, old_position: int, new_position: int=-1) -> None:
         if old_position > len(self.modules) or new_position > len(self.modules):
@@ -104,69 +370,153 @@ class Project:
         module: Module = self.modules.pop(old_position)
         self.modules.insert(new_position, module)
 
+    def _update_aggregates(self) -> None:
+        # Adding and subtracting contributions slowly accumulates rounding error, so the sums are rebuilt
+        # from scratch once there have been ten times as many updates as modules. That keeps updates amortized O(1).
+        if self._updates_since_rebuild > 10 * len(self.modules) + 1024:
+            self._changed_modules = dict.fromkeys(self.modules)
+            for node in self.subsystems.walk():
+                node.sloc = 0
+                node.weighted_sloc = 0.0
+            for module in self.modules:
+                module._counted_sloc = 0
+                module._counted_weighted_sloc = 0.0
+            self._updates_since_rebuild = 0
+
+        # A fresh dict is used for every batch because iterating a dict that once held many keys stays slow.
+        changed_modules: list[Module] = list(self._changed_modules)
+        self._changed_modules = {}
+        for i, module in enumerate(changed_modules):
+            try:
+                weighted_sloc: float = module.sloc * module.effort_adjustment_factor
+            except ValueError:
+                self._changed_modules = dict.fromkeys(changed_modules[i:])
+                raise
+            sloc_change: int = module.sloc - module._counted_sloc
+            weighted_sloc_change: float = weighted_sloc - module._counted_weighted_sloc
+            node: Optional[Subsystem] = module._subsystem_node
+            while node is not None:
+                node.sloc += sloc_change
+                node.weighted_sloc += weighted_sloc_change
+                node = node.parent
+            module._counted_sloc = module.sloc
+            module._counted_weighted_sloc = weighted_sloc
+        self._updates_since_rebuild += len(changed_modules)
+
     # Multiple Module Effort Estimation Equation starts on page 55 of the COCOMO II.2000 documentation
+    # Summing basic_effort * (SLOC_i / aggregate_sloc) * EAF_i over the modules is the same as
+    # basic_effort * sum(SLOC_i * EAF_i) / aggregate_sloc, so only the running sums are needed and
+    # re-estimating after an edit costs O(number of modules changed since the last estimate).
+    @timed("estimate.project")
     def estimate_effort(self):
-        aggregate_sloc: int = 0
-        for module in self.modules:
-            aggregate_sloc += module.sloc
+        if not self._effort_dirty:
+            return
+        self._update_aggregates()
+        aggregate_sloc: int = self.subsystems.sloc
         
         # To prevent divide by zero errors
         if aggregate_sloc == 0:
             self.nominal_effort = 0.0
+            self.nominal_schedule = 0.0
+            self.average_staffing = 0.0
+            self._effort_dirty = False
             return
         
-        scale_factor_sum = 0
-        for key, value in self.scale_factors.items():
-            scale_factor_sum += SCALE_FACTOR_VALUES[key][value]
-        E: float = B + 0.01 * scale_factor_sum
+        E: float = self.scale_exponent
         
-        basic_effort: float = A * (aggregate_sloc / 1000)**E * SCHEDULE_COST_DRIVER[self.schedule_factor]
+        basic_effort: float = self._calibration.A * (aggregate_sloc / 1000)**E
         
-        aggregate_basic_effort: float = 0.0
-        for module in self.modules:
-            basic_effort_i: float = basic_effort * (module.sloc / aggregate_sloc)
-            
-            effort_modifier_prod: float = 1.0
-            for key, value in module.effort_modifiers.items():
-                effort_modifier_prod *= EFFORT_MODIFIER_COST_DRIVERS[key][value]
-            effort_modifier_prod *= SCHEDULE_COST_DRIVER[self.schedule_factor]
-                
-            aggregate_basic_effort += basic_effort_i * effort_modifier_prod
-
-        self.nominal_effort = aggregate_basic_effort
+        effort_without_sced: float = basic_effort * self.subsystems.weighted_sloc / aggregate_sloc
+        self.nominal_effort = effort_without_sced * schedule_multiplier(self.schedule_factor)
+        self.nominal_schedule = estimate_schedule(effort_without_sced, E, self.schedule_factor, self._calibration)
+        self.average_staffing = self.nominal_effort / self.nominal_schedule
+        self._effort_dirty = False
 
     # JSON related methods are below
+    @timed("json.encode")
     def encode(self):
         return ProjectEncoder().default(self)
     
+    @timed("json.decode")
     def project_from_dict(data: dict) -> 'Project':
         project = Project(data["name"])
-        project.scale_factors = {ScaleFactor[key]: RatingLevel[value] for key, value in data["scale_factors"].items()}
+        for key, value in data["scale_factors"].items():
+            check_rating(ScaleFactor[key], RatingLevel[value])
+            project.scale_factors[ScaleFactor[key]] = RatingLevel[value]
+        check_rating(EffortModifier.SCED, RatingLevel[data["schedule factor"]])
         project.schedule_factor = RatingLevel[data["schedule factor"]]
         for module_data in data["modules"]:
             module = Module.module_from_dict(module_data)
             project.add_module(module)
+        if "calibration" in data:
+            project.calibration = CalibrationProfile.profile_from_dict(data["calibration"])
+        project.actual_effort = data.get("actual_effort")
+        project.actual_schedule = data.get("actual_schedule")
         return project
 
+# The values a module's estimate depends on, copied from it. effort_modifiers is a copy of its ratings, or None
+# when ratings is False.
+class ModuleValues:
+    def __init__(self, module: Module, ratings: bool=False):
+        self.name: str = module.name
+        self.sloc: int = module.sloc
+        self.effort_adjustment_factor: float = module.effort_adjustment_factor
+        self.effort_modifiers: Optional[dict[EffortModifier, RatingLevel]] = (
+            dict(module.effort_modifiers) if ratings else None)
+
+# A project estimated and copied on one thread, so another thread can estimate its modules from the copy
+# while the project itself keeps being edited. modules defaults to ModuleValues of every module; a generator
+# of them can be given instead to read the modules one at a time on the thread that owns them.
+class ProjectSnapshot:
+    def __init__(self, project: Project, modules: Optional[Iterable[ModuleValues]]=None):
+        project.estimate_effort()
+        self.name: str = project.name
+        self.calibration: CalibrationProfile = project.calibration
+        self.scale_factors: dict[ScaleFactor, RatingLevel] = dict(project.scale_factors)
+        self.schedule_factor: RatingLevel = project.schedule_factor
+        self.scale_exponent: float = project.scale_exponent
+        self.nominal_effort: float = project.nominal_effort
+        self.nominal_schedule: float = project.nominal_schedule
+        self.average_staffing: float = project.average_staffing
+        self.modules: Iterable[ModuleValues] = (
+            [ModuleValues(module) for module in project.modules] if modules is None else modules)
+
+    # Effort, schedule and average staffing of a module, as Module.estimate_effort would set them.
+    def estimate_module(self, values: ModuleValues) -> tuple[float, float, float]:
+        return estimate_module(values.sloc, values.effort_adjustment_factor, self.scale_exponent,
+                               self.schedule_factor, self.calibration)
+
 class ModuleEncoder(json.JSONEncoder):
     def default(self, obj: Module) -> dict[str, Union[str, int, dict]]:
         if isinstance(obj, Module):
-            return {
+            encoded = {
                 "name": obj.name,
                 "sloc": obj.sloc,
                 "effort_modifiers": {key.name: value.name for key, value in obj.effort_modifiers.items()},
                 "function_points": obj.function_points,
                 "language": obj.language.name,
             }
+            # Left out for modules outside any subsystem, so flat projects are saved as before.
+            if obj.subsystem:
+                encoded["subsystem"] = list(obj.subsystem)
+            return encoded
         return super().default(obj)
 
 class ProjectEncoder(json.JSONEncoder):
     def default(self, obj: Project) -> dict[str, Union[str, dict, list]]:
         if isinstance(obj, Project):
-            return {
+            encoded = {
                 "name": obj.name,
                 "scale_factors": {key.name: value.name for key, value in obj.scale_factors.items()},
                 "schedule factor": obj.schedule_factor.name,
                 "modules": [module.encode() for module in obj.modules],
             }
+            # Optional keys are left out when unset, so files stay readable by older versions.
+            if obj.calibration != COCOMO_II_2000:
+                encoded["calibration"] = obj.calibration.encode()
+            if obj.actual_effort is not None:
+                encoded["actual_effort"] = obj.actual_effort
+            if obj.actual_schedule is not None:
+                encoded["actual_schedule"] = obj.actual_schedule
+            return encoded
         return super().default(obj)
\ No newline at end of file
@@ -1,18 +1,37 @@
 from textual.app import App, ComposeResult
 from textual import on
 from textual.containers import Grid
-from textual.widgets import Label, Input, Button, Header, Footer, Select, TabbedContent, Markdown, Static
+from textual.message import Message
+from textual.timer import Timer
+from textual.widget import Widget
+from textual.worker import Worker, get_current_worker
+from textual.widgets import Label, Input, Button, Header, Footer, Select, TabbedContent, Static
 
+from functools import partial
 from pathlib import Path
-import json
+from typing import Optional
+import argparse
+import sys
 
-from cocomo import Project, Module
+from cocomo import Project, Module, ModuleValues, ProjectSnapshot
 from cocomo_tui_elements import *
-from constants import RatingLevel
+from constants import RatingLevel, EffortModifier
+from cost_tables import applicable_levels
+from instrument import add_profile_arguments, increment, timed, timer
+from journal import ProjectJournal
+from project_index import ProjectIndex
+from report import export_report
+import instrument
 
 
 # This is a heavily simplified layout. Need to explore better options in the future.
 class CocomoApp(App):
+    # Posted from the journal's thread once a full snapshot of the project has been written to path.
+    class JournalCompacted(Message):
+        def __init__(self, path: Path) -> None:
+            super().__init__()
+            self.path: Path = path
+
     CSS_PATH = "cocomo.tcss"
     TITLE = "COCOMO II.2000"    
     SUB_TITLE = "Untitled"
@@ -24,11 +43,17 @@ class CocomoApp(App):
         ("a", "add_module", "Add Module"),
         ("r", "rename_module", "Rename Module"),
         ("d", "delete_module", "Delete Module"),
+        ("left_square_bracket", "move_module(-1)", "Move Left"),
+        ("right_square_bracket", "move_module(1)", "Move Right"),
         ("u", "update_summary", "Update Summary"),
-        # ("e", "export_summary",) # Export Summary - future feature; need to figure out how to do this.
+        ("p", "show_instrumentation", "Profiling"),
+        ("e", "export_report", "Export Report"),
     ]
     
     projects_directory = "projects"
+
+    # Seconds without edits before the summary is recomputed, so a burst of edits costs one recomputation.
+    summary_delay: float = 0.3
     
     def __init__(self):
         super().__init__()
@@ -38,10 +63,39 @@ class CocomoApp(App):
         self.new_module_count: int = 1 # This variable keeps track of how many modules have been added for default naming.
         self.summary_str: str = ""
         
-        self.sidebar: Markdown = Markdown(self.summary_str, id="sidebar")
+        # A plain Static until the first frame is up, see mount_summary_sidebar.
+        self.sidebar: Widget = Static(self.summary_str, id="sidebar")
+
+        # Bumped on every edit; a finished summary is only shown if no edit happened since it was started.
+        self.summary_generation: int = 0
+        self.summary_timer: Optional[Timer] = None
+
+        # Shared by every LoadScreen so directory listings stay cached between visits.
+        self.project_index: ProjectIndex = ProjectIndex()
+
+        # Once the project has a file, every edit is autosaved to the file's journal.
+        self.journal: Optional[ProjectJournal] = None
 
     def on_mount(self):
         self.theme = "nord"
+        self.call_after_refresh(self.mount_summary_sidebar)
+        self.request_summary()
+
+    # Importing Markdown pulls in its parser, which costs more than the rest of the first frame's widgets
+    # together, so the sidebar is swapped in once the app is on screen. Both widgets have an update(text).
+    async def mount_summary_sidebar(self) -> None:
+        from textual.widgets import Markdown
+
+        placeholder: Widget = self.sidebar
+        summary_str: str = self.summary_str
+        sidebar: Markdown = Markdown(summary_str, id="sidebar")
+        layout = placeholder.parent
+        await placeholder.remove()
+        await layout.mount(sidebar)
+        self.sidebar = sidebar
+        # A summary may have arrived while the placeholder was being swapped out.
+        if self.summary_str != summary_str:
+            self.sidebar.update(self.summary_str)
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -58,69 +112,112 @@ class CocomoApp(App):
                     
                     # I went back and forth on whether to have the Input disabled on startup, went with enabled for now.
                     yield Input(self.project.name, id="project_name")
-                    yield Select([(i.value, i) for i in RatingLevel], id="sched_select", value=self.project.schedule_factor, allow_blank=False)
+                    yield Select([(i.value, i) for i in applicable_levels(EffortModifier.SCED)], id="sched_select", value=self.project.schedule_factor, allow_blank=False)
                     yield Button("Scale Factors", id="scale_factors_button")
-                    yield Button("Report", disabled=True) 
+                    yield Button("Report", id="report_button")
                     
-                with TabbedContent():
-                    for module in self.project.modules:
-                        yield ModulePane(module, self.sidebar)
+                yield ModuleTabs(self.project.modules)
 
             yield self.sidebar
 
     async def action_new_project(self):
+        self.close_journal()
         self.project = Project("Untitled")
         self.project.add_module(Module("Module 1"))
         self.project.modules[0].sloc = 1000
         self.new_module_count = 1
         await self.refresh_values()
+        self.request_summary()
 
+    # The modal screens are imported the first time they are opened rather than at startup.
     def action_open_project(self):
-        self.push_screen(LoadScreen(), self.load_screen_callback)
+        from cocomo_screens import LoadScreen
+        self.push_screen(LoadScreen(self.project_index), self.load_screen_callback)
     
     async def load_screen_callback(self, load_path: Path) -> None:
         if load_path is None:
             return
 
         self.sidebar.update(str(load_path))
-        project_json = load_path.read_text()
-        project_data = json.loads(project_json)
-        self.project = Project.project_from_dict(project_data)
+        self.close_journal()
+        # Edits autosaved to the journal since the file was last written in full are replayed.
+        with timer("tui.load_project"):
+            self.journal = ProjectJournal.open(load_path, on_compacted=self.journal_compacted)
+            self.project = self.journal.project
         self.new_module_count = 1
         
         await self.refresh_values()
+        self.request_summary()
 
+    @timed("tui.refresh_values")
     async def refresh_values(self) -> None:
 
         self.query_one("#project_name", Input).value = self.project.name
         self.query_one("#sched_select").value=self.project.schedule_factor
 
-        modules: TabbedContent = self.query_one(TabbedContent)
-        await modules.clear_panes()
-        for module in self.project.modules:
-            modules.add_pane(ModulePane(module))
+        # Swapping in new tabs mounts them all in one go; adding panes one by one costs a layout pass per module.
+        old_modules: TabbedContent = self.query_one(TabbedContent)
+        modules: TabbedContent = ModuleTabs(self.project.modules)
+        await old_modules.parent.mount(modules, after=old_modules)
+        await old_modules.remove()
 
         self.sub_title = self.project.name
 
     def action_save_project(self):
+        from cocomo_screens import SaveScreen
         project_name = self.project.name.replace(" ", "-")
         self.push_screen(SaveScreen(project_name), self.save_screen_callback)
 
+    # Saving writes the whole project on the journal's thread; from then on edits are journaled to save_path.
     def save_screen_callback(self, save_path: Path) -> None:
         if save_path is None:
             return
 
         save_path.parent.mkdir(parents=True, exist_ok=True)
 
-        project_json = json.dumps(
-            self.project.encode(),
-            sort_keys=False,
-            indent=4,
-        )
-        
-        save_path.write_text(
-            project_json
-        )
+        with timer("tui.save_project"):
+            if self.journal is None or self.journal.path != save_path:
+                self.close_journal()
+                self.journal = ProjectJournal(save_path, self.project, on_compacted=self.journal_compacted)
+            self.journal.compact()
+
+    # Runs on the journal's thread, which must not read the project, so the index is updated on the UI thread.
+    def journal_compacted(self, path: Path) -> None:
+        self.post_message(self.JournalCompacted(path))
+
+    # The saved file is summarized from the project in memory, so the next listing of its directory does not
+    # parse it. Edits made since the snapshot are in the journal and are replayed when the file is loaded.
+    def on_cocomo_app_journal_compacted(self, message: JournalCompacted) -> None:
+        if self.journal is None or self.journal.path != message.path:
+            self.project_index.invalidate(message.path.parent)
+            return
+        try:
+            self.project_index.record_project(message.path, self.project)
+        except (OSError, ValueError):
+            self.project_index.invalidate(message.path.parent)
+
+    # Records an edit, named after the ProjectJournal method, if the project has a journal. A journal that
+    # can no longer be written is dropped so editing carries on; saving starts a new one.
+    def record_edit(self, operation: str, *args) -> None:
+        if self.journal is None:
+            return
+        try:
+            getattr(self.journal, operation)(*args)
+        except OSError as error:
+            self.journal = None
+            self.notify(f"Autosave stopped: {error}", severity="error")
+
+    def close_journal(self) -> None:
+        if self.journal is None:
+            return
+        journal, self.journal = self.journal, None
+        try:
+            journal.close()
+        except OSError as error:
+            self.notify(f"Autosave failed: {error}", severity="error")
+
+    def on_unmount(self) -> None:
+        self.close_journal()
 
     def action_rename_project(self):
         project_name = self.query_one("#project_name")
@@ -131,28 +228,85 @@ class CocomoApp(App):
         module: Module = Module(f"Module {self.new_module_count}")
         module.sloc = 1000
         self.project.add_module(module)
+        self.record_edit("add_module", module)
         self.query_one(TabbedContent).add_pane(ModulePane(module))
+        self.request_summary()
 
     def action_delete_module(self):
-        module_pane: ModulePane = self.query_one(TabbedContent).active_pane
-        
-        # There is no way to know which number in the Project.modules list this module corresponds to,
-        # so we have to search for it. 
-        for i in range(len(self.project.modules)):
-            if self.project.modules[i] is module_pane.module:
-                self.project.remove_module(i)
-                break
+        modules: TabbedContent = self.query_one(TabbedContent)
+        module_pane: ModulePane = modules.active_pane
+        if module_pane is None:
+            return
+
+        position: int = self.project.modules.index(module_pane.module)
+        self.project.remove_module(position)
+        self.record_edit("remove_module", position)
+        modules.remove_pane(module_pane.id)
+        self.request_summary()
+
+    # Moves the active module one place left (-1) or right (1), in the project and in the tab bar.
+    def action_move_module(self, offset: int) -> None:
+        modules: TabbedContent = self.query_one(TabbedContent)
+        module_pane: ModulePane = modules.active_pane
+        if module_pane is None:
+            return
+
+        old_position: int = self.project.modules.index(module_pane.module)
+        new_position: int = old_position + offset
+        if not 0 <= new_position < len(self.project.modules):
+            return
+        neighbour: Module = self.project.modules[new_position]
+        self.project.move_module(old_position, new_position)
+        self.record_edit("move_module", old_position, new_position)
 
-        self.query_one(TabbedContent).remove_pane(self.query_one(TabbedContent).active)
+        tab = modules.get_tab(module_pane)
+        neighbour_tab = modules.get_tab(next(pane for pane in modules.query(ModulePane) if pane.module is neighbour))
+        if offset < 0:
+            tab.parent.move_child(tab, before=neighbour_tab)
+        else:
+            tab.parent.move_child(tab, after=neighbour_tab)
+        self.request_summary()
 
-    # I tried to make this automatic, but Textual would not update the Markdown widget.
+    # Recomputes the summary right away instead of waiting for the debounce delay.
     def action_update_summary(self):
-        self.build_summary()
-        self.sidebar.update(self.summary_str)
+        self.summary_generation += 1
+        self.start_summary_worker()
+
+    # Called after every edit that changes the estimate. Each call restarts the debounce timer.
+    def request_summary(self) -> None:
+        self.summary_generation += 1
+        if self.summary_timer is not None:
+            self.summary_timer.stop()
+        self.summary_timer = self.set_timer(self.summary_delay, self.start_summary_worker)
+
+    def start_summary_worker(self) -> None:
+        if self.summary_timer is not None:
+            self.summary_timer.stop()
+            self.summary_timer = None
+
+        # The project is estimated and its module values copied here on the UI thread, so the worker never
+        # touches the Module objects the user keeps editing. exclusive cancels a summary still being built
+        # for an older state; failures are dropped instead of exiting the app.
+        snapshot: ProjectSnapshot = ProjectSnapshot(self.project)
+        work = partial(self.summary_worker, snapshot, self.summary_generation)
+        self.run_worker(work, name="summary", group="summary", thread=True, exclusive=True, exit_on_error=False)
+
+    def summary_worker(self, snapshot: ProjectSnapshot, generation: int) -> None:
+        worker: Worker = get_current_worker()
+        summary: Optional[str] = self.render_summary(snapshot, worker)
+        if summary is not None and not worker.is_cancelled:
+            self.call_from_thread(self.show_summary, summary, generation)
+
+    def show_summary(self, summary: str, generation: int) -> None:
+        if generation != self.summary_generation:
+            return
+        self.summary_str = summary
+        self.sidebar.update(summary)
 
     def action_rename_module(self):
         modules: TabbedContent = self.query_one(TabbedContent)
         current_pane: ModulePane = modules.active_pane
+        from cocomo_screens import ModuleRenameScreen
         self.push_screen(ModuleRenameScreen(current_pane.module.name), self.rename_module_callback)
         
     async def rename_module_callback(self, new_name: str) -> None:
@@ -162,45 +316,117 @@ class CocomoApp(App):
         current_pane: ModulePane = modules.active_pane
         
         current_pane.module.name = new_name
-        for module in self.project.modules:
-            if module is current_pane.module:
-                module.name = new_name
-                break
-        
-        await modules.clear_panes()
-        for module in self.project.modules:
-            modules.add_pane(ModulePane(module))
+        self.record_edit("rename_module", current_pane.module)
+        modules.get_tab(current_pane).label = new_name
+        self.request_summary()
+
+    # The report is written by a worker thread, like the summary, from values copied when it starts.
+    @on(Button.Pressed, "#report_button")
+    def action_export_report(self) -> None:
+        from cocomo_screens import SaveScreen
+        report_name: str = self.project.name.replace(" ", "-") + "-report"
+        self.push_screen(SaveScreen(report_name, ".md"), self.export_screen_callback)
+
+    def export_screen_callback(self, report_path: Path) -> None:
+        if report_path is None:
+            return
+        snapshot: ProjectSnapshot = ProjectSnapshot(
+            self.project, [ModuleValues(module, ratings=True) for module in self.project.modules])
+        work = partial(self.export_worker, snapshot, report_path)
+        self.run_worker(work, name="export", group="export", thread=True, exit_on_error=False)
+
+    @timed("tui.export_report")
+    def export_worker(self, snapshot: ProjectSnapshot, report_path: Path) -> None:
+        worker: Worker = get_current_worker()
+        try:
+            report_path.parent.mkdir(parents=True, exist_ok=True)
+            finished: bool = export_report(snapshot, report_path, cancelled=lambda: worker.is_cancelled)
+        except (OSError, ValueError) as error:
+            self.call_from_thread(self.notify, f"Report not written: {error}", severity="error")
+            return
+        if finished:
+            self.call_from_thread(self.notify, f"Report written to {report_path}")
 
     # A really basic summary for now.
     def build_summary(self) -> None:
-        self.project.estimate_effort()
-        results_heading = f"# {self.project.name} - Effort Estimate"
-        summary_table = """
-## Estimate Summary
-|     Module    |  SLOC  | Effort |
-|:-------------:|:------:|:------:|
-"""
-        for module in self.project.modules:
-            module.estimate_effort()
-            summary_table += f"| {module.name} | {module.sloc} | {module.nominal_effort:.2f} |\n"
+        self.summary_str = self.render_summary(ProjectSnapshot(self.project))
 
-        summary_table += f"| Project Total |  | **{self.project.nominal_effort:.2f}** |\n"
+    # Returns None if worker is cancelled part way.
+    @timed("tui.render_summary")
+    def render_summary(self, snapshot: ProjectSnapshot, worker: Optional[Worker]=None) -> Optional[str]:
+        # Rows are collected in a list and joined once; adding each to one string copied the table every row.
+        lines: list[str] = [
+            f"# {snapshot.name} - Effort Estimate",
+            "",
+            "## Estimate Summary",
+            "|     Module    |  SLOC  | Effort |",
+            "|:-------------:|:------:|:------:|",
+        ]
+        for i, module in enumerate(snapshot.modules):
+            if worker is not None and i % 256 == 0 and worker.is_cancelled:
+                increment("tui.summaries_cancelled")
+                return None
+            effort: float = snapshot.estimate_module(module)[0]
+            lines.append(f"| {module.name} | {module.sloc} | {effort:.2f} |")
 
-        self.summary_str = f"{results_heading}\n{summary_table}"
+        lines.append(f"| Project Total |  | **{snapshot.nominal_effort:.2f}** |")
+        increment("tui.modules_summarized", len(snapshot.modules))
+
+        return "\n".join(lines) + "\n"
 
     @on(Input.Submitted, "#project_name")
     @on(Input.Blurred, "#project_name")
     def rename_project(self):
-        self.project.name = self.query_one("#project_name").value
+        if self.project.name != self.query_one("#project_name").value:
+            self.project.name = self.query_one("#project_name").value
+            self.record_edit("rename_project")
         self.sub_title = self.query_one("#project_name").value
         
     @on(Select.Changed, "#sched_select")
     def select_schedule_factor(self):
-        self.project.schedule_factor = RatingLevel(self.query_one("#sched_select").value)
+        schedule_factor: RatingLevel = RatingLevel(self.query_one("#sched_select").value)
+        if schedule_factor != self.project.schedule_factor:
+            self.project.schedule_factor = schedule_factor
+            self.record_edit("set_schedule_factor")
+            self.request_summary()
     
     @on(Button.Pressed, "#scale_factors_button")
     def edit_scale_factors(self):
-        self.push_screen(ScaleFactorScreen(self.project.scale_factors))
+        from cocomo_screens import ScaleFactorScreen
+        self.push_screen(ScaleFactorScreen(self.project.scale_factors), self.scale_factors_callback)
+
+    def scale_factors_callback(self, result: str) -> None:
+        if result is not None:
+            for key in self.project.scale_factors:
+                self.record_edit("set_scale_factor", key)
+            self.request_summary()
+
+    def on_module_pane_changed(self, event: ModulePane.Changed) -> None:
+        # The module may have been deleted, or another project loaded, since the message was posted.
+        if event.module.project is not self.project:
+            return
+        if event.key is None:
+            self.record_edit("set_sloc", event.module)
+        else:
+            self.record_edit("set_effort_modifier", event.module, event.key)
+        self.request_summary()
+
+    def action_show_instrumentation(self) -> None:
+        from cocomo_screens import InstrumentationScreen
+        self.push_screen(InstrumentationScreen())
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Interactive COCOMO II.2000 estimates.")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.profile is not None:
+        instrument.enable()
+    CocomoApp().run()
+    if args.profile is not None:
+        instrument.write_profile(args.profile, args.profile_format)
+    return 0
 
 if __name__ == "__main__":
-    CocomoApp().run()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
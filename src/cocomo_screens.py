@@ -0,0 +1,225 @@
+# Modal screens. cocomo_app imports this module the first time one of them is opened, so the widgets only
+# they use (ListView, Markdown and its parser) are not loaded before the first frame is drawn.
+
+from textual import on
+from textual.app import ComposeResult
+from textual.containers import Horizontal, Container
+from textual.screen import ModalScreen
+from textual.worker import get_current_worker
+from textual.widgets import Label, Input, Button, Select, ListItem, ListView, Markdown
+
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+from constants import RatingLevel, ScaleFactor
+from instrument import format_snapshot, timed
+from project_index import ProjectIndex, ProjectSummary
+import instrument
+
+
+class FileItem(ListItem):
+
+    def __init__(self, text: str, description: str = "") -> None:
+        super().__init__()
+        self.text = text
+        self.description = description
+
+    def compose( self ) -> ComposeResult:
+        yield Label(self.text)
+        if self.description:
+            yield Label(self.description, classes="file_description")
+
+# Directories are listed by a worker thread through a ProjectIndex, so typing a path never waits on the disk.
+class LoadScreen(ModalScreen[Path]):
+
+    def __init__(self, project_index: Optional[ProjectIndex] = None, name = None, id = None, classes = None):
+        super().__init__(name, id, classes)
+        self.project_index: ProjectIndex = project_index or ProjectIndex()
+        self.listed_directory: Optional[Path] = None
+    
+    def compose(self):
+        with Container():
+            yield Label("Path:")
+            initial_path: Path = Path(Path.home(), "cocomo-projects")
+            if not initial_path.exists():
+                initial_path = Path.home()
+            yield Input(str(initial_path), id="load_path")
+            
+            yield ListView(id="file_list")
+            with Horizontal():
+                yield Button("OK", id="ok_button")
+                yield Button("Cancel", id="cancel_button")
+
+    def on_mount(self):
+        self.update_path()
+
+    @timed("tui.list_directory")
+    def list_directory(self, path_text: str) -> None:
+        load_path: Path = Path(path_text).expanduser()
+        while not load_path.is_dir():
+            load_path = load_path.parent
+
+        summaries: list[ProjectSummary] = self.project_index.listing(load_path)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.show_files, load_path, summaries)
+
+    def show_files(self, load_path: Path, summaries: list[ProjectSummary]) -> None:
+        self.listed_directory = load_path
+        file_list: ListView = self.query_one("#file_list")
+        file_list.clear()
+        file_list.extend(FileItem(summary.file_name, summary.describe()) for summary in summaries)
+
+    @on(Button.Pressed, "#ok_button")
+    def load_file(self):
+        file_item: Optional[FileItem] = self.query_one("#file_list").highlighted_child
+        if file_item is None or self.listed_directory is None:
+            return
+        self.dismiss(Path(self.listed_directory, file_item.text))
+
+    @on(Button.Pressed, "#cancel_button")
+    def cancel_load(self):
+        self.dismiss(None)
+        
+    # exclusive cancels the listing of a path that has since been edited further.
+    @on(Input.Changed, "#load_path")
+    def update_path(self):
+        work = partial(self.list_directory, self.query_one("#load_path").value)
+        self.run_worker(work, name="listing", group="listing", thread=True, exclusive=True, exit_on_error=False)
+
+class SaveScreen(ModalScreen[Path]):
+    path_not_exist_msg: str = "The path does not exist and will be created."
+    file_exists_msg: str = "[b][red]Warning[/red][/b]: This file already exists and will be [b]overwritten[/b]."
+    
+    # extension is added to file_name; reports are saved with the same screen as projects.
+    def __init__(self, file_name: str = "project", extension: str = ".json", name = None, id = None, classes = None):
+        super().__init__(name, id, classes)
+        self.file_name: str = file_name
+        self.extension: str = extension
+    
+    def compose(self):
+        with Container():
+            yield Label("Path:")
+            initial_path: Path = Path(Path.home(), "cocomo-projects")
+            yield Input(str(initial_path), id="save_path")
+            path_msg = "" if initial_path.exists() else self.path_not_exist_msg
+            yield Label(path_msg, id="path_msg")
+            yield Label("File Name:")
+            file_name: str = self.file_name + self.extension
+            yield Input(file_name, id="save_file")
+            file_msg = "" if not Path(initial_path, file_name).exists() else self.file_exists_msg
+            yield Label(file_msg, id="file_msg")
+            with Horizontal():
+                yield Button("OK", id="ok_button")
+                yield Button("Cancel", id="cancel_button")
+
+    @on(Button.Pressed, "#ok_button")
+    def save_file(self):
+        save_path: Path = Path(self.query_one("#save_path").value, self.query_one("#save_file").value)
+        self.dismiss(save_path)
+    
+    @on(Button.Pressed, "#cancel_button")
+    def cancel_save(self):
+        self.dismiss(None)
+        
+    @on(Input.Changed, "#save_path")
+    def validate_path(self):
+        save_path: Path = Path(self.query_one("#save_path").value)
+        path_msg: Label = self.query_one("#path_msg")
+        if not save_path.exists():
+            path_msg.update(self.path_not_exist_msg)
+        else:
+            path_msg.update("")
+
+    @on(Input.Changed, "#save_file")
+    def validate_file_name(self):
+        save_path: Path = Path(self.query_one("#save_path").value, self.query_one("#save_file").value)
+        file_msg: Label = self.query_one("#file_msg")
+        if save_path.exists():
+            file_msg.update(self.file_exists_msg)
+        else:
+            file_msg.update("")
+
+class ScaleFactorScreen(ModalScreen[str]):
+    def __init__(self, scale_factors: dict[ScaleFactor, RatingLevel], name = None, id = None, classes = None):
+        super().__init__(name, id, classes)
+        self.scale_factors: dict = scale_factors
+
+    def compose(self):
+        with Container():
+            for key, value in self.scale_factors.items():
+                with Horizontal():
+                    yield Label(key.name)
+                    yield Select([(i.value, i) for i in RatingLevel], value=value, 
+                                    allow_blank=False, id=key.name)
+            with Horizontal():
+                yield Button("OK", id="ok_button")
+                yield Button("Cancel", id="cancel_button")
+
+    @on(Button.Pressed, "#ok_button")
+    def set_scale_factors(self):
+        for key in self.scale_factors.keys():
+            self.scale_factors[key] = self.query_one(f"#{key.name}").value
+        self.dismiss("ok")
+
+    @on(Button.Pressed, "#cancel_button")
+    def cancel_scale_factors(self):
+        self.dismiss(None)
+
+class ModuleRenameScreen(ModalScreen[str]):
+    def __init__(self, module_name: str, name = None, id = None, classes = None):
+        super().__init__(name, id, classes)
+        self.module_name: str = module_name
+
+    def compose(self):
+        yield Label("Module Name:")
+        yield Input(self.module_name, id="module_name_input")
+        with Horizontal():
+            yield Button("OK", id="ok_button")
+            yield Button("Cancel", id="cancel_button")
+
+    @on(Button.Pressed, "#ok_button")
+    def rename_module(self):
+        module_name: str = self.query_one("#module_name_input").value
+        self.dismiss(module_name)
+
+    @on(Button.Pressed, "#cancel_button")
+    def cancel_rename(self):
+        self.dismiss(None)
+
+# Timings and counters recorded by instrument.py. Recording can be switched on here if the app was not
+# started with --profile.
+class InstrumentationScreen(ModalScreen[None]):
+
+    def compose(self):
+        with Container():
+            yield Markdown(format_snapshot(instrument.snapshot()), id="instrumentation_report")
+            with Horizontal():
+                yield Button("Disable" if instrument.is_enabled() else "Enable", id="toggle_button")
+                yield Button("Refresh", id="refresh_button")
+                yield Button("Reset", id="reset_button")
+                yield Button("Close", id="close_button")
+
+    def show_report(self) -> None:
+        self.query_one("#instrumentation_report", Markdown).update(format_snapshot(instrument.snapshot()))
+
+    @on(Button.Pressed, "#toggle_button")
+    def toggle_instrumentation(self, event: Button.Pressed):
+        if instrument.is_enabled():
+            instrument.disable()
+        else:
+            instrument.enable()
+        event.button.label = "Disable" if instrument.is_enabled() else "Enable"
+
+    @on(Button.Pressed, "#refresh_button")
+    def refresh_report(self):
+        self.show_report()
+
+    @on(Button.Pressed, "#reset_button")
+    def reset_instrumentation(self):
+        instrument.reset()
+        self.show_report()
+
+    @on(Button.Pressed, "#close_button")
+    def close_report(self):
+        self.dismiss(None)
@@ -0,0 +1,289 @@
+# Memory mapped columnar file format for large projects.
+# The file starts with an 8 byte magic string and a little endian uint32 header length, followed by a JSON
+# header with the project level fields and the position of every column. Each column starts on an 8 byte
+# boundary so it can be viewed in place with np.frombuffer:
+#
+#     name_offsets     uint64[n + 1]   byte offsets of each module name in names
+#     names            utf-8 bytes
+#     sloc             int64[n]
+#     function_points  int64[n]
+#     language         uint8[n]        position in the header's "languages" list
+#     ratings          uint8[n, 16]    position in "rating_levels", one column per "effort_modifiers" entry
+#     subsystem        uint32[n]       position in the header's "subsystems" list of paths, whose first entry
+#                                      is the empty path; only written when some module is in a subsystem
+#
+# Opening a file only maps it, so a project with a million modules is ready in milliseconds and estimation
+# reads the sloc and ratings columns straight from the page cache.
+
+from pathlib import Path
+from typing import Optional, Union
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from calibration import COCOMO_II_2000, CalibrationProfile
+from cocomo import Module, Project, check_subsystem_path
+from constants import *
+from cost_tables import (EFFORT_MODIFIERS, SCALE_FACTORS, RATING_LEVELS, RATING_CODES, LANGUAGES, LANGUAGE_CODES,
+                         check_rating, get_effort_modifiers)
+from portfolio import PortfolioArrays, estimate_arrays
+
+MAGIC: bytes = b"COCOMOC1"
+VERSION: int = 1
+
+_PREFIX = struct.Struct("<8sI")
+_ALIGNMENT: int = 8
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_columnar(project: Project, path: Union[str, Path]) -> None:
+    modules: list[Module] = project.modules
+    count: int = len(modules)
+
+    encoded_names = [module.name.encode("utf-8") for module in modules]
+    name_offsets = np.zeros(count + 1, dtype="<u8")
+    name_offsets[1:] = np.cumsum([len(name) for name in encoded_names])
+
+    columns: dict[str, bytes] = {
+        "name_offsets": name_offsets.tobytes(),
+        "names": b"".join(encoded_names),
+        "sloc": np.fromiter((module.sloc for module in modules), dtype="<i8", count=count).tobytes(),
+        "function_points": np.fromiter((module.function_points for module in modules), dtype="<i8", count=count).tobytes(),
+        "language": np.fromiter((LANGUAGE_CODES[Language(module.language)] for module in modules),
+                                dtype=np.uint8, count=count).tobytes(),
+        "ratings": np.fromiter((RATING_CODES[level] for module in modules
+                                for level in get_effort_modifiers(module.effort_modifiers)),
+                               dtype=np.uint8, count=count * len(EFFORT_MODIFIERS)).tobytes(),
+    }
+
+    subsystems: dict[tuple[str, ...], int] = {(): 0}
+    subsystem_codes = np.fromiter((subsystems.setdefault(module.subsystem, len(subsystems)) for module in modules),
+                                  dtype="<u4", count=count)
+    if len(subsystems) > 1:
+        columns["subsystem"] = subsystem_codes.tobytes()
+
+    header: dict = {
+        "version": VERSION,
+        "name": project.name,
+        "scale_factors": {key.name: value.name for key, value in project.scale_factors.items()},
+        "schedule factor": project.schedule_factor.name,
+        "module_count": count,
+        "effort_modifiers": [key.name for key in EFFORT_MODIFIERS],
+        "rating_levels": [level.name for level in RATING_LEVELS],
+        "languages": [language.name for language in LANGUAGES],
+        "calibration": project.calibration.encode(),
+    }
+    if len(subsystems) > 1:
+        header["subsystems"] = [list(path) for path in subsystems]
+    # Recorded outcomes are optional, as in the JSON format.
+    if project.actual_effort is not None:
+        header["actual_effort"] = project.actual_effort
+    if project.actual_schedule is not None:
+        header["actual_schedule"] = project.actual_schedule
+
+    # The header holds the column offsets, which depend on the header length, so grow the space reserved for
+    # the header until the offsets written into it fit.
+    relative: dict[str, int] = {}
+    position: int = 0
+    for name, data in columns.items():
+        relative[name] = position
+        position = _align(position + len(data))
+    start: int = 0
+    while True:
+        header["columns"] = {name: [start + relative[name], len(data)] for name, data in columns.items()}
+        header_bytes = json.dumps(header).encode("utf-8")
+        needed: int = _align(_PREFIX.size + len(header_bytes))
+        if needed <= start:
+            break
+        start = needed
+
+    with open(path, "wb") as file:
+        file.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        file.write(header_bytes)
+        for name, data in columns.items():
+            file.seek(header["columns"][name][0])
+            file.write(data)
+        file.truncate(start + position)
+
+
+class ColumnarProject:
+    # A writable project maps the file read/write so update_function_points can change columns in place.
+    def __init__(self, path: Union[str, Path], writable: bool=False):
+        self.path: Path = Path(path)
+        self.writable: bool = writable
+        self._file = open(self.path, "r+b" if writable else "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            self._file.close()
+            raise ValueError(f"{self.path} is not a columnar project file")
+
+        if len(self._map) < _PREFIX.size or _PREFIX.unpack_from(self._map, 0)[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a columnar project file")
+        header_length: int = _PREFIX.unpack_from(self._map, 0)[1]
+        self.header: dict = json.loads(self._map[_PREFIX.size:_PREFIX.size + header_length])
+        if self.header["version"] != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} has unsupported version {self.header['version']}")
+
+        self.name: str = self.header["name"]
+        self.scale_factors: dict[ScaleFactor, RatingLevel] = {
+            ScaleFactor[key]: RatingLevel[value] for key, value in self.header["scale_factors"].items()}
+        self.schedule_factor: RatingLevel = RatingLevel[self.header["schedule factor"]]
+        self.module_count: int = self.header["module_count"]
+        self.calibration: CalibrationProfile = COCOMO_II_2000
+        if "calibration" in self.header:
+            self.calibration = CalibrationProfile.profile_from_dict(self.header["calibration"])
+        self.actual_effort: Optional[float] = self.header.get("actual_effort")
+        self.actual_schedule: Optional[float] = self.header.get("actual_schedule")
+
+        self.nominal_effort: float = 0.0
+        self.nominal_schedule: float = 0.0
+        self.average_staffing: float = 0.0
+        self.module_effort: Optional[np.ndarray] = None
+        self.module_schedule: Optional[np.ndarray] = None
+
+        # Files written with a different enum order are remapped once; with the current order this is skipped.
+        self._rating_map: Optional[np.ndarray] = None
+        if self.header["rating_levels"] != [level.name for level in RATING_LEVELS]:
+            self._rating_map = np.array([RATING_CODES[RatingLevel[name]] for name in self.header["rating_levels"]], dtype=np.uint8)
+        self._language_map: Optional[np.ndarray] = None
+        if self.header["languages"] != [language.name for language in LANGUAGES]:
+            self._language_map = np.array([LANGUAGE_CODES[Language[name]] for name in self.header["languages"]], dtype=np.uint8)
+        self._rating_columns: Optional[list[int]] = None
+        if self.header["effort_modifiers"] != [key.name for key in EFFORT_MODIFIERS]:
+            self._rating_columns = [self.header["effort_modifiers"].index(key.name) for key in EFFORT_MODIFIERS]
+
+    def _column(self, name: str, dtype: str) -> np.ndarray:
+        offset, length = self.header["columns"][name]
+        return np.frombuffer(self._map, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+    @property
+    def sloc(self) -> np.ndarray:
+        return self._column("sloc", "<i8")
+
+    @property
+    def function_points(self) -> np.ndarray:
+        return self._column("function_points", "<i8")
+
+    @property
+    def language_codes(self) -> np.ndarray:
+        codes = self._column("language", "u1")
+        return codes if self._language_map is None else self._language_map[codes]
+
+    @property
+    def ratings(self) -> np.ndarray:
+        # One row per module, one column per entry of cost_tables.EFFORT_MODIFIERS.
+        ratings = self._column("ratings", "u1").reshape(self.module_count, len(self.header["effort_modifiers"]))
+        if self._rating_columns is not None:
+            ratings = ratings[:, self._rating_columns]
+        return ratings if self._rating_map is None else self._rating_map[ratings]
+
+    # Overwrites the function points, and optionally the SLOC and language codes, of the modules at rows.
+    def update_function_points(self, rows: np.ndarray, function_points: np.ndarray, sloc: Optional[np.ndarray]=None,
+                               language_codes: Optional[np.ndarray]=None) -> None:
+        if not self.writable:
+            raise ValueError(f"{self.path} was not opened writable")
+        self._column("function_points", "<i8")[rows] = function_points
+        if sloc is not None:
+            self._column("sloc", "<i8")[rows] = sloc
+        if language_codes is not None:
+            if self._language_map is not None:
+                # Translate back to the positions in the file's own "languages" list.
+                file_codes = np.full(len(LANGUAGES), 255, dtype=np.uint8)
+                file_codes[self._language_map] = np.arange(len(self._language_map), dtype=np.uint8)
+                language_codes = file_codes[language_codes]
+                if (language_codes == 255).any():
+                    raise ValueError(f"{self.path} does not list every language being written")
+            self._column("language", "u1")[rows] = language_codes
+        self._map.flush()
+
+    # Each module's position in self.header["subsystems"], or None if no module is in a subsystem.
+    @property
+    def subsystem_codes(self) -> Optional[np.ndarray]:
+        return self._column("subsystem", "<u4") if "subsystem" in self.header["columns"] else None
+
+    def module_name(self, index: int) -> str:
+        offsets = self._column("name_offsets", "<u8")
+        offset: int = self.header["columns"]["names"][0]
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return self._map[offset + start:offset + end].decode("utf-8")
+
+    def module_names(self) -> list[str]:
+        offsets = self._column("name_offsets", "<u8").tolist()
+        start = self.header["columns"]["names"][0]
+        names = self._map[start:start + offsets[-1]]
+        return [names[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def portfolio_arrays(self) -> PortfolioArrays:
+        return PortfolioArrays(self.sloc, self.ratings, np.array([0, self.module_count]),
+                               np.array([[RATING_CODES[self.scale_factors[key]] for key in SCALE_FACTORS]]),
+                               np.array([RATING_CODES[self.schedule_factor]]), np.array([self.calibration.constants()]))
+
+    def estimate_effort(self) -> None:
+        estimate = estimate_arrays(self.portfolio_arrays())
+        self.nominal_effort = float(estimate.project_effort[0])
+        self.nominal_schedule = float(estimate.project_schedule[0])
+        self.average_staffing = float(estimate.project_staffing[0])
+        self.module_effort = estimate.module_effort
+        self.module_schedule = estimate.module_schedule
+
+    def to_project(self) -> Project:
+        project = Project(self.name)
+        for key, value in self.scale_factors.items():
+            check_rating(key, value)
+            project.scale_factors[key] = value
+        check_rating(EffortModifier.SCED, self.schedule_factor)
+        project.schedule_factor = self.schedule_factor
+        project.calibration = self.calibration
+        project.actual_effort = self.actual_effort
+        project.actual_schedule = self.actual_schedule
+
+        ratings = self.ratings.tolist()
+        subsystems: list[tuple[str, ...]] = [check_subsystem_path(path) for path in self.header.get("subsystems", [[]])]
+        codes = self.subsystem_codes
+        subsystem_codes: list[int] = [0] * self.module_count if codes is None else codes.tolist()
+        for name, sloc, function_points, language, module_ratings, subsystem in zip(
+                self.module_names(), self.sloc.tolist(), self.function_points.tolist(),
+                self.language_codes.tolist(), ratings, subsystem_codes):
+            module = Module(name)
+            module.sloc = sloc
+            module.function_points = function_points
+            module.language = LANGUAGES[language]
+            module.effort_modifiers = {key: RATING_LEVELS[code] for key, code in zip(EFFORT_MODIFIERS, module_ratings)}
+            module.subsystem = subsystems[subsystem]
+            project.add_module(module)
+        return project
+
+    # The map stays open while column arrays handed out by this object are still referenced,
+    # it is then released when the last of them is garbage collected.
+    def close(self) -> None:
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def __enter__(self) -> 'ColumnarProject':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def json_to_columnar(json_path: Union[str, Path], columnar_path: Union[str, Path]) -> None:
+    project = Project.project_from_dict(json.loads(Path(json_path).read_text()))
+    write_columnar(project, columnar_path)
+
+
+def columnar_to_json(columnar_path: Union[str, Path], json_path: Union[str, Path]) -> None:
+    with ColumnarProject(columnar_path) as columnar:
+        project = columnar.to_project()
+    Path(json_path).write_text(json.dumps(project.encode(), sort_keys=False, indent=4))
@@ -27,11 +27,11 @@ class ScaleFactor(Enum):
     PMAT = "Process Maturity"
     
 SCALE_FACTOR_VALUES = {
-    ScaleFactor.PREC: {RatingLevel.VERY_LOW: 6.20, RatingLevel.LOW: 4.96, RatingLevel.NOMINAL: 3.72, RatingLevel.HIGH: 2.48, RatingLevel.HIGH: 1.24, RatingLevel.EXTRA_HIGH: 0.00},
-    ScaleFactor.FLEX: {RatingLevel.VERY_LOW: 5.07, RatingLevel.LOW: 4.05, RatingLevel.NOMINAL: 3.04, RatingLevel.HIGH: 2.03, RatingLevel.HIGH: 1.01, RatingLevel.EXTRA_HIGH: 0.00},
-    ScaleFactor.RESL: {RatingLevel.VERY_LOW: 7.07, RatingLevel.LOW: 5.65, RatingLevel.NOMINAL: 4.24, RatingLevel.HIGH: 2.83, RatingLevel.HIGH: 1.41, RatingLevel.EXTRA_HIGH: 0.00},
-    ScaleFactor.TEAM: {RatingLevel.VERY_LOW: 5.48, RatingLevel.LOW: 4.38, RatingLevel.NOMINAL: 3.29, RatingLevel.HIGH: 2.19, RatingLevel.HIGH: 1.10, RatingLevel.EXTRA_HIGH: 0.00},
-    ScaleFactor.PMAT: {RatingLevel.VERY_LOW: 7.80, RatingLevel.LOW: 6.24, RatingLevel.NOMINAL: 4.68, RatingLevel.HIGH: 3.12, RatingLevel.HIGH: 1.56, RatingLevel.EXTRA_HIGH: 0.00},
+    ScaleFactor.PREC: {RatingLevel.VERY_LOW: 6.20, RatingLevel.LOW: 4.96, RatingLevel.NOMINAL: 3.72, RatingLevel.HIGH: 2.48, RatingLevel.VERY_HIGH: 1.24, RatingLevel.EXTRA_HIGH: 0.00},
+    ScaleFactor.FLEX: {RatingLevel.VERY_LOW: 5.07, RatingLevel.LOW: 4.05, RatingLevel.NOMINAL: 3.04, RatingLevel.HIGH: 2.03, RatingLevel.VERY_HIGH: 1.01, RatingLevel.EXTRA_HIGH: 0.00},
+    ScaleFactor.RESL: {RatingLevel.VERY_LOW: 7.07, RatingLevel.LOW: 5.65, RatingLevel.NOMINAL: 4.24, RatingLevel.HIGH: 2.83, RatingLevel.VERY_HIGH: 1.41, RatingLevel.EXTRA_HIGH: 0.00},
+    ScaleFactor.TEAM: {RatingLevel.VERY_LOW: 5.48, RatingLevel.LOW: 4.38, RatingLevel.NOMINAL: 3.29, RatingLevel.HIGH: 2.19, RatingLevel.VERY_HIGH: 1.10, RatingLevel.EXTRA_HIGH: 0.00},
+    ScaleFactor.PMAT: {RatingLevel.VERY_LOW: 7.80, RatingLevel.LOW: 6.24, RatingLevel.NOMINAL: 4.68, RatingLevel.HIGH: 3.12, RatingLevel.VERY_HIGH: 1.56, RatingLevel.EXTRA_HIGH: 0.00},
     
 }
 
@@ -55,8 +55,8 @@ class EffortModifier(Enum):
     SCED = "Required Development Schedule"
 
 EFFORT_MODIFIER_COST_DRIVERS = {
-    EffortModifier.RELY: {RatingLevel.VERY_LOW: 0.82, RatingLevel.LOW: 0.92, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.10, RatingLevel.HIGH: 1.26},
-    EffortModifier.DATA: {                            RatingLevel.LOW: 0.90, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.14, RatingLevel.HIGH: 1.28},
+    EffortModifier.RELY: {RatingLevel.VERY_LOW: 0.82, RatingLevel.LOW: 0.92, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.10, RatingLevel.VERY_HIGH: 1.26},
+    EffortModifier.DATA: {                            RatingLevel.LOW: 0.90, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.14, RatingLevel.VERY_HIGH: 1.28},
     EffortModifier.CPLX: {RatingLevel.VERY_LOW: 0.73, RatingLevel.LOW: 0.87, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.17, RatingLevel.VERY_HIGH: 1.34, RatingLevel.EXTRA_HIGH: 1.74},
     EffortModifier.RUSE: {                            RatingLevel.LOW: 0.95, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.07, RatingLevel.VERY_HIGH: 1.15, RatingLevel.EXTRA_HIGH: 1.24},
     EffortModifier.DOCU: {RatingLevel.VERY_LOW: 0.81, RatingLevel.LOW: 0.91, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.11, RatingLevel.VERY_HIGH: 1.23},
@@ -73,7 +73,11 @@ EFFORT_MODIFIER_COST_DRIVERS = {
     EffortModifier.SITE: {RatingLevel.VERY_LOW: 1.22, RatingLevel.LOW: 1.09, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 0.93, RatingLevel.VERY_HIGH: 0.86, RatingLevel.EXTRA_HIGH: 0.80},
 }
 
-SCHEDULE_COST_DRIVER = {RatingLevel.VERY_LOW: 1.43, RatingLevel.LOW: 0.92, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.26, RatingLevel.VERY_HIGH: 1.26, RatingLevel.EXTRA_HIGH: 1.24}
+SCHEDULE_COST_DRIVER = {RatingLevel.VERY_LOW: 1.43, RatingLevel.LOW: 1.14, RatingLevel.NOMINAL: 1.00, RatingLevel.HIGH: 1.00, RatingLevel.VERY_HIGH: 1.00}
+
+# Percentage of the nominal schedule that each SCED rating compresses or stretches the development time to,
+# used in the Time to Develop (TDEV) equation.
+SCHEDULE_PERCENT = {RatingLevel.VERY_LOW: 75, RatingLevel.LOW: 85, RatingLevel.NOMINAL: 100, RatingLevel.HIGH: 130, RatingLevel.VERY_HIGH: 160}
 
 class Language(Enum):
     Access = "Access"
@@ -126,45 +130,46 @@ FUNCTION_POINT_WEIGHTS: dict[str, tuple[int, int, int]] = {
     "EQ":  (3, 4, 6),      # External Inquiries
 }
 
-FUNCTION_POINT_LANGUAGE_RATIOS: dict[str, int] = {
-    "Access": 38,
-    "Jovial": 107,
-    "Ada 83": 71,
-    "Lisp": 64,
-    "Ada 95": 49,
-    "Machine Code": 640,
-    "AI Shell": 49,
-    "Modula 2": 80,
-    "APL": 32,
-    "Pascal": 91,
-    "Assembly - Basic": 320,
-    "PERL": 27,
-    "Assembly - Macro": 213,
-    "PowerBuilder": 16,
-    "Basic - ANSI": 64, 
-    "Prolog": 64,
-    "Basic - Compiled": 91,
-    "Query - Default": 13,
-    "Basic - Visual": 32,
-    "Report Generator": 80,
-    "C": 128,
-    "Second Generation Language": 107,
-    "C++": 55,
-    "Simulation - Default": 46,
-    "Cobol (ANSI 85)": 91,
-    "Spreadsheet": 6,
-    "Database - Default": 40,
-    "Third Generation Language": 80,
-    "Fifth Generation Language": 4,
-    "Unix Shell Scripts": 107,
-    "First Generation Language": 320,
-    "Forth": 64,
-    "Fortran 77": 10,
-    "Fortran 95": 71,
-    "Fourth Generation Language": 20,
-    "High Level Language": 64,
-    "Visual Basic 5.0": 29,
-    "HTML 3.0": 15,
-    "Visual C++": 34,
-    "Java": 53
+# SLOC per unadjusted function point for each language (COCOMO II.2000 backfiring table).
+FUNCTION_POINT_LANGUAGE_RATIOS: dict[Language, int] = {
+    Language.Access: 38,
+    Language.Jovial: 107,
+    Language.Ada83: 71,
+    Language.Lisp: 64,
+    Language.Ada95: 49,
+    Language.MachineCode: 640,
+    Language.AI_Shell: 49,
+    Language.Modula2: 80,
+    Language.APL: 32,
+    Language.Pascal: 91,
+    Language.AssemblyBasic: 320,
+    Language.PERL: 27,
+    Language.AssemblyMacro: 213,
+    Language.PowerBuilder: 16,
+    Language.BasicANSI: 64,
+    Language.Prolog: 64,
+    Language.BasicCompiled: 91,
+    Language.Query: 13,
+    Language.BasicVisual: 32,
+    Language.ReportGenerator: 80,
+    Language.C: 128,
+    Language.SecondGenerationLanguage: 107,
+    Language.Cpp: 55,
+    Language.Simulation: 46,
+    Language.Cobol85: 91,
+    Language.Spreadsheet: 6,
+    Language.Database: 40,
+    Language.ThirdGenerationLanguage: 80,
+    Language.FifthGenerationLanguage: 4,
+    Language.UnixShellScript: 107,
+    Language.FirstGenerationLanguage: 320,
+    Language.Forth: 64,
+    Language.Fortran77: 107,
+    Language.Fortran95: 71,
+    Language.FourthGenerationLanguage: 20,
+    Language.HighLevelLanguage: 64,
+    Language.VisualBasic5: 29,
+    Language.HTML3: 15,
+    Language.VisualCpp: 34,
+    Language.Java: 53,
 }
\ No newline at end of file
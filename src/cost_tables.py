@@ -0,0 +1,143 @@
+# Dense versions of the cost driver tables in constants.py, compiled and validated once at import time.
+# Every rating level is mapped to a small integer code (its position in RatingLevel) and every table row has
+# one slot per code. Slots for rating levels the COCOMO II.2000 model does not define for a driver hold
+# NOT_APPLICABLE, so looking one up is an index instead of a KeyError somewhere inside an estimate.
+# A malformed table in constants.py raises ValueError as soon as this module is imported.
+
+import math
+from operator import itemgetter
+from typing import Union
+
+from constants import *
+
+NOT_APPLICABLE: float = math.nan
+
+RATING_LEVELS: tuple[RatingLevel, ...] = tuple(RatingLevel)
+RATING_CODES: dict[RatingLevel, int] = {level: code for code, level in enumerate(RATING_LEVELS)}
+
+# Column order of the effort modifier and scale factor tables.
+# SCED is a project level driver, so it has its own table instead of a column with the module effort modifiers.
+EFFORT_MODIFIERS: tuple[EffortModifier, ...] = tuple(key for key in EffortModifier if key is not EffortModifier.SCED)
+SCALE_FACTORS: tuple[ScaleFactor, ...] = tuple(ScaleFactor)
+
+def _compile_row(driver_name: str, values: dict[RatingLevel, float], multiplier: bool) -> tuple[float, ...]:
+    for level, value in values.items():
+        if not isinstance(level, RatingLevel):
+            raise ValueError(f"{driver_name} has an entry for {level!r}, which is not a RatingLevel")
+        if not math.isfinite(value) or value < 0 or (multiplier and value == 0):
+            raise ValueError(f"{driver_name} has an invalid value {value!r} for {level.value}")
+
+    codes = sorted(RATING_CODES[level] for level in values)
+    if codes != list(range(codes[0], codes[-1] + 1)):
+        raise ValueError(f"{driver_name} skips a rating level between {RATING_LEVELS[codes[0]].value} and {RATING_LEVELS[codes[-1]].value}")
+    if RatingLevel.NOMINAL not in values:
+        raise ValueError(f"{driver_name} has no Nominal rating")
+    if multiplier and values[RatingLevel.NOMINAL] != 1.0:
+        raise ValueError(f"{driver_name} has a Nominal multiplier other than 1.0")
+
+    # Cost drivers move the estimate in one direction only, a step against it is usually a mistyped key.
+    defined = [values[RATING_LEVELS[code]] for code in codes]
+    steps = [b - a for a, b in zip(defined, defined[1:])]
+    if any(step > 0 for step in steps) and any(step < 0 for step in steps):
+        raise ValueError(f"{driver_name} values are not monotonic across rating levels")
+
+    return tuple(values.get(level, NOT_APPLICABLE) for level in RATING_LEVELS)
+
+def _check_keys(table_name: str, table: dict, expected: tuple) -> None:
+    if set(table) != set(expected):
+        raise ValueError(f"{table_name} must have exactly one entry for each of {', '.join(key.name for key in expected)}")
+
+_check_keys("EFFORT_MODIFIER_COST_DRIVERS", EFFORT_MODIFIER_COST_DRIVERS, EFFORT_MODIFIERS)
+_check_keys("SCALE_FACTOR_VALUES", SCALE_FACTOR_VALUES, SCALE_FACTORS)
+
+EFFORT_MODIFIER_TABLE: tuple[tuple[float, ...], ...] = tuple(
+    _compile_row(key.name, EFFORT_MODIFIER_COST_DRIVERS[key], multiplier=True) for key in EFFORT_MODIFIERS)
+SCALE_FACTOR_TABLE: tuple[tuple[float, ...], ...] = tuple(
+    _compile_row(key.name, SCALE_FACTOR_VALUES[key], multiplier=False) for key in SCALE_FACTORS)
+SCHEDULE_TABLE: tuple[float, ...] = _compile_row(EffortModifier.SCED.name, SCHEDULE_COST_DRIVER, multiplier=True)
+
+if set(SCHEDULE_PERCENT) != set(SCHEDULE_COST_DRIVER) or any(value <= 0 for value in SCHEDULE_PERCENT.values()):
+    raise ValueError("SCHEDULE_PERCENT must have a positive percentage for every SCED rating in SCHEDULE_COST_DRIVER")
+SCHEDULE_PERCENT_TABLE: tuple[float, ...] = tuple(float(SCHEDULE_PERCENT.get(level, NOT_APPLICABLE)) for level in RATING_LEVELS)
+
+# Scale factors are defined for every rating level and must fall to zero at Extra High.
+for key, row in zip(SCALE_FACTORS, SCALE_FACTOR_TABLE):
+    if any(math.isnan(value) for value in row) or row[RATING_CODES[RatingLevel.EXTRA_HIGH]] != 0.0:
+        raise ValueError(f"{key.name} must have a value for every rating level and 0.00 at Extra High")
+
+# Function point tables. LANGUAGE_RATIO_TABLE is indexed by LANGUAGE_CODES, FUNCTION_POINT_WEIGHT_TABLE has one
+# (low, average, high) row per entry of FUNCTION_POINT_COMPONENTS.
+LANGUAGES: tuple[Language, ...] = tuple(Language)
+LANGUAGE_CODES: dict[Language, int] = {language: code for code, language in enumerate(LANGUAGES)}
+FUNCTION_POINT_COMPONENTS: tuple[str, ...] = ("EI", "EO", "ILF", "EIF", "EQ")
+
+_check_keys("FUNCTION_POINT_LANGUAGE_RATIOS", FUNCTION_POINT_LANGUAGE_RATIOS, LANGUAGES)
+for language, ratio in FUNCTION_POINT_LANGUAGE_RATIOS.items():
+    if not isinstance(ratio, int) or ratio <= 0:
+        raise ValueError(f"FUNCTION_POINT_LANGUAGE_RATIOS has an invalid ratio {ratio!r} for {language.value}")
+LANGUAGE_RATIO_TABLE: tuple[int, ...] = tuple(FUNCTION_POINT_LANGUAGE_RATIOS[language] for language in LANGUAGES)
+
+if set(FUNCTION_POINT_WEIGHTS) != set(FUNCTION_POINT_COMPONENTS):
+    raise ValueError(f"FUNCTION_POINT_WEIGHTS must have exactly one entry for each of {', '.join(FUNCTION_POINT_COMPONENTS)}")
+for component, weights in FUNCTION_POINT_WEIGHTS.items():
+    if len(weights) != 3 or not all(isinstance(weight, int) for weight in weights) or not 0 < weights[0] <= weights[1] <= weights[2]:
+        raise ValueError(f"FUNCTION_POINT_WEIGHTS has invalid low, average and high weights {weights!r} for {component}")
+FUNCTION_POINT_WEIGHT_TABLE: tuple[tuple[int, int, int], ...] = tuple(
+    FUNCTION_POINT_WEIGHTS[component] for component in FUNCTION_POINT_COMPONENTS)
+
+_EFFORT_MODIFIER_ROWS: dict[EffortModifier, tuple[float, ...]] = dict(zip(EFFORT_MODIFIERS, EFFORT_MODIFIER_TABLE))
+_EFFORT_MODIFIER_ROWS[EffortModifier.SCED] = SCHEDULE_TABLE
+_SCALE_FACTOR_ROWS: dict[ScaleFactor, tuple[float, ...]] = dict(zip(SCALE_FACTORS, SCALE_FACTOR_TABLE))
+
+get_effort_modifiers = itemgetter(*EFFORT_MODIFIERS)
+get_scale_factors = itemgetter(*SCALE_FACTORS)
+
+def _row(driver: Union[EffortModifier, ScaleFactor]) -> tuple[float, ...]:
+    if isinstance(driver, ScaleFactor):
+        return _SCALE_FACTOR_ROWS[driver]
+    return _EFFORT_MODIFIER_ROWS[driver]
+
+def is_applicable(driver: Union[EffortModifier, ScaleFactor], level: RatingLevel) -> bool:
+    return not math.isnan(_row(driver)[RATING_CODES[level]])
+
+def applicable_levels(driver: Union[EffortModifier, ScaleFactor]) -> list[RatingLevel]:
+    return [level for level in RATING_LEVELS if is_applicable(driver, level)]
+
+def check_rating(driver: Union[EffortModifier, ScaleFactor], level: RatingLevel) -> None:
+    if not isinstance(level, RatingLevel) or not is_applicable(driver, level):
+        raise ValueError(f"{getattr(level, 'value', level)} is not a valid rating for {driver.name}")
+
+def effort_adjustment_factor(effort_modifiers: dict[EffortModifier, RatingLevel]) -> float:
+    # Product of the 16 module level effort multipliers, SCED is not included.
+    eaf: float = 1.0
+    for row, level in zip(EFFORT_MODIFIER_TABLE, get_effort_modifiers(effort_modifiers)):
+        eaf *= row[RATING_CODES[level]]
+    if math.isnan(eaf):
+        for key, level in effort_modifiers.items():
+            check_rating(key, level)
+    return eaf
+
+def scale_factor_sum(scale_factors: dict[ScaleFactor, RatingLevel]) -> float:
+    total: float = 0.0
+    for row, level in zip(SCALE_FACTOR_TABLE, get_scale_factors(scale_factors)):
+        total += row[RATING_CODES[level]]
+    return total
+
+def schedule_multiplier(level: RatingLevel) -> float:
+    multiplier: float = SCHEDULE_TABLE[RATING_CODES[level]]
+    if math.isnan(multiplier):
+        check_rating(EffortModifier.SCED, level)
+    return multiplier
+
+def schedule_percent(level: RatingLevel) -> float:
+    percent: float = SCHEDULE_PERCENT_TABLE[RATING_CODES[level]]
+    if math.isnan(percent):
+        check_rating(EffortModifier.SCED, level)
+    return percent
+
+# Accepts a Language or its value, such as "C++", so modules whose language was set as a string still convert.
+def sloc_per_function_point(language: Union[Language, str]) -> int:
+    try:
+        return LANGUAGE_RATIO_TABLE[LANGUAGE_CODES[Language(language)]]
+    except ValueError:
+        raise ValueError(f"{language!r} is not a known language") from None
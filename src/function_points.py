@@ -0,0 +1,164 @@
+# Bulk function point counting and function point to SLOC conversion.
+#
+# Counts are held in an int64 array of shape (modules, 5, 3): one row per module, the function types in the
+# order of cost_tables.FUNCTION_POINT_COMPONENTS (EI, EO, ILF, EIF, EQ) and, for each, the number of low,
+# average and high complexity functions. CSV files have a "module" column, an optional "language" column
+# and one count column per function type and complexity:
+#
+#     module,language,EI_low,EI_average,EI_high,EO_low,...,EQ_high
+#     Billing,Java,5,10,2,3,...,0
+#
+# Counting thousands of modules is then a single matrix product instead of a Python loop per module.
+
+from pathlib import Path
+from typing import Iterable, Optional, TextIO, Union
+import csv
+
+import numpy as np
+
+from cocomo import Module, Project
+from columnar import ColumnarProject
+from constants import *
+from cost_tables import FUNCTION_POINT_COMPONENTS, FUNCTION_POINT_WEIGHT_TABLE, LANGUAGES, LANGUAGE_CODES, LANGUAGE_RATIO_TABLE
+
+COMPLEXITIES: tuple[str, ...] = ("low", "average", "high")
+COUNT_COLUMNS: list[str] = [f"{component}_{complexity}" for component in FUNCTION_POINT_COMPONENTS
+                            for complexity in COMPLEXITIES]
+
+_WEIGHTS = np.array(FUNCTION_POINT_WEIGHT_TABLE, dtype=np.int64).reshape(-1)
+_LANGUAGE_RATIOS = np.array(LANGUAGE_RATIO_TABLE, dtype=np.int64)
+
+PathOrFile = Union[str, Path, TextIO]
+
+
+class FunctionCounts:
+    # language_codes is None when the counts did not say which language each module is written in.
+    def __init__(self, names: list[str], counts: np.ndarray, language_codes: Optional[np.ndarray]=None):
+        self.names: list[str] = names
+        self.counts: np.ndarray = counts
+        self.language_codes: Optional[np.ndarray] = language_codes
+
+    @property
+    def function_points(self) -> np.ndarray:
+        return function_points(self.counts)
+
+    @property
+    def sloc(self) -> np.ndarray:
+        if self.language_codes is None:
+            raise ValueError("the function counts have no languages to convert function points to SLOC with")
+        return function_points_to_sloc(self.function_points, self.language_codes)
+
+
+def pack_function_counts(function_counts: Iterable[dict[str, tuple[int, int, int]]]) -> np.ndarray:
+    # Takes the same dicts as Module.calculate_function_points.
+    rows = [[function_count[component] for component in FUNCTION_POINT_COMPONENTS] for function_count in function_counts]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(FUNCTION_POINT_COMPONENTS), len(COMPLEXITIES))
+
+
+def function_points(counts: np.ndarray) -> np.ndarray:
+    counts = np.asarray(counts)
+    if counts.ndim != 3 or counts.shape[1:] != (len(FUNCTION_POINT_COMPONENTS), len(COMPLEXITIES)):
+        raise ValueError(f"function counts must have shape (modules, {len(FUNCTION_POINT_COMPONENTS)}, {len(COMPLEXITIES)}), not {counts.shape}")
+    if (counts < 0).any():
+        raise ValueError("function counts cannot be negative")
+    return counts.reshape(len(counts), -1).astype(np.int64, copy=False) @ _WEIGHTS
+
+
+# Accepts Language members, their values ("C++") or their names ("Cpp").
+def language_codes(languages: Iterable[Union[Language, str]]) -> np.ndarray:
+    codes: list[int] = []
+    for language in languages:
+        try:
+            codes.append(LANGUAGE_CODES[Language(language)])
+        except ValueError:
+            if language not in Language.__members__:
+                raise ValueError(f"{language!r} is not a known language") from None
+            codes.append(LANGUAGE_CODES[Language[language]])
+    return np.array(codes, dtype=np.uint8)
+
+
+def function_points_to_sloc(function_points: np.ndarray, language_codes: np.ndarray) -> np.ndarray:
+    return np.asarray(function_points, dtype=np.int64) * _LANGUAGE_RATIOS[language_codes]
+
+
+def read_function_counts(source: PathOrFile) -> FunctionCounts:
+    if isinstance(source, (str, Path)):
+        with open(source, newline="", encoding="utf-8") as file:
+            return read_function_counts(file)
+
+    reader = csv.DictReader(source)
+    missing = [column for column in ["module"] + COUNT_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"function count CSV is missing the columns {', '.join(missing)}")
+
+    names: list[str] = []
+    languages: list[str] = []
+    rows: list[list[int]] = []
+    for line_number, row in enumerate(reader, start=2):
+        names.append(row["module"])
+        languages.append(row.get("language") or Language.C.value)
+        try:
+            rows.append([int(row[column]) for column in COUNT_COLUMNS])
+        except (TypeError, ValueError):
+            raise ValueError(f"line {line_number}: function counts must be integers") from None
+
+    counts = np.array(rows, dtype=np.int64).reshape(len(rows), len(FUNCTION_POINT_COMPONENTS), len(COMPLEXITIES))
+    return FunctionCounts(names, counts, language_codes(languages) if "language" in reader.fieldnames else None)
+
+
+# Sets function_points, and sloc unless it is None, on each module, as calculate_function_points and
+# function_points_to_sloc would.
+def update_modules(modules: list[Module], function_points: np.ndarray, sloc: Optional[np.ndarray]=None) -> None:
+    if len(modules) != len(function_points) or (sloc is not None and len(sloc) != len(modules)):
+        raise ValueError("there must be one function point count and SLOC value per module")
+    for module, value in zip(modules, function_points.tolist()):
+        module.function_points = value
+    if sloc is not None:
+        for module, value in zip(modules, sloc.tolist()):
+            module.sloc = value
+
+
+# Updates the project's modules from counts, matching them by name, and adds the modules the project does
+# not have yet. Languages in the counts replace the modules' languages; without them each module keeps its
+# own. Returns the number of modules added.
+def update_project(project: Project, counts: FunctionCounts, convert_to_sloc: bool=True) -> int:
+    modules_by_name: dict[str, Module] = {module.name: module for module in project.modules}
+    modules: list[Module] = []
+    added: int = 0
+    for name in counts.names:
+        module: Optional[Module] = modules_by_name.get(name)
+        if module is None:
+            module = Module(name)
+            project.add_module(module)
+            modules_by_name[name] = module
+            added += 1
+        modules.append(module)
+
+    codes: np.ndarray
+    if counts.language_codes is not None:
+        for module, code in zip(modules, counts.language_codes.tolist()):
+            module.language = LANGUAGES[code]
+        codes = counts.language_codes
+    else:
+        codes = language_codes(module.language for module in modules)
+
+    points = counts.function_points
+    update_modules(modules, points, function_points_to_sloc(points, codes) if convert_to_sloc else None)
+    return added
+
+
+# Writes the function points, SLOC and languages of counts straight into a columnar project opened with
+# writable=True, without building Module objects. Every counted module must already be in the file.
+def update_columnar(columnar: ColumnarProject, counts: FunctionCounts, convert_to_sloc: bool=True) -> None:
+    positions: dict[str, int] = {name: row for row, name in enumerate(columnar.module_names())}
+    try:
+        rows = np.array([positions[name] for name in counts.names], dtype=np.int64)
+    except KeyError as error:
+        raise ValueError(f"{error.args[0]!r} is not a module of {columnar.name}") from None
+
+    points = counts.function_points
+    sloc: Optional[np.ndarray] = None
+    if convert_to_sloc:
+        codes = counts.language_codes if counts.language_codes is not None else columnar.language_codes[rows]
+        sloc = function_points_to_sloc(points, codes)
+    columnar.update_function_points(rows, points, sloc, counts.language_codes)
@@ -0,0 +1,278 @@
+# Opt-in counters and timing histograms for the main operations: estimation, JSON encoding and decoding,
+# the TUI's refreshes and pane building, and directory listings.
+#
+# Everything is off until enable() is called; a disabled @timed function costs one extra call and a check
+# of a module global. Timings go into a histogram per operation with power of two buckets from 1 us up, so
+# recording is O(1) and the memory used does not grow with the number of calls. snapshot() returns plain
+# JSON-able data that can be written as JSON or as a pstats file, where every operation shows up as one
+# function, so `python -m pstats` or snakeviz can sort and compare runs.
+#
+#     python src/cocomo_app.py --profile session.json
+#     python src/main.py projects/ --profile batch.prof --profile-format pstats
+
+from functools import wraps
+from inspect import iscoroutinefunction
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Optional, Union
+import argparse
+import json
+import marshal
+import math
+
+BUCKETS: int = 32
+
+_enabled: bool = False
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _bucket(seconds: float) -> int:
+    # Bucket k holds durations below 2^k microseconds and at least 2^(k - 1), bucket 0 everything under 1 us.
+    return min(max(math.frexp(seconds * 1e6)[1], 0), BUCKETS - 1) if seconds > 0 else 0
+
+
+class OperationStats:
+    def __init__(self, location: Optional[tuple[str, int, str]]=None):
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = math.inf
+        self.max: float = 0.0
+        self.buckets: list[int] = [0] * BUCKETS
+        # (file, line, function) of a @timed function, used as its key in pstats files.
+        self.location: Optional[tuple[str, int, str]] = location
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[_bucket(seconds)] += 1
+
+    def merge(self, other: 'OperationStats') -> None:
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+        if self.location is None:
+            self.location = other.location
+
+    # Upper bound of the bucket the given fraction of calls falls into.
+    def percentile(self, fraction: float) -> float:
+        seen: int = 0
+        for bucket, calls in enumerate(self.buckets):
+            seen += calls
+            if calls and seen >= fraction * self.count:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def encode(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": self.buckets,
+            "location": list(self.location) if self.location is not None else None,
+        }
+
+    @staticmethod
+    def stats_from_dict(data: dict) -> 'OperationStats':
+        stats = OperationStats(tuple(data["location"]) if data.get("location") else None)
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats.min = data["min"] if stats.count else math.inf
+        stats.max = data["max"]
+        stats.buckets = list(data["buckets"])
+        return stats
+
+
+# Timers and counters of one process, safe to record into from worker threads.
+class Instrumentation:
+    def __init__(self):
+        self.timers: dict[str, OperationStats] = {}
+        self.counters: dict[str, int] = {}
+        self._lock: Lock = Lock()
+
+    def record(self, name: str, seconds: float, location: Optional[tuple[str, int, str]]=None) -> None:
+        with self._lock:
+            stats: Optional[OperationStats] = self.timers.get(name)
+            if stats is None:
+                stats = self.timers[name] = OperationStats(location)
+            stats.record(seconds)
+
+    def increment(self, name: str, amount: int=1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "timers": {name: stats.encode() for name, stats in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    # Adds a snapshot taken elsewhere, such as in a worker process.
+    def merge(self, snapshot: dict) -> None:
+        with self._lock:
+            for name, data in snapshot["timers"].items():
+                stats = OperationStats.stats_from_dict(data)
+                if name in self.timers:
+                    self.timers[name].merge(stats)
+                else:
+                    self.timers[name] = stats
+            for name, amount in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+
+INSTRUMENTATION: Instrumentation = Instrumentation()
+
+
+def timed(name: str) -> Callable:
+    def decorate(func: Callable) -> Callable:
+        location: tuple[str, int, str] = (func.__code__.co_filename, func.__code__.co_firstlineno, name)
+
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                start: float = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    INSTRUMENTATION.record(name, perf_counter() - start, location)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start: float = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                INSTRUMENTATION.record(name, perf_counter() - start, location)
+        return wrapper
+
+    return decorate
+
+
+class _BlockTimer:
+    def __init__(self, name: str):
+        self.name: str = name
+        self.start: Optional[float] = None
+
+    def __enter__(self) -> '_BlockTimer':
+        if _enabled:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.start is not None:
+            INSTRUMENTATION.record(self.name, perf_counter() - self.start)
+            self.start = None
+
+
+# Times a block: with timer("tui.load_project"): ...
+def timer(name: str) -> _BlockTimer:
+    return _BlockTimer(name)
+
+
+def increment(name: str, amount: int=1) -> None:
+    if _enabled:
+        INSTRUMENTATION.increment(name, amount)
+
+
+def snapshot() -> dict:
+    return INSTRUMENTATION.snapshot()
+
+
+def reset() -> None:
+    INSTRUMENTATION.reset()
+
+
+# Runs func with instrumentation on and returns its result together with what it recorded. Meant for worker
+# processes, whose snapshots the parent adds to its own with INSTRUMENTATION.merge.
+def call_with_snapshot(func: Callable, *args, **kwargs) -> tuple:
+    was_enabled: bool = _enabled
+    enable()
+    reset()
+    try:
+        result = func(*args, **kwargs)
+        return result, snapshot()
+    finally:
+        reset()
+        if not was_enabled:
+            disable()
+
+
+# pstats files are a marshalled dict of (file, line, function) -> (primitive calls, calls, own time,
+# cumulative time, callers). Only the total time of an operation is known, so it is used for both times.
+def pstats_data(data: dict) -> dict:
+    stats: dict = {}
+    for name, timer_data in data["timers"].items():
+        key = tuple(timer_data["location"]) if timer_data.get("location") else ("~", 0, name)
+        stats[key] = (timer_data["count"], timer_data["count"], timer_data["total"], timer_data["total"], {})
+    return stats
+
+
+def write_profile(path: Union[str, Path], format: Optional[str]=None, data: Optional[dict]=None) -> None:
+    # format is "json" or "pstats"; by default .prof and .pstats files are written as pstats, others as JSON.
+    path = Path(path)
+    data = snapshot() if data is None else data
+    if format is None:
+        format = "pstats" if path.suffix in (".prof", ".pstats") else "json"
+    if format == "pstats":
+        with open(path, "wb") as file:
+            marshal.dump(pstats_data(data), file)
+    elif format == "json":
+        path.write_text(json.dumps(data, indent=4), encoding="utf-8")
+    else:
+        raise ValueError(f"{format!r} is not a profile format, use json or pstats")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", metavar="FILE", help="record timings of the main operations and write them to FILE on exit")
+    parser.add_argument("--profile-format", choices=["json", "pstats"],
+                        help="format of the --profile file (default: pstats for .prof and .pstats files, otherwise json)")
+
+
+# A Markdown report of a snapshot, slowest operations first.
+def format_snapshot(data: dict) -> str:
+    lines: list[str] = ["## Timings", "",
+                        "| Operation | Calls | Total ms | Mean ms | p90 ms | Max ms |",
+                        "|:--|--:|--:|--:|--:|--:|"]
+    for name, stats in sorted(data["timers"].items(), key=lambda item: item[1]["total"], reverse=True):
+        lines.append(f"| {name} | {stats['count']} | {stats['total'] * 1000:.2f} | {stats['mean'] * 1000:.3f} "
+                     f"| {stats['p90'] * 1000:.3f} | {stats['max'] * 1000:.3f} |")
+    if not data["timers"]:
+        lines.append("| nothing recorded yet | | | | | |")
+    lines += ["", "## Counters", "", "| Counter | Value |", "|:--|--:|"]
+    lines += [f"| {name} | {value} |" for name, value in data["counters"].items()]
+    if not data["counters"]:
+        lines.append("| nothing counted yet | |")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,267 @@
+# Append-only journal of the edits made to a saved project.
+#
+# Next to a project file, say widgets.json, the journal widgets.json.journal holds one JSON line per edit:
+#
+#     {"seq": 41, "op": "set_sloc", "module": 3, "sloc": 12000}
+#     {"seq": 42, "op": "set_effort_modifier", "module": 3, "key": "CPLX", "level": "HIGH"}
+#
+# so saving an edit costs a few dozen bytes instead of rewriting the whole project. Lines are written by a
+# background thread in batches. Every compact_after edits, and on compact(), the full project is written to
+# the project file instead (through a temporary file, so the old one stays intact until the new one is
+# complete) and the journal is started over. The snapshot records the seq of the last edit it includes as
+# "journal_sequence", which is how load_project knows which journal lines still need replaying, even when
+# the process died between writing the snapshot and truncating the journal. A torn last line is ignored.
+#
+# Modules are referred to by their position in the project, which replaying the edits in order keeps right.
+
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Event, Thread
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
+import json
+import os
+
+from cocomo import Module, Project
+from constants import *
+from cost_tables import check_rating
+from instrument import increment, timed
+
+JOURNAL_SUFFIX: str = ".journal"
+SEQUENCE_KEY: str = "journal_sequence"
+
+PathLike = Union[str, Path]
+
+
+def journal_path(path: PathLike) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + JOURNAL_SUFFIX)
+
+
+# Journal entries in file order. Reading stops at the first line that is not a complete entry, which can
+# only be the last one, cut short by a crash.
+def read_journal(path: PathLike) -> Iterator[dict]:
+    try:
+        file = open(journal_path(path), encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for line in file:
+            if not line.endswith("\n"):
+                return
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            yield entry
+
+
+def apply_entry(project: Project, entry: dict) -> None:
+    op: str = entry["op"]
+    if op == "set_sloc":
+        if entry["sloc"] < 0:
+            raise ValueError("SLOC cannot be negative")
+        project.modules[entry["module"]].sloc = entry["sloc"]
+    elif op == "set_effort_modifier":
+        key, level = EffortModifier[entry["key"]], RatingLevel[entry["level"]]
+        check_rating(key, level)
+        project.modules[entry["module"]].effort_modifiers[key] = level
+    elif op == "set_scale_factor":
+        key, level = ScaleFactor[entry["key"]], RatingLevel[entry["level"]]
+        check_rating(key, level)
+        project.scale_factors[key] = level
+    elif op == "set_schedule_factor":
+        check_rating(EffortModifier.SCED, RatingLevel[entry["level"]])
+        project.schedule_factor = RatingLevel[entry["level"]]
+    elif op == "add_module":
+        project.add_module(Module.module_from_dict(entry["data"]), entry["position"])
+    elif op == "remove_module":
+        project.remove_module(entry["module"])
+    elif op == "move_module":
+        project.move_module(entry["module"], entry["position"])
+    elif op == "rename_module":
+        project.modules[entry["module"]].name = entry["name"]
+    elif op == "rename_project":
+        project.name = entry["name"]
+    else:
+        raise ValueError(f"{op!r} is not a journal operation")
+
+
+# Applies the entries newer than after and returns the seq of the last one applied, or after if there was none.
+def replay(project: Project, entries: Iterable[dict], after: int=0) -> int:
+    sequence: int = after
+    for entry in entries:
+        if entry["seq"] <= sequence:
+            continue
+        apply_entry(project, entry)
+        sequence = entry["seq"]
+    return sequence
+
+
+def _load(path: PathLike) -> tuple[Project, int]:
+    data: dict = json.loads(Path(path).read_text(encoding="utf-8"))
+    project: Project = Project.project_from_dict(data)
+    return project, replay(project, read_journal(path), data.get(SEQUENCE_KEY, 0))
+
+
+# The project saved at path with the edits journaled since its last snapshot applied.
+@timed("journal.load")
+def load_project(path: PathLike) -> Project:
+    return _load(path)[0]
+
+
+# Writes the edits made to a project to the journal of the file at path. The record methods are called
+# after the edit has been made to the project, apart from remove_module, which needs the position.
+class ProjectJournal:
+    def __init__(self, path: PathLike, project: Project, sequence: int=0, compact_after: int=1000,
+                 on_compacted: Optional[Callable[[Path], None]]=None):
+        self.path: Path = Path(path)
+        self.project: Project = project
+        self.sequence: int = sequence
+        self.compact_after: int = compact_after
+        # Called on the writer thread after each snapshot has been written.
+        self.on_compacted: Optional[Callable[[Path], None]] = on_compacted
+        self.entries_since_compaction: int = 0
+        self.error: Optional[BaseException] = None
+        # Position of every module, so recording an edit does not scan the module list. Adding, removing and
+        # moving modules shift positions, so they drop it and the next edit rebuilds it.
+        self._positions: Optional[dict[Module, int]] = None
+
+        self._queue: SimpleQueue = SimpleQueue()
+        self._writer: Thread = Thread(target=self._write_loop, name=f"journal {self.path.name}", daemon=True)
+        self._writer.start()
+
+    # Loads the project at path, replaying its journal, and keeps journaling to the same file.
+    @staticmethod
+    def open(path: PathLike, compact_after: int=1000,
+             on_compacted: Optional[Callable[[Path], None]]=None) -> 'ProjectJournal':
+        project, sequence = _load(path)
+        return ProjectJournal(path, project, sequence, compact_after, on_compacted)
+
+    def _record(self, entry: dict) -> None:
+        if self.error is not None:
+            raise self.error
+        self.sequence += 1
+        self._queue.put(("append", json.dumps({"seq": self.sequence, **entry}, separators=(",", ":")) + "\n"))
+        increment("journal.entries")
+        self.entries_since_compaction += 1
+        if self.entries_since_compaction >= self.compact_after:
+            self.compact()
+
+    def _position(self, module: Module) -> int:
+        position: Optional[int] = None if self._positions is None else self._positions.get(module)
+        # Also rebuilt if the modules were rearranged without telling the journal.
+        if position is None or position >= len(self.project.modules) or self.project.modules[position] is not module:
+            self._positions = {item: i for i, item in enumerate(self.project.modules)}
+            position = self._positions.get(module)
+            if position is None:
+                raise ValueError(f"module {module.name!r} is not in project {self.project.name!r}")
+        return position
+
+    def set_sloc(self, module: Module) -> None:
+        self._record({"op": "set_sloc", "module": self._position(module), "sloc": module.sloc})
+
+    def set_effort_modifier(self, module: Module, key: EffortModifier) -> None:
+        self._record({"op": "set_effort_modifier", "module": self._position(module),
+                      "key": key.name, "level": module.effort_modifiers[key].name})
+
+    def set_scale_factor(self, key: ScaleFactor) -> None:
+        self._record({"op": "set_scale_factor", "key": key.name, "level": self.project.scale_factors[key].name})
+
+    def set_schedule_factor(self) -> None:
+        self._record({"op": "set_schedule_factor", "level": self.project.schedule_factor.name})
+
+    def add_module(self, module: Module) -> None:
+        self._positions = None
+        self._record({"op": "add_module", "position": self._position(module), "data": module.encode()})
+
+    def remove_module(self, position: int) -> None:
+        self._positions = None
+        self._record({"op": "remove_module", "module": position})
+
+    def move_module(self, old_position: int, new_position: int) -> None:
+        self._positions = None
+        self._record({"op": "move_module", "module": old_position, "position": new_position})
+
+    def rename_module(self, module: Module) -> None:
+        self._record({"op": "rename_module", "module": self._position(module), "name": module.name})
+
+    def rename_project(self) -> None:
+        self._record({"op": "rename_project", "name": self.project.name})
+
+    # Queues a full snapshot of the project as it is now. Encoding happens here so the snapshot matches the
+    # journal exactly; turning it into text and writing it happens on the writer thread.
+    @timed("journal.compact")
+    def compact(self) -> None:
+        data: dict = self.project.encode()
+        data[SEQUENCE_KEY] = self.sequence
+        self._queue.put(("snapshot", data))
+        self.entries_since_compaction = 0
+
+    # Waits until everything recorded so far is on disk.
+    def flush(self) -> None:
+        done = Event()
+        self._queue.put(("flush", done))
+        done.wait()
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_snapshot(self, data: dict) -> None:
+        temporary_path: Path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(data, indent=4))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        # Entries up to the snapshot's seq are skipped on replay, so a crash before this point loses nothing.
+        journal_path(self.path).unlink(missing_ok=True)
+        increment("journal.compactions")
+        if self.on_compacted is not None:
+            self.on_compacted(self.path)
+
+    def _write_item(self, item: tuple, file: Optional[TextIO]) -> Optional[TextIO]:
+        if item[0] == "append":
+            if file is None:
+                file = open(journal_path(self.path), "a", encoding="utf-8")
+            file.write(item[1])
+        elif item[0] == "snapshot":
+            if file is not None:
+                file.close()
+                file = None
+            self._write_snapshot(item[1])
+        return file
+
+    # The journal file is only created once there is something to write to it.
+    def _write_loop(self) -> None:
+        file: Optional[TextIO] = None
+        stopping: bool = False
+        while not stopping:
+            # Everything queued while the last batch was written goes out as one batch.
+            items: list = [self._queue.get()]
+            while not self._queue.empty():
+                items.append(self._queue.get())
+            waiting: list[Event] = []
+            for item in items:
+                if item is None:
+                    stopping = True
+                elif item[0] == "flush":
+                    waiting.append(item[1])
+                else:
+                    try:
+                        file = self._write_item(item, file)
+                    except OSError as error:
+                        self.error = error
+            try:
+                if file is not None:
+                    file.flush()
+                    os.fsync(file.fileno())
+            except OSError as error:
+                self.error = error
+            for done in waiting:
+                done.set()
+        if file is not None:
+            file.close()
@@ -1,6 +1,183 @@
-def main():
-    print("Hello from cocomo!")
+# Headless command line estimator. Estimates saved project JSON files in parallel and writes a combined report.
+# Edits autosaved to a journal next to a file (see journal.py) are included.
+#
+#     python src/main.py ~/cocomo-projects "archive/**/*.json" --jobs 8 --format csv --output report.csv
+#
+# Nothing here imports Textual, so it starts quickly in CI pipelines.
+
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+
+from calibration import CalibrationProfile, get_profile
+from cocomo import Project
+from instrument import INSTRUMENTATION, add_profile_arguments, call_with_snapshot
+from journal import load_project
+from ndjson import chunked, ordered_map
+import instrument
+
+CSV_FIELDS: list[str] = ["file", "project", "modules", "sloc", "effort", "schedule", "staffing", "error"]
+
+
+def find_project_files(patterns: Iterable[str]) -> list[Path]:
+    # Directories contribute every *.json file directly inside them, anything else is treated as a glob.
+    files: list[Path] = []
+    for pattern in patterns:
+        path = Path(pattern).expanduser()
+        if path.is_dir():
+            files.extend(sorted(child for child in path.iterdir() if child.suffix == ".json" and child.is_file()))
+        else:
+            files.extend(Path(match) for match in sorted(glob.glob(str(path), recursive=True)) if Path(match).is_file())
+    return files
+
+
+# A calibration profile, if given, replaces the one saved in each file.
+def estimate_files(paths: list[str], calibration: Optional[CalibrationProfile]=None) -> list[dict]:
+    # Runs in the worker processes, so it takes and returns only plain, picklable values.
+    from portfolio import estimate_portfolio
+
+    results: list[dict] = []
+    projects: list[Project] = []
+    for path in paths:
+        result: dict = {"file": path}
+        try:
+            project = load_project(path)
+            if calibration is not None:
+                project.calibration = calibration
+            projects.append(project)
+            result["project"] = project
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as error:
+            result["error"] = f"{type(error).__name__}: {error}"
+        results.append(result)
+
+    estimate_portfolio(projects)
+
+    for result in results:
+        project: Optional[Project] = result.pop("project", None)
+        if project is None:
+            continue
+        result.update(project_result(project))
+    return results
+
+
+# The report fields of an estimated project; also what the estimation service answers with.
+def project_result(project: Project) -> dict:
+    return {
+        "project": project.name,
+        "modules": [{"name": module.name, "sloc": module.sloc, "effort": module.nominal_effort,
+                     "schedule": module.nominal_schedule} for module in project.modules],
+        "sloc": sum(module.sloc for module in project.modules),
+        "effort": project.nominal_effort,
+        "schedule": project.nominal_schedule,
+        "staffing": project.average_staffing,
+    }
+
+
+def estimate_all(files: list[Path], jobs: int, chunk_size: int, progress: Optional[TextIO]=None,
+                 calibration: Optional[CalibrationProfile]=None) -> Iterator[dict]:
+    done: int = 0
+    work = partial(estimate_files, calibration=calibration)
+    # Worker processes have instrumentation of their own, so when profiling they send back what they recorded.
+    profile_workers: bool = instrument.is_enabled() and jobs > 1
+    if profile_workers:
+        work = partial(call_with_snapshot, work)
+    for results in ordered_map(work, chunked([str(path) for path in files], chunk_size), jobs):
+        if profile_workers:
+            results, snapshot = results
+            INSTRUMENTATION.merge(snapshot)
+        done += len(results)
+        if progress is not None:
+            progress.write(f"\restimated {done}/{len(files)} files")
+            progress.flush()
+        yield from results
+    if progress is not None and files:
+        progress.write("\n")
+
+
+def write_csv(results: Iterable[dict], output: TextIO) -> None:
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for result in results:
+        row = dict(result)
+        row["modules"] = len(result.get("modules", []))
+        for key in ("effort", "schedule", "staffing"):
+            if key in row:
+                row[key] = f"{row[key]:.2f}"
+        writer.writerow(row)
+
+
+def write_json(results: Iterable[dict], output: TextIO) -> None:
+    # Written item by item so the report never has to be held in memory as one document.
+    output.write("[")
+    for i, result in enumerate(results):
+        output.write(",\n  " if i else "\n  ")
+        output.write(json.dumps(result))
+    output.write("\n]\n")
+
+
+def parse_args(argv: Optional[list[str]]=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="cocomo", description="Estimate saved COCOMO II project files.")
+    parser.add_argument("paths", nargs="+", help="project JSON files, directories of them, or glob patterns")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="files per worker task (default: 32)")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv", help="report format (default: csv)")
+    parser.add_argument("-o", "--output", help="report file (default: standard output)")
+    parser.add_argument("--progress", action="store_true", help="report progress on standard error")
+    parser.add_argument("--calibration", help="estimate with this calibration profile instead of the one in each file")
+    parser.add_argument("--profiles", default="calibration_profiles.json",
+                        help="file with the calibration profiles (default: calibration_profiles.json)")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs and --chunk-size must be at least 1")
+    return args
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    args = parse_args(argv)
+    files = find_project_files(args.paths)
+    if not files:
+        print("no project files found", file=sys.stderr)
+        return 1
+    calibration: Optional[CalibrationProfile] = None
+    if args.calibration is not None:
+        try:
+            calibration = get_profile(args.calibration, args.profiles)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 1
+
+    if args.profile is not None:
+        instrument.enable()
+
+    failed: int = 0
+    def count_failures(results: Iterable[dict]) -> Iterator[dict]:
+        nonlocal failed
+        for result in results:
+            if "error" in result:
+                failed += 1
+                print(f"{result['file']}: {result['error']}", file=sys.stderr)
+            yield result
+
+    results = count_failures(estimate_all(files, args.jobs, args.chunk_size, sys.stderr if args.progress else None,
+                                          calibration))
+    write = write_csv if args.format == "csv" else write_json
+    if args.output is None:
+        write(results, sys.stdout)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as output:
+            write(results, output)
+
+    if args.profile is not None:
+        instrument.write_profile(args.profile, args.profile_format)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# Streaming import and export of projects as newline delimited JSON (one JSON document per line).
+# A line is either a whole project in the ProjectEncoder layout, or a module record: a module in the
+# ModuleEncoder layout with an extra "project" key, belonging to the closest project line above it that was
+# written with an empty "modules" list. Every stage below is a generator, so a pipeline such as
+#
+#     write_records(estimate_records(read_records("in.ndjson"), jobs=4), "out.ndjson")
+#
+# holds only the projects currently being processed, however large the file is.
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO, Union
+import json
+
+from cocomo import Project
+
+PathOrFile = Union[str, Path, TextIO]
+
+
+def _is_module_record(record: dict) -> bool:
+    return "project" in record and "effort_modifiers" in record
+
+
+def read_lines(source: PathOrFile) -> Iterator[str]:
+    if isinstance(source, (str, Path)):
+        with open(source, encoding="utf-8") as file:
+            yield from read_lines(file)
+        return
+    for line in source:
+        line = line.strip()
+        if line:
+            yield line
+
+
+# Parses every line and attaches module records to their project, yielding one project dict at a time.
+def read_records(source: PathOrFile) -> Iterator[dict]:
+    current: Optional[dict] = None
+    for line_number, line in enumerate(read_lines(source), start=1):
+        record = json.loads(line)
+        if _is_module_record(record):
+            if current is None or record["project"] != current["name"]:
+                raise ValueError(f"line {line_number}: module record for {record['project']!r} does not follow its project")
+            module = dict(record)
+            del module["project"]
+            current["modules"].append(module)
+            continue
+        if current is not None:
+            yield current
+        current = record
+    if current is not None:
+        yield current
+
+
+def read_projects(source: PathOrFile) -> Iterator[Project]:
+    for record in read_records(source):
+        yield Project.project_from_dict(record)
+
+
+def project_records(projects: Iterable[Project]) -> Iterator[dict]:
+    for project in projects:
+        yield project.encode()
+
+
+# Splits project dicts into a project line with an empty module list followed by one line per module.
+def split_records(records: Iterable[dict]) -> Iterator[dict]:
+    for record in records:
+        header = dict(record)
+        header["modules"] = []
+        yield header
+        for module in record["modules"]:
+            module_record = dict(module)
+            module_record["project"] = record["name"]
+            yield module_record
+
+
+def write_records(records: Iterable[dict], destination: PathOrFile, split_modules: bool=False) -> int:
+    if isinstance(destination, (str, Path)):
+        with open(destination, "w", encoding="utf-8") as file:
+            return write_records(records, file, split_modules)
+
+    if split_modules:
+        records = split_records(records)
+    count: int = 0
+    for record in records:
+        destination.write(json.dumps(record, separators=(",", ":")))
+        destination.write("\n")
+        count += 1
+    return count
+
+
+def write_projects(projects: Iterable[Project], destination: PathOrFile, split_modules: bool=False) -> int:
+    return write_records(project_records(projects), destination, split_modules)
+
+
+def chunked(items: Iterable[Any], chunk_size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+# Like map(func, chunks) but the chunks are processed by a pool of worker processes. Only a few chunks per
+# worker are in flight at any time and results come back in input order, so the output stays in step with
+# the input and memory stays constant. func must be a picklable, module level function.
+def ordered_map(func: Callable[[list], list], chunks: Iterable[list], jobs: int) -> Iterator[list]:
+    if jobs <= 1:
+        yield from map(func, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _estimate_chunk(records: list[dict]) -> list[dict]:
+    # Imported here so worker processes only pay for NumPy when they estimate.
+    from portfolio import estimate_portfolio
+
+    projects = [Project.project_from_dict(record) for record in records]
+    estimate_portfolio(projects)
+
+    results: list[dict] = []
+    for project in projects:
+        result = project.encode()
+        result["nominal_effort"] = project.nominal_effort
+        result["nominal_schedule"] = project.nominal_schedule
+        for module_result, module in zip(result["modules"], project.modules):
+            module_result["nominal_effort"] = module.nominal_effort
+            module_result["nominal_schedule"] = module.nominal_schedule
+        results.append(result)
+    return results
+
+
+# Adds "nominal_effort" and "nominal_schedule" to every project dict and each of its modules. Projects are
+# estimated in chunks with the vectorized portfolio estimator, optionally on jobs worker processes, and come
+# out in input order.
+def estimate_records(records: Iterable[dict], jobs: int=1, chunk_size: int=64) -> Iterator[dict]:
+    for results in ordered_map(_estimate_chunk, chunked(records, chunk_size), jobs):
+        yield from results
+
+
+def filter_records(records: Iterable[dict], predicate: Callable[[dict], bool]) -> Iterator[dict]:
+    for record in records:
+        if predicate(record):
+            yield record
@@ -0,0 +1,272 @@
+# Search for the controllable ratings (tools, site, personnel, process) that minimise a project's effort.
+# A rating chosen here is set on every module of the project at once, like driver_effort in sensitivity.py.
+# Taking logs of the multiple module equation,
+#
+#     log(effort) = log(A * SCED / S) + E * log(S / 1000) + log(W)    with W = sum(SLOC_i * EAF_i)
+#
+# a scale factor only adds 0.01 * SF * log(S / 1000) and an effort modifier set on every module only adds
+# log(EM), so the effort is a sum of one term per driver. Finding the lowest effort for a given number of
+# rating changes is then a group knapsack over the drivers: the Pareto front of (cost, effort) is built one
+# driver at a time and stays a few dozen points long, instead of enumerating up to 6^16 combinations.
+#
+# The one complication is a driver that the modules currently rate differently. Keeping those ratings is not
+# a single multiplier, so the search branches on which of these mixed drivers are kept. Branches share the
+# knapsack work of the decisions they agree on, and the W of every branch comes from one matrix product.
+
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from cocomo import Project
+from constants import *
+from cost_tables import EFFORT_MODIFIERS, SCALE_FACTORS, RATING_CODES, applicable_levels
+from portfolio import EFFORT_MODIFIER_TABLE, SCALE_FACTOR_TABLE, SCHEDULE_TABLE, pack_portfolio
+
+Driver = Union[EffortModifier, ScaleFactor]
+
+# Ratings a project can buy its way into. The product and platform drivers describe the software being built.
+CONTROLLABLE_DRIVERS: tuple[Driver, ...] = (
+    EffortModifier.ACAP, EffortModifier.PCAP, EffortModifier.PCON, EffortModifier.APEX, EffortModifier.PLEX,
+    EffortModifier.LTEX, EffortModifier.TOOL, EffortModifier.SITE,
+    ScaleFactor.RESL, ScaleFactor.TEAM, ScaleFactor.PMAT,
+)
+
+_TOLERANCE: float = 1e-12
+
+
+class RatingConfiguration:
+    # effort_modifiers and scale_factors hold only the drivers whose rating changes; effort modifiers are
+    # set on every module. cost is the sum of the change costs, changes the number of drivers changed.
+    def __init__(self, effort_modifiers: dict[EffortModifier, RatingLevel], scale_factors: dict[ScaleFactor, RatingLevel],
+                 cost: float, changes: int, effort: float):
+        self.effort_modifiers: dict[EffortModifier, RatingLevel] = effort_modifiers
+        self.scale_factors: dict[ScaleFactor, RatingLevel] = scale_factors
+        self.cost: float = cost
+        self.changes: int = changes
+        self.effort: float = effort
+
+    def apply(self, project: Project) -> None:
+        for key, level in self.effort_modifiers.items():
+            for module in project.modules:
+                module.effort_modifiers[key] = level
+        project.scale_factors.update(self.scale_factors)
+
+    def __repr__(self) -> str:
+        changes = [f"{key.name}={level.value}" for key, level in {**self.effort_modifiers, **self.scale_factors}.items()]
+        return f"RatingConfiguration({', '.join(changes) or 'no changes'}: cost {self.cost:g}, effort {self.effort:.2f})"
+
+
+class _Group:
+    # The options of one driver: a rating level, or None to keep the modules' own ratings, with its cost and
+    # its term of log(effort).
+    def __init__(self, driver: Driver, levels: list[Optional[RatingLevel]], costs: list[float], values: list[float]):
+        self.driver: Driver = driver
+        self.levels: list[Optional[RatingLevel]] = levels
+        self.costs: np.ndarray = np.array(costs, dtype=np.float64)
+        self.values: np.ndarray = np.array(values, dtype=np.float64)
+
+
+class _Front:
+    # Points sorted by increasing cost and strictly decreasing value. steps[g] holds, for every point after
+    # group g was added, the point it came from before and the option of group g it took.
+    def __init__(self, costs: np.ndarray, values: np.ndarray, steps: list[tuple[np.ndarray, np.ndarray]]):
+        self.costs: np.ndarray = costs
+        self.values: np.ndarray = values
+        self.steps: list[tuple[np.ndarray, np.ndarray]] = steps
+
+    def options(self, point: int) -> list[int]:
+        chosen: list[int] = []
+        for previous, option in reversed(self.steps):
+            chosen.append(int(option[point]))
+            point = int(previous[point])
+        return chosen[::-1]
+
+
+def _pareto(costs: np.ndarray, values: np.ndarray, max_cost: Optional[float]) -> np.ndarray:
+    # Indices of the points no other point beats on both cost and value, by increasing cost.
+    order = np.lexsort((values, costs))
+    if max_cost is not None:
+        order = order[costs[order] <= max_cost + _TOLERANCE]
+    ordered = values[order]
+    best_before = np.concatenate(([np.inf], np.minimum.accumulate(ordered)[:-1]))
+    return order[ordered < best_before - _TOLERANCE]
+
+
+def _branch_weights(weights: np.ndarray, multipliers: np.ndarray, chunk_size: int=4096) -> np.ndarray:
+    # sum(weights_i * prod(multipliers[i, j] for the kept mixed drivers j)) for every subset of kept drivers,
+    # indexed by a bit mask with bit j set when driver j is kept. The drivers are split in two halves whose
+    # subset products are tabulated per module, so all 2^m sums are one matrix product.
+    def subset_products(columns: np.ndarray) -> np.ndarray:
+        products = np.ones((len(columns), 1))
+        for j in range(columns.shape[1]):
+            products = np.concatenate((products, products * columns[:, j:j + 1]), axis=1)
+        return products
+
+    half: int = multipliers.shape[1] // 2
+    sums = np.zeros((1 << (multipliers.shape[1] - half), 1 << half))
+    for start in range(0, len(weights), chunk_size):
+        rows = slice(start, start + chunk_size)
+        low = subset_products(multipliers[rows, :half]) * weights[rows, None]
+        sums += subset_products(multipliers[rows, half:]).T @ low
+    return sums.reshape(-1)
+
+
+def _knapsack(groups: list[_Group], max_cost: Optional[float], front: Optional[_Front]=None) -> _Front:
+    if front is None:
+        front = _Front(np.zeros(1), np.zeros(1), [])
+    for group in groups:
+        costs = (front.costs[:, None] + group.costs[None, :]).ravel()
+        values = (front.values[:, None] + group.values[None, :]).ravel()
+        kept = _pareto(costs, values, max_cost)
+        previous, option = np.divmod(kept, len(group.costs))
+        front = _Front(costs[kept], values[kept], front.steps + [(previous, option)])
+    return front
+
+
+class RatingOptimizer:
+    # controllable: the drivers the search may change, CONTROLLABLE_DRIVERS by default.
+    # fixed: drivers pinned to a rating on every module, such as a RELY required by the customer. They are
+    #     applied at no cost and are not searched.
+    # levels: for some drivers, the only ratings they may be changed to. Keeping the current ratings is always
+    #     allowed.
+    # change_costs: the cost of changing a driver, 1 by default, so a cost cap is a cap on the number of changes.
+    def __init__(self, project: Project, controllable: Iterable[Driver]=CONTROLLABLE_DRIVERS,
+                 fixed: Optional[dict[Driver, RatingLevel]]=None, levels: Optional[dict[Driver, Iterable[RatingLevel]]]=None,
+                 change_costs: Optional[dict[Driver, float]]=None):
+        fixed = dict(fixed or {})
+        levels = {driver: list(allowed) for driver, allowed in (levels or {}).items()}
+        change_costs = dict(change_costs or {})
+        controllable = [driver for driver in dict.fromkeys(controllable) if driver not in fixed]
+        for driver in list(fixed) + controllable:
+            if driver is EffortModifier.SCED or not isinstance(driver, (EffortModifier, ScaleFactor)):
+                raise ValueError(f"{driver!r} cannot be optimized, only module effort modifiers and scale factors can")
+        for driver, level in fixed.items():
+            if level not in applicable_levels(driver):
+                raise ValueError(f"{getattr(level, 'value', level)} is not a valid rating for {driver.name}")
+        if any(cost < 0 for cost in change_costs.values()):
+            raise ValueError("change costs cannot be negative")
+
+        arrays = pack_portfolio([project])
+        if arrays.sloc.sum() <= 0:
+            raise ValueError(f"{project.name} has no SLOC to optimize")
+        self.project: Project = project
+        self._fixed: set[Driver] = set(fixed)
+
+        a, b = project.calibration.A, project.calibration.B
+        aggregate_sloc: float = float(arrays.sloc.sum())
+        log_size: float = float(np.log(aggregate_sloc / 1000.0))
+        searched = fixed.keys() | set(controllable)
+
+        # Terms of log(effort) that no option changes.
+        multipliers = EFFORT_MODIFIER_TABLE[np.arange(len(EFFORT_MODIFIERS)), arrays.ratings]
+        columns = [j for j, key in enumerate(EFFORT_MODIFIERS) if key not in searched]
+        rest = arrays.sloc * multipliers[:, columns].prod(axis=1)
+        scale_codes = arrays.scale_factors[0]
+        scale_sum: float = sum(float(SCALE_FACTOR_TABLE[k, scale_codes[k]])
+                               for k, key in enumerate(SCALE_FACTORS) if key not in searched)
+        self._constant: float = (float(np.log(a * SCHEDULE_TABLE[arrays.schedule_factors[0]] / aggregate_sloc))
+                                 + (b + 0.01 * scale_sum) * log_size)
+
+        # One group per searched driver, mixed effort modifiers are set aside for branching.
+        self._groups: list[_Group] = []
+        self._mixed: list[_Group] = []
+        mixed_columns: list[int] = []
+        for driver in list(fixed) + controllable:
+            if isinstance(driver, ScaleFactor):
+                k = SCALE_FACTORS.index(driver)
+                current: set[int] = {int(scale_codes[k])}
+                term = lambda level: 0.01 * SCALE_FACTOR_TABLE[k, RATING_CODES[level]] * log_size
+            else:
+                j = EFFORT_MODIFIERS.index(driver)
+                current = set(arrays.ratings[:, j].tolist())
+                term = lambda level: np.log(EFFORT_MODIFIER_TABLE[j, RATING_CODES[level]])
+
+            choices: list[Optional[RatingLevel]]
+            if driver in fixed:
+                choices = [fixed[driver]]
+            else:
+                choices = [level for level in applicable_levels(driver) if level in levels.get(driver, [level])
+                           or {RATING_CODES[level]} == current]
+            cost: float = change_costs.get(driver, 1.0)
+            group = _Group(driver, choices,
+                           [0.0 if driver in fixed or {RATING_CODES[level]} == current else cost for level in choices],
+                           [float(term(level)) for level in choices])
+            if len(current) > 1 and driver not in fixed:
+                self._mixed.append(group)
+                mixed_columns.append(j)
+            else:
+                self._groups.append(group)
+
+        mixed_multipliers = EFFORT_MODIFIER_TABLE[np.array(mixed_columns, dtype=np.int64), arrays.ratings[:, mixed_columns]]
+        self._branch_weights: np.ndarray = _branch_weights(rest, mixed_multipliers)
+
+    def pareto_front(self, max_cost: Optional[float]=None) -> list[RatingConfiguration]:
+        # The cheapest configuration for every effort that can be reached, by increasing cost and decreasing
+        # effort. The first one costs nothing and is the current project unless fixed ratings change it.
+        # Branches share the fronts of the mixed drivers they agree on, so each decision is merged in once.
+        leaves: list[tuple[int, _Front]] = []
+
+        def search(depth: int, kept: int, front: _Front) -> None:
+            if depth == len(self._mixed):
+                leaves.append((kept, front))
+                return
+            unchanged = (np.arange(len(front.costs)), np.zeros(len(front.costs), dtype=np.int64))
+            search(depth + 1, kept | 1 << depth, _Front(front.costs, front.values, front.steps + [unchanged]))
+            search(depth + 1, kept, _knapsack([self._mixed[depth]], max_cost, front))
+
+        search(0, 0, _knapsack(self._groups, max_cost))
+
+        leaf_index = np.repeat(np.arange(len(leaves)), [len(front.costs) for _, front in leaves])
+        point_index = np.concatenate([np.arange(len(front.costs)) for _, front in leaves])
+        costs = np.concatenate([front.costs for _, front in leaves])
+        values = np.concatenate([front.values + np.log(self._branch_weights[kept]) for kept, front in leaves])
+
+        configurations: list[RatingConfiguration] = []
+        for point in _pareto(costs, values, max_cost).tolist():
+            kept, front = leaves[leaf_index[point]]
+            choices = [group.levels for group in self._groups]
+            choices += [[None] if kept >> depth & 1 else group.levels for depth, group in enumerate(self._mixed)]
+            levels = [options[option] for options, option in zip(choices, front.options(int(point_index[point])))]
+            configurations.append(self._configuration(levels, float(costs[point]), float(values[point])))
+        return configurations
+
+    # levels holds the rating of every group, in the order of self._groups + self._mixed.
+    def _configuration(self, levels: list[Optional[RatingLevel]], cost: float, value: float) -> RatingConfiguration:
+        effort_modifiers: dict[EffortModifier, RatingLevel] = {}
+        scale_factors: dict[ScaleFactor, RatingLevel] = {}
+        changes: int = 0
+        for group, level in zip(self._groups + self._mixed, levels):
+            driver = group.driver
+            if level is None:
+                continue
+            if isinstance(driver, ScaleFactor):
+                changed = self.project.scale_factors[driver] != level
+                if changed:
+                    scale_factors[driver] = level
+            else:
+                changed = any(module.effort_modifiers[driver] != level for module in self.project.modules)
+                if changed:
+                    effort_modifiers[driver] = level
+            changes += changed and driver not in self._fixed
+        return RatingConfiguration(effort_modifiers, scale_factors, cost, changes, float(np.exp(self._constant + value)))
+
+    # The lowest effort reachable within max_cost.
+    def optimize(self, max_cost: Optional[float]=None) -> RatingConfiguration:
+        return self.pareto_front(max_cost)[-1]
+
+    # The cheapest configuration that brings the effort down to target_effort, or None if none can.
+    def cheapest(self, target_effort: float) -> Optional[RatingConfiguration]:
+        for configuration in self.pareto_front():
+            if configuration.effort <= target_effort:
+                return configuration
+        return None
+
+
+def optimize(project: Project, max_cost: Optional[float]=None, controllable: Iterable[Driver]=CONTROLLABLE_DRIVERS,
+             fixed: Optional[dict[Driver, RatingLevel]]=None) -> RatingConfiguration:
+    return RatingOptimizer(project, controllable, fixed).optimize(max_cost)
+
+
+def pareto_front(project: Project, max_cost: Optional[float]=None, controllable: Iterable[Driver]=CONTROLLABLE_DRIVERS,
+                 fixed: Optional[dict[Driver, RatingLevel]]=None) -> list[RatingConfiguration]:
+    return RatingOptimizer(project, controllable, fixed).pareto_front(max_cost)
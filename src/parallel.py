@@ -0,0 +1,205 @@
+# Parallel estimation of a single very large project.
+#
+# The module rows are split into one shard per worker process. The SLOC and the 16 rating codes of every
+# module live in a multiprocessing.shared_memory block together with room for the per-module results; each
+# worker maps the block, estimates its rows in place and sends back only two floats, its part of the sums
+#
+#     S = sum(SLOC_i)    W = sum(SLOC_i * EAF_i)
+#
+# which are added up into the multiple module equation here. Module efforts depend on the project's scale
+# exponent, which is known before the shards start. No Module objects and no arrays are pickled: where
+# processes are forked, each worker also packs its own modules into the block from the copy of the project
+# it inherits, which is most of the work for a project held as Module objects.
+#
+#     estimate = estimate_parallel(project, jobs=8)
+#     estimate = estimate_arrays_parallel(ColumnarProject(path).portfolio_arrays(), jobs=8)
+#
+# Projects with fewer than min_rows modules per job use fewer jobs, down to being estimated in this process,
+# where starting workers would cost more than they save.
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+import os
+import threading
+
+import numpy as np
+
+from cocomo import Module, Project
+from cost_tables import EFFORT_MODIFIERS, RATING_CODES, get_effort_modifiers, get_scale_factors
+from instrument import timed
+from portfolio import (EFFORT_MODIFIER_TABLE, SCHEDULE_PERCENT_TABLE, SCHEDULE_TABLE, PortfolioArrays,
+                       PortfolioEstimate, estimate_schedule, pack_portfolio, scale_exponents)
+
+_EFFORT_MODIFIER_COLUMNS: np.ndarray = np.arange(len(EFFORT_MODIFIERS))
+
+
+# The arrays of a block of n modules: sloc, effort and schedule (float64) followed by the ratings (uint8).
+def _views(buffer, n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    sloc = np.ndarray((n,), dtype=np.float64, buffer=buffer)
+    effort = np.ndarray((n,), dtype=np.float64, buffer=buffer, offset=8 * n)
+    schedule = np.ndarray((n,), dtype=np.float64, buffer=buffer, offset=16 * n)
+    ratings = np.ndarray((n, len(EFFORT_MODIFIERS)), dtype=np.uint8, buffer=buffer, offset=24 * n)
+    return sloc, effort, schedule, ratings
+
+
+def _block_size(n: int) -> int:
+    return max(1, 24 * n + len(EFFORT_MODIFIERS) * n)
+
+
+# Single module equations for rows start:stop, written to effort and schedule. Returns the rows' part of
+# sum(SLOC) and sum(SLOC * EAF). params is (E, A, B, C, D, SCED, SCED%).
+def _estimate_rows(sloc: np.ndarray, ratings: np.ndarray, effort: np.ndarray, schedule: np.ndarray,
+                   start: int, stop: int, params: tuple) -> tuple[float, float]:
+    exponent, a, b, c, d, sced, schedule_percent = params
+    eaf = EFFORT_MODIFIER_TABLE[_EFFORT_MODIFIER_COLUMNS, ratings[start:stop]].prod(axis=1)
+    if np.isnan(eaf).any():
+        row = start + int(np.flatnonzero(np.isnan(eaf))[0])
+        raise ValueError(f"module row {row} uses a rating level that is not defined for one of its effort modifiers")
+    rows_sloc = sloc[start:stop]
+    effort_without_sced = a * (rows_sloc / 1000.0)**exponent * eaf
+    np.multiply(effort_without_sced, sced, out=effort[start:stop])
+    schedule[start:stop] = estimate_schedule(effort_without_sced, exponent, schedule_percent, b, c, d)
+    return float(rows_sloc.sum()), float(rows_sloc @ eaf)
+
+
+def _attach(name: str) -> SharedMemory:
+    # Workers only borrow the block. Where the resource tracker can be told so, it is; otherwise their
+    # registration is a repeat of the parent's, which unregisters the block when it unlinks it.
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+# The project being estimated, inherited by forked workers so they can pack their own modules.
+_project: Optional[Project] = None
+
+
+def _pack_rows(modules: list[Module], sloc: np.ndarray, ratings: np.ndarray, start: int, stop: int) -> None:
+    rows: list[Module] = modules[start:stop]
+    sloc[start:stop] = np.fromiter((module.sloc for module in rows), dtype=np.float64, count=len(rows))
+    ratings[start:stop] = np.fromiter((RATING_CODES[level] for module in rows
+                                       for level in get_effort_modifiers(module.effort_modifiers)),
+                                      dtype=np.uint8, count=len(rows) * len(EFFORT_MODIFIERS)).reshape(-1, len(EFFORT_MODIFIERS))
+
+
+# Runs in the worker processes. With pack, the rows are first packed from the inherited project.
+def _estimate_shard(name: str, n: int, start: int, stop: int, params: tuple, pack: bool) -> tuple[float, float]:
+    shared: SharedMemory = _attach(name)
+    try:
+        sloc, effort, schedule, ratings = _views(shared.buf, n)
+        try:
+            if pack:
+                _pack_rows(_project.modules, sloc, ratings, start, stop)
+            return _estimate_rows(sloc, ratings, effort, schedule, start, stop, params)
+        finally:
+            del sloc, effort, schedule, ratings
+    finally:
+        shared.close()
+
+
+# Shards for n rows: at most one per job and none smaller than min_rows, apart from the last.
+def shards(n: int, jobs: int, min_rows: int) -> list[tuple[int, int]]:
+    count: int = max(1, min(jobs, n // max(1, min_rows)))
+    bounds: list[int] = [n * i // count for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+# (E, A, B, C, D, SCED, SCED%) of a project.
+def _project_params(scale_factors: np.ndarray, schedule_factor: int, calibration: np.ndarray) -> tuple:
+    a, b, c, d = calibration.tolist()
+    sced: float = float(SCHEDULE_TABLE[schedule_factor])
+    if np.isnan(sced):
+        raise ValueError("the project uses a rating level that is not defined for the schedule factor")
+    exponent: float = float(scale_exponents(scale_factors.reshape(1, -1), b)[0])
+    return exponent, a, b, c, d, sced, float(SCHEDULE_PERCENT_TABLE[schedule_factor])
+
+
+def _reduce(partials: list[tuple[float, float]], params: tuple, module_effort: np.ndarray,
+            module_schedule: np.ndarray) -> PortfolioEstimate:
+    exponent, a, b, c, d, sced, schedule_percent = params
+    aggregate_sloc: float = sum(partial[0] for partial in partials)
+    weighted_sloc: float = sum(partial[1] for partial in partials)
+    project_effort: float = 0.0
+    project_schedule: float = 0.0
+    if aggregate_sloc > 0:
+        effort_without_sced: float = a * (aggregate_sloc / 1000.0)**exponent * weighted_sloc / aggregate_sloc
+        project_effort = effort_without_sced * sced
+        project_schedule = float(estimate_schedule(effort_without_sced, exponent, schedule_percent, b, c, d))
+    return PortfolioEstimate(module_effort, np.array([project_effort]), np.array([0, len(module_effort)]),
+                             module_schedule, np.array([project_schedule]))
+
+
+def _run_shards(n: int, params: tuple, bounds: list[tuple[int, int]], fill=None,
+                project: Optional[Project]=None) -> PortfolioEstimate:
+    global _project
+    shared = SharedMemory(create=True, size=_block_size(n))
+    try:
+        sloc, effort, schedule, ratings = _views(shared.buf, n)
+        if fill is not None:
+            fill(sloc, ratings)
+        context = get_context("fork" if project is not None else None)
+        _project = project
+        try:
+            with ProcessPoolExecutor(max_workers=len(bounds), mp_context=context) as executor:
+                futures = [executor.submit(_estimate_shard, shared.name, n, start, stop, params, project is not None)
+                           for start, stop in bounds]
+                partials = [future.result() for future in futures]
+        finally:
+            _project = None
+        estimate = _reduce(partials, params, effort.copy(), schedule.copy())
+        del sloc, effort, schedule, ratings
+        return estimate
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+# Estimates the single project of arrays, such as ColumnarProject.portfolio_arrays(), on up to jobs processes.
+@timed("estimate.parallel")
+def estimate_arrays_parallel(arrays: PortfolioArrays, jobs: Optional[int]=None, min_rows: int=50000) -> PortfolioEstimate:
+    if arrays.project_count != 1:
+        raise ValueError("parallel estimation takes one project at a time")
+    n: int = arrays.module_count
+    params: tuple = _project_params(arrays.scale_factors[0], arrays.schedule_factors[0], arrays.calibration[0])
+    bounds: list[tuple[int, int]] = shards(n, jobs or os.cpu_count() or 1, min_rows)
+    if len(bounds) == 1:
+        module_effort, module_schedule = np.empty(n), np.empty(n)
+        partial = _estimate_rows(arrays.sloc, arrays.ratings, module_effort, module_schedule, 0, n, params)
+        return _reduce([partial], params, module_effort, module_schedule)
+
+    def fill(sloc: np.ndarray, ratings: np.ndarray) -> None:
+        sloc[:] = arrays.sloc
+        ratings[:] = arrays.ratings
+    return _run_shards(n, params, bounds, fill)
+
+
+# Same results as Project.estimate_effort and Module.estimate_effort, and with update they are written to the
+# project and its modules as those would. Reading hundreds of thousands of Module objects costs far more than
+# the arithmetic, so where processes can be forked each worker packs its own shard of modules from the copy
+# of the project it inherits. Elsewhere, and in processes running other threads, which forking could leave
+# deadlocked, the project is packed here and only the estimation is shared out.
+@timed("estimate.parallel")
+def estimate_parallel(project: Project, jobs: Optional[int]=None, update: bool=True,
+                      min_rows: int=50000) -> PortfolioEstimate:
+    n: int = len(project.modules)
+    bounds: list[tuple[int, int]] = shards(n, jobs or os.cpu_count() or 1, min_rows)
+    if len(bounds) == 1 or "fork" not in get_all_start_methods() or threading.active_count() > 1:
+        estimate = estimate_arrays_parallel(pack_portfolio([project]), jobs, min_rows)
+    else:
+        params: tuple = _project_params(
+            np.array([RATING_CODES[level] for level in get_scale_factors(project.scale_factors)]),
+            RATING_CODES[project.schedule_factor], np.array(project.calibration.constants(), dtype=np.float64))
+        estimate = _run_shards(n, params, bounds, project=project)
+
+    if update:
+        project.nominal_effort = float(estimate.project_effort[0])
+        project.nominal_schedule = float(estimate.project_schedule[0])
+        project.average_staffing = float(estimate.project_staffing[0])
+        for module, effort, schedule, staffing in zip(project.modules, estimate.module_effort.tolist(),
+                                                      estimate.module_schedule.tolist(),
+                                                      estimate.module_staffing.tolist()):
+            module.nominal_effort, module.nominal_schedule, module.average_staffing = effort, schedule, staffing
+    return estimate
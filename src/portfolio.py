@@ -0,0 +1,191 @@
+# Vectorized effort estimation over many projects at once.
+# The equations are the same ones used by Module.estimate_effort and Project.estimate_effort in cocomo.py,
+# but every module of every project is packed into NumPy arrays so the whole portfolio is estimated
+# in a handful of array operations instead of a Python loop per module and per cost driver.
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+from calibration import COCOMO_II_2000
+from cocomo import Project
+from constants import *
+from cost_tables import (EFFORT_MODIFIERS, SCALE_FACTORS, RATING_CODES,
+                         get_effort_modifiers, get_scale_factors)
+from instrument import timed
+import cost_tables
+
+# NumPy views of the compiled tables in cost_tables.py, not applicable slots are NaN.
+EFFORT_MODIFIER_TABLE: np.ndarray = np.array(cost_tables.EFFORT_MODIFIER_TABLE)
+SCALE_FACTOR_TABLE: np.ndarray = np.array(cost_tables.SCALE_FACTOR_TABLE)
+SCHEDULE_TABLE: np.ndarray = np.array(cost_tables.SCHEDULE_TABLE)
+SCHEDULE_PERCENT_TABLE: np.ndarray = np.array(cost_tables.SCHEDULE_PERCENT_TABLE)
+
+_EFFORT_MODIFIER_COLUMNS: np.ndarray = np.arange(len(EFFORT_MODIFIERS))
+_SCALE_FACTOR_COLUMNS: np.ndarray = np.arange(len(SCALE_FACTORS))
+
+
+class PortfolioArrays:
+    # Module rows of all projects are stored back to back; the modules of project p are the rows
+    # offsets[p]:offsets[p + 1] and project_index holds the project number of every module row.
+    # calibration has one (A, B, C, D) row per project and defaults to the COCOMO II.2000 constants.
+    def __init__(self, sloc: np.ndarray, ratings: np.ndarray, offsets: np.ndarray,
+                 scale_factors: np.ndarray, schedule_factors: np.ndarray, calibration: Optional[np.ndarray]=None):
+        self.sloc: np.ndarray = np.asarray(sloc, dtype=np.float64)
+        self.ratings: np.ndarray = np.asarray(ratings, dtype=np.uint8)
+        self.offsets: np.ndarray = np.asarray(offsets, dtype=np.int64)
+        self.scale_factors: np.ndarray = np.asarray(scale_factors, dtype=np.uint8)
+        self.schedule_factors: np.ndarray = np.asarray(schedule_factors, dtype=np.uint8)
+        if calibration is None:
+            calibration = np.tile(COCOMO_II_2000.constants(), (len(self.schedule_factors), 1))
+        self.calibration: np.ndarray = np.asarray(calibration, dtype=np.float64)
+
+        if self.ratings.shape != (len(self.sloc), len(EFFORT_MODIFIERS)):
+            raise ValueError("ratings must have one row per module and one column per effort modifier")
+        if self.scale_factors.shape != (len(self.schedule_factors), len(SCALE_FACTORS)):
+            raise ValueError("scale_factors must have one row per project and one column per scale factor")
+        if self.calibration.shape != (len(self.schedule_factors), 4):
+            raise ValueError("calibration must have one row of A, B, C and D per project")
+        if len(self.offsets) != len(self.schedule_factors) + 1 or self.offsets[-1] != len(self.sloc):
+            raise ValueError("offsets do not match the number of projects and modules")
+
+        self.project_index: np.ndarray = np.repeat(np.arange(len(self.schedule_factors)), np.diff(self.offsets))
+
+    @property
+    def project_count(self) -> int:
+        return len(self.schedule_factors)
+
+    @property
+    def module_count(self) -> int:
+        return len(self.sloc)
+
+
+class PortfolioEstimate:
+    def __init__(self, module_effort: np.ndarray, project_effort: np.ndarray, offsets: np.ndarray,
+                 module_schedule: np.ndarray, project_schedule: np.ndarray):
+        self.module_effort: np.ndarray = module_effort
+        self.project_effort: np.ndarray = project_effort
+        self.offsets: np.ndarray = offsets
+        self.module_schedule: np.ndarray = module_schedule
+        self.project_schedule: np.ndarray = project_schedule
+
+    def project_module_effort(self, project_number: int) -> np.ndarray:
+        return self.module_effort[self.offsets[project_number]:self.offsets[project_number + 1]]
+
+    def project_module_schedule(self, project_number: int) -> np.ndarray:
+        return self.module_schedule[self.offsets[project_number]:self.offsets[project_number + 1]]
+
+    # Average full time staff, effort / schedule, and 0 where there is nothing to build.
+    @property
+    def module_staffing(self) -> np.ndarray:
+        return _staffing(self.module_effort, self.module_schedule)
+
+    @property
+    def project_staffing(self) -> np.ndarray:
+        return _staffing(self.project_effort, self.project_schedule)
+
+
+def _staffing(effort: np.ndarray, schedule: np.ndarray) -> np.ndarray:
+    staffing = np.zeros_like(effort)
+    np.divide(effort, schedule, out=staffing, where=schedule > 0)
+    return staffing
+
+
+def pack_portfolio(projects: Iterable[Project]) -> PortfolioArrays:
+    projects = list(projects)
+
+    offsets = np.zeros(len(projects) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(project.modules) for project in projects])
+    module_count: int = int(offsets[-1])
+
+    sloc = np.fromiter((module.sloc for project in projects for module in project.modules),
+                       dtype=np.float64, count=module_count)
+    ratings = np.fromiter((RATING_CODES[level] for project in projects for module in project.modules
+                           for level in get_effort_modifiers(module.effort_modifiers)),
+                          dtype=np.uint8, count=module_count * len(EFFORT_MODIFIERS))
+    scale_factors = np.fromiter((RATING_CODES[level] for project in projects
+                                 for level in get_scale_factors(project.scale_factors)),
+                                dtype=np.uint8, count=len(projects) * len(SCALE_FACTORS))
+    schedule_factors = np.fromiter((RATING_CODES[project.schedule_factor] for project in projects),
+                                   dtype=np.uint8, count=len(projects))
+    calibration = np.array([project.calibration.constants() for project in projects], dtype=np.float64).reshape(-1, 4)
+
+    return PortfolioArrays(sloc, ratings.reshape(module_count, len(EFFORT_MODIFIERS)), offsets,
+                           scale_factors.reshape(len(projects), len(SCALE_FACTORS)), schedule_factors, calibration)
+
+
+def effort_adjustment_factors(ratings: np.ndarray) -> np.ndarray:
+    # Product of the 16 module level effort multipliers for every row of ratings.
+    eaf = EFFORT_MODIFIER_TABLE[_EFFORT_MODIFIER_COLUMNS, ratings].prod(axis=1)
+    if np.isnan(eaf).any():
+        row = int(np.flatnonzero(np.isnan(eaf))[0])
+        raise ValueError(f"module row {row} uses a rating level that is not defined for one of its effort modifiers")
+    return eaf
+
+
+def scale_factor_sums(scale_factors: np.ndarray) -> np.ndarray:
+    return SCALE_FACTOR_TABLE[_SCALE_FACTOR_COLUMNS, scale_factors].sum(axis=1)
+
+
+def scale_exponents(scale_factors: np.ndarray, b=B) -> np.ndarray:
+    # E = B + 0.01 * sum(SF) for every row of scale factor ratings, see page 13 of the COCOMO II.2000 documentation.
+    return b + 0.01 * scale_factor_sums(scale_factors)
+
+
+def estimate_schedule(effort_without_sced: np.ndarray, exponent: np.ndarray, schedule_percent: np.ndarray,
+                      b=B, c=C, d=D) -> np.ndarray:
+    # TDEV = C * PM_NS^(D + 0.2 * (E - B)) * SCED% / 100, where PM_NS is the effort without the SCED multiplier.
+    return c * effort_without_sced**(d + 0.2 * (exponent - b)) * schedule_percent / 100.0
+
+
+def estimate_arrays(arrays: PortfolioArrays) -> PortfolioEstimate:
+    # Calibration constants may differ per project, so they are arrays here: one value per project.
+    a, b, c, d = arrays.calibration.T
+    eaf = effort_adjustment_factors(arrays.ratings)
+    exponent = scale_exponents(arrays.scale_factors, b)
+    sced = SCHEDULE_TABLE[arrays.schedule_factors]
+    if np.isnan(sced).any():
+        raise ValueError("a project uses a rating level that is not defined for the schedule factor")
+    schedule_percent = SCHEDULE_PERCENT_TABLE[arrays.schedule_factors]
+
+    # Single module equation, the same as Module.estimate_effort.
+    project_index = arrays.project_index
+    module_exponent = exponent[project_index]
+    module_effort_without_sced = a[project_index] * (arrays.sloc / 1000.0)**module_exponent * eaf
+    module_effort = module_effort_without_sced * sced[project_index]
+    module_schedule = estimate_schedule(module_effort_without_sced, module_exponent, schedule_percent[project_index],
+                                        b[project_index], c[project_index], d[project_index])
+
+    # Multiple module equation, the same as Project.estimate_effort:
+    # A * (sum(SLOC) / 1000)^E * SCED * sum(SLOC_i * EAF_i) / sum(SLOC)
+    aggregate_sloc = np.bincount(project_index, weights=arrays.sloc, minlength=arrays.project_count)
+    weighted_sloc = np.bincount(project_index, weights=arrays.sloc * eaf, minlength=arrays.project_count)
+
+    project_effort_without_sced = np.zeros(arrays.project_count)
+    nonzero = aggregate_sloc > 0
+    project_effort_without_sced[nonzero] = (a[nonzero] * (aggregate_sloc[nonzero] / 1000.0)**exponent[nonzero]
+                                            * weighted_sloc[nonzero] / aggregate_sloc[nonzero])
+    project_effort = project_effort_without_sced * sced
+    project_schedule = estimate_schedule(project_effort_without_sced, exponent, schedule_percent, b, c, d)
+
+    return PortfolioEstimate(module_effort, project_effort, arrays.offsets, module_schedule, project_schedule)
+
+
+@timed("estimate.portfolio")
+def estimate_portfolio(projects: Iterable[Project], update: bool=True) -> PortfolioEstimate:
+    # When update is True the results are also written back to nominal_effort, nominal_schedule and
+    # average_staffing of every project and module, exactly as if estimate_effort had been called on each of them.
+    projects = list(projects)
+    estimate = estimate_arrays(pack_portfolio(projects))
+
+    if update:
+        module_results = zip(estimate.module_effort.tolist(), estimate.module_schedule.tolist(),
+                             estimate.module_staffing.tolist())
+        project_results = zip(estimate.project_effort.tolist(), estimate.project_schedule.tolist(),
+                              estimate.project_staffing.tolist())
+        for project, (effort, schedule, staffing) in zip(projects, project_results):
+            project.nominal_effort, project.nominal_schedule, project.average_staffing = effort, schedule, staffing
+            for module in project.modules:
+                module.nominal_effort, module.nominal_schedule, module.average_staffing = next(module_results)
+
+    return estimate
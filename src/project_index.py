@@ -0,0 +1,171 @@
+# Directory listings of saved projects for the project browser.
+#
+# Each directory keeps a small sidecar index (INDEX_FILE_NAME) with a summary of every project file in it:
+# project name, module count, total SLOC and the last effort estimate. A file is only parsed again when its
+# size or modification time no longer match the index, so listing a directory of thousands of projects
+# costs one os.scandir and a stat per file. ProjectIndex also keeps listings in memory, keyed by the
+# directory's own modification time, so going back to a directory that has not changed is free.
+
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Union
+import json
+import os
+
+from cocomo import Project
+from instrument import increment, timed
+
+INDEX_FILE_NAME: str = ".cocomo-index.json"
+INDEX_VERSION: int = 1
+
+PathLike = Union[str, Path]
+
+
+class ProjectSummary:
+    def __init__(self, file_name: str, mtime_ns: int, size: int, name: Optional[str]=None,
+                 modules: int=0, sloc: int=0, effort: Optional[float]=None):
+        self.file_name: str = file_name
+        self.mtime_ns: int = mtime_ns
+        self.size: int = size
+        # None when the file is not a project file. It is remembered anyway so it is not parsed again.
+        self.name: Optional[str] = name
+        self.modules: int = modules
+        self.sloc: int = sloc
+        self.effort: Optional[float] = effort
+
+    @property
+    def is_project(self) -> bool:
+        return self.name is not None
+
+    def describe(self) -> str:
+        effort: str = "not estimated" if self.effort is None else f"{self.effort:.2f} PM"
+        return f"{self.name} - {self.modules} modules, {self.sloc} SLOC, {effort}"
+
+    def encode(self) -> dict:
+        return {
+            "mtime_ns": self.mtime_ns,
+            "size": self.size,
+            "name": self.name,
+            "modules": self.modules,
+            "sloc": self.sloc,
+            "effort": self.effort,
+        }
+
+    @staticmethod
+    def summary_from_dict(file_name: str, data: dict) -> 'ProjectSummary':
+        return ProjectSummary(file_name, data["mtime_ns"], data["size"], data["name"],
+                              data["modules"], data["sloc"], data["effort"])
+
+
+def summarize_project(project: Project, file_name: str, mtime_ns: int, size: int) -> ProjectSummary:
+    project.estimate_effort()
+    return ProjectSummary(file_name, mtime_ns, size, project.name, len(project.modules),
+                          sum(module.sloc for module in project.modules), project.nominal_effort)
+
+
+def summarize_file(path: PathLike, stat: Optional[os.stat_result]=None) -> ProjectSummary:
+    path = Path(path)
+    stat = stat or path.stat()
+    try:
+        project = Project.project_from_dict(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return ProjectSummary(path.name, stat.st_mtime_ns, stat.st_size)
+    return summarize_project(project, path.name, stat.st_mtime_ns, stat.st_size)
+
+
+def read_index(directory: PathLike) -> dict[str, ProjectSummary]:
+    try:
+        data = json.loads(Path(directory, INDEX_FILE_NAME).read_text(encoding="utf-8"))
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return {name: ProjectSummary.summary_from_dict(name, entry) for name, entry in data["files"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        # A missing, unreadable or corrupt index is simply rebuilt.
+        return {}
+
+
+def write_index(directory: PathLike, summaries: dict[str, ProjectSummary]) -> None:
+    data = {"version": INDEX_VERSION, "files": {name: summary.encode() for name, summary in sorted(summaries.items())}}
+    index_path = Path(directory, INDEX_FILE_NAME)
+    temporary_path = index_path.with_name(f"{INDEX_FILE_NAME}.{os.getpid()}.tmp")
+    try:
+        temporary_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        os.replace(temporary_path, index_path)
+    except OSError:
+        # Read-only directories still list fine, they just cannot keep an index.
+        temporary_path.unlink(missing_ok=True)
+
+
+# Summaries of the project files in directory, sorted by file name. Files whose size and modification time
+# match the sidecar index are not opened; the index is rewritten only if something changed.
+@timed("index.scan_directory")
+def scan_directory(directory: PathLike) -> list[ProjectSummary]:
+    index: dict[str, ProjectSummary] = read_index(directory)
+    summaries: dict[str, ProjectSummary] = {}
+    changed: bool = False
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name == INDEX_FILE_NAME:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            summary: Optional[ProjectSummary] = index.get(entry.name)
+            if summary is None or summary.mtime_ns != stat.st_mtime_ns or summary.size != stat.st_size:
+                summary = summarize_file(entry.path, stat)
+                increment("index.files_parsed")
+                changed = True
+            summaries[entry.name] = summary
+
+    if changed or summaries.keys() != index.keys():
+        write_index(directory, summaries)
+
+    return [summaries[name] for name in sorted(summaries) if summaries[name].is_project]
+
+
+# Stores the summary of a project that was just saved to path, so the next listing does not parse it.
+def record_project(path: PathLike, project: Project) -> ProjectSummary:
+    path = Path(path)
+    stat = path.stat()
+    summary = summarize_project(project, path.name, stat.st_mtime_ns, stat.st_size)
+    index = read_index(path.parent)
+    index[path.name] = summary
+    write_index(path.parent, index)
+    return summary
+
+
+# In-memory cache of directory listings, safe to use from worker threads.
+class ProjectIndex:
+    def __init__(self):
+        self._listings: dict[str, tuple[int, list[ProjectSummary]]] = {}
+        self._lock: Lock = Lock()
+
+    @timed("index.listing")
+    def listing(self, directory: PathLike) -> list[ProjectSummary]:
+        key = os.path.abspath(directory)
+        mtime_ns: int = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            increment("index.cache_hits")
+            return cached[1]
+
+        summaries = scan_directory(key)
+        # Writing the sidecar index changes the directory's mtime, so it is read again after the scan.
+        with self._lock:
+            self._listings[key] = (os.stat(key).st_mtime_ns, summaries)
+        return summaries
+
+    # Files rewritten in place do not change the directory's mtime, so savers call this.
+    def invalidate(self, directory: PathLike) -> None:
+        with self._lock:
+            self._listings.pop(os.path.abspath(directory), None)
+
+    def record_project(self, path: PathLike, project: Project) -> ProjectSummary:
+        summary = record_project(path, project)
+        self.invalidate(Path(path).parent)
+        return summary
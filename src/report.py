@@ -0,0 +1,203 @@
+# Estimate reports of a project as Markdown, CSV or HTML.
+#
+#     python src/report.py ~/cocomo-projects/widgets.json --output widgets.html
+#
+# A report has one row per module with its SLOC, effort, schedule, staffing, EAF and the multiplier of each of
+# the 16 effort modifiers behind the EAF, followed by a project total. Rows are estimated and written one at
+# a time through a ReportWriter, so writing the report of a project with a million modules takes no more
+# memory than writing one with ten. Reports are written from a ProjectSnapshot and never change the modules;
+# the TUI takes the snapshot on the UI thread and writes the report on a worker thread with the same code.
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Optional, TextIO, Union
+import argparse
+import csv
+import html
+import os
+import sys
+import threading
+
+from cocomo import ModuleValues, Project, ProjectSnapshot
+from constants import *
+from cost_tables import EFFORT_MODIFIER_TABLE, EFFORT_MODIFIERS, RATING_CODES, get_effort_modifiers
+from journal import load_project
+
+COLUMNS: list[str] = ["Module", "SLOC", "Effort (PM)", "Schedule (months)", "Staff", "EAF"] + [
+    key.name for key in EFFORT_MODIFIERS]
+
+FORMATS: dict[str, str] = {".md": "markdown", ".markdown": "markdown", ".csv": "csv", ".html": "html", ".htm": "html"}
+
+
+# module must have been copied with its ratings.
+def module_row(snapshot: ProjectSnapshot, module: ModuleValues) -> list:
+    multipliers: list[float] = [row[RATING_CODES[level]] for row, level in
+                                zip(EFFORT_MODIFIER_TABLE, get_effort_modifiers(module.effort_modifiers))]
+    return [module.name, module.sloc, *snapshot.estimate_module(module), module.effort_adjustment_factor] + multipliers
+
+
+def total_row(snapshot: ProjectSnapshot, sloc: int) -> list:
+    return ["Project Total", sloc, snapshot.nominal_effort, snapshot.nominal_schedule, snapshot.average_staffing,
+            None] + [None] * len(EFFORT_MODIFIERS)
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+# Receives the parts of a report in order: begin once, row for every module, end once with the total row.
+class ReportWriter(ABC):
+    def __init__(self, output: TextIO):
+        self.output: TextIO = output
+
+    def begin(self, project: ProjectSnapshot) -> None:
+        pass
+
+    @abstractmethod
+    def row(self, values: list) -> None:
+        pass
+
+    def end(self, project: ProjectSnapshot, total: list) -> None:
+        pass
+
+
+class MarkdownReportWriter(ReportWriter):
+    def begin(self, project: ProjectSnapshot) -> None:
+        ratings = ", ".join(f"{key.name} {value.value}" for key, value in project.scale_factors.items())
+        self.output.write(f"# {project.name} - Effort Estimate\n\n"
+                          f"Calibration: {project.calibration.name}  \n"
+                          f"Schedule factor: {project.schedule_factor.value}  \n"
+                          f"Scale factors: {ratings}\n\n"
+                          f"| {' | '.join(COLUMNS)} |\n"
+                          f"|:--|{'--:|' * (len(COLUMNS) - 1)}\n")
+
+    @staticmethod
+    def _cell(value) -> str:
+        return _text(value).replace("|", "\\|")
+
+    def row(self, values: list) -> None:
+        self.output.write("| " + " | ".join(self._cell(value) for value in values) + " |\n")
+
+    def end(self, project: ProjectSnapshot, total: list) -> None:
+        self.output.write("| " + " | ".join(f"**{self._cell(value)}**" if value is not None else "" for value in total)
+                          + " |\n")
+
+
+# Numbers are written in full so the file can be loaded back without losing precision.
+class CsvReportWriter(ReportWriter):
+    def __init__(self, output: TextIO):
+        super().__init__(output)
+        self.writer = csv.writer(output)
+
+    def begin(self, project: ProjectSnapshot) -> None:
+        self.writer.writerow(COLUMNS)
+
+    def row(self, values: list) -> None:
+        self.writer.writerow(values)
+
+    def end(self, project: ProjectSnapshot, total: list) -> None:
+        self.writer.writerow(total)
+
+
+class HtmlReportWriter(ReportWriter):
+    def begin(self, project: ProjectSnapshot) -> None:
+        name: str = html.escape(project.name)
+        ratings = ", ".join(f"{key.name} {html.escape(value.value)}" for key, value in project.scale_factors.items())
+        self.output.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{name} - Effort Estimate</title>\n"
+            "<style>table { border-collapse: collapse; } th, td { border: 1px solid #999; padding: 2px 6px; }"
+            " td { text-align: right; } td:first-child { text-align: left; }</style>\n"
+            f"</head>\n<body>\n<h1>{name} - Effort Estimate</h1>\n"
+            f"<p>Calibration: {html.escape(project.calibration.name)}<br>\n"
+            f"Schedule factor: {html.escape(project.schedule_factor.value)}<br>\n"
+            f"Scale factors: {ratings}</p>\n"
+            "<table>\n<thead>\n<tr>" + "".join(f"<th>{html.escape(column)}</th>" for column in COLUMNS)
+            + "</tr>\n</thead>\n<tbody>\n")
+
+    def row(self, values: list) -> None:
+        self.output.write("<tr>" + "".join(f"<td>{html.escape(_text(value))}</td>" for value in values) + "</tr>\n")
+
+    def end(self, project: ProjectSnapshot, total: list) -> None:
+        self.output.write("</tbody>\n<tfoot>\n<tr>"
+                          + "".join(f"<th>{html.escape(_text(value))}</th>" for value in total)
+                          + "</tr>\n</tfoot>\n</table>\n</body>\n</html>\n")
+
+
+WRITERS: dict[str, type[ReportWriter]] = {
+    "markdown": MarkdownReportWriter,
+    "csv": CsvReportWriter,
+    "html": HtmlReportWriter,
+}
+
+
+def format_for_path(path: Union[str, Path]) -> str:
+    suffix: str = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"cannot tell the report format from {Path(path).name!r}, use .md, .csv or .html")
+    return FORMATS[suffix]
+
+
+# Streams the report of project through writer. A Project is read one module at a time as the rows are
+# written, so it must not be edited meanwhile; other threads should be given a ProjectSnapshot whose module
+# values were copied with their ratings. cancelled is polled every 256 rows; if it returns True the report
+# is left unfinished and False is returned.
+def write_report(project: Union[Project, ProjectSnapshot], writer: ReportWriter,
+                 cancelled: Optional[Callable[[], bool]]=None) -> bool:
+    if isinstance(project, Project):
+        project = ProjectSnapshot(project, (ModuleValues(module, ratings=True) for module in project.modules))
+    writer.begin(project)
+    sloc: int = 0
+    for i, module in enumerate(project.modules):
+        if cancelled is not None and i % 256 == 0 and cancelled():
+            return False
+        writer.row(module_row(project, module))
+        sloc += module.sloc
+    writer.end(project, total_row(project, sloc))
+    return True
+
+
+# The report is written to a temporary file next to path, which replaces path only once the report is
+# complete, so a cancelled or failed export leaves no partial report behind.
+def export_report(project: Union[Project, ProjectSnapshot], path: Union[str, Path], format: Optional[str]=None,
+                  cancelled: Optional[Callable[[], bool]]=None) -> bool:
+    path = Path(path)
+    format = format or format_for_path(path)
+    # Named after the thread as well as the process, as two exports to the same path can run at once.
+    temporary_path: Path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporary_path, "w", encoding="utf-8", newline="" if format == "csv" else None) as output:
+            finished: bool = write_report(project, WRITERS[format](output), cancelled)
+        if finished:
+            os.replace(temporary_path, path)
+        return finished
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Write the estimate report of a saved COCOMO II project.")
+    parser.add_argument("project", help="project JSON file")
+    parser.add_argument("-o", "--output", help="report file, by default the report is written to stdout")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS),
+                        help="report format (default: from the --output extension, markdown for stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        project: Project = load_project(args.project)
+        if args.output is None:
+            write_report(project, WRITERS[args.format or "markdown"](sys.stdout))
+        else:
+            export_report(project, args.output, args.format)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
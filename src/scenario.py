@@ -0,0 +1,162 @@
+# What-if scenarios layered over a Project.
+# A Scenario records only the SLOC, effort modifiers, scale factors, schedule factor and calibration it
+# overrides and reads everything else from its base project, so thousands of variants of a large project
+# cost memory in proportion to their differences. Estimating one starts from the base project's running sums
+#
+#     S = sum(SLOC_i)    W = sum(SLOC_i * EAF_i)
+#
+# and replaces the contributions of the overridden modules only, so it takes time in proportion to the
+# number of overridden modules rather than the size of the project; a rating overridden on the whole project
+# overrides every module, so estimating such a scenario visits them all. Edits to the base show through every
+# scenario that does not override them.
+
+from collections import ChainMap
+from typing import Optional
+
+from calibration import CalibrationProfile
+from cocomo import Module, Project, estimate_schedule
+from constants import *
+from cost_tables import check_rating, effort_adjustment_factor, scale_factor_sum, schedule_multiplier
+
+
+class Scenario:
+    def __init__(self, base: Project, name: str):
+        self.base: Project = base
+        self.name: str = name
+        self._sloc: dict[Module, int] = {}
+        self._effort_modifiers: dict[Module, dict[EffortModifier, RatingLevel]] = {}
+        # Ratings overridden on every module of the base project, including modules added to it later.
+        self._project_effort_modifiers: dict[EffortModifier, RatingLevel] = {}
+        self._scale_factors: dict[ScaleFactor, RatingLevel] = {}
+        self._schedule_factor: Optional[RatingLevel] = None
+        self.calibration: Optional[CalibrationProfile] = None
+
+        self.nominal_effort: float = 0.0
+        self.nominal_schedule: float = 0.0
+        self.average_staffing: float = 0.0
+
+    def _check_module(self, module: Module) -> None:
+        if module.project is not self.base:
+            raise ValueError(f"{module.name} is not a module of {self.base.name}")
+
+    def set_sloc(self, module: Module, sloc: int) -> None:
+        self._check_module(module)
+        if sloc < 0:
+            raise ValueError("SLOC cannot be negative")
+        self._sloc[module] = sloc
+
+    def set_effort_modifier(self, module: Module, key: EffortModifier, level: RatingLevel) -> None:
+        self._check_module(module)
+        check_rating(key, level)
+        self._effort_modifiers.setdefault(module, {})[key] = level
+
+    # Overrides the rating of key on every module of the base project, now and later. Overrides of key set
+    # on single modules before are dropped; set_effort_modifier afterwards overrides this again for one module.
+    def set_project_effort_modifier(self, key: EffortModifier, level: RatingLevel) -> None:
+        check_rating(key, level)
+        self._project_effort_modifiers[key] = level
+        for ratings in self._effort_modifiers.values():
+            ratings.pop(key, None)
+
+    def set_scale_factor(self, key: ScaleFactor, level: RatingLevel) -> None:
+        check_rating(key, level)
+        self._scale_factors[key] = level
+
+    def set_schedule_factor(self, level: RatingLevel) -> None:
+        check_rating(EffortModifier.SCED, level)
+        self._schedule_factor = level
+
+    # Drops the overrides of one module, or of the whole scenario when module is None.
+    def revert(self, module: Optional[Module]=None) -> None:
+        if module is not None:
+            self._sloc.pop(module, None)
+            self._effort_modifiers.pop(module, None)
+            return
+        self._sloc.clear()
+        self._effort_modifiers.clear()
+        self._project_effort_modifiers.clear()
+        self._scale_factors.clear()
+        self._schedule_factor = None
+        self.calibration = None
+
+    def sloc(self, module: Module) -> int:
+        return self._sloc.get(module, module.sloc)
+
+    def effort_modifiers(self, module: Module) -> ChainMap:
+        return ChainMap(self._effort_modifiers.get(module, {}), self._project_effort_modifiers, module.effort_modifiers)
+
+    @property
+    def scale_factors(self) -> ChainMap:
+        return ChainMap(self._scale_factors, self.base.scale_factors)
+
+    @property
+    def schedule_factor(self) -> RatingLevel:
+        return self._schedule_factor if self._schedule_factor is not None else self.base.schedule_factor
+
+    # Number of overridden values, which is what the scenario's memory grows with.
+    @property
+    def override_count(self) -> int:
+        return (len(self._sloc) + sum(len(ratings) for ratings in self._effort_modifiers.values())
+                + len(self._project_effort_modifiers) + len(self._scale_factors) + (self._schedule_factor is not None) + (self.calibration is not None))
+
+    # A new scenario over the same base with a copy of this one's overrides.
+    def derive(self, name: str) -> 'Scenario':
+        scenario = Scenario(self.base, name)
+        scenario._sloc = dict(self._sloc)
+        scenario._effort_modifiers = {module: dict(ratings) for module, ratings in self._effort_modifiers.items()}
+        scenario._project_effort_modifiers = dict(self._project_effort_modifiers)
+        scenario._scale_factors = dict(self._scale_factors)
+        scenario._schedule_factor = self._schedule_factor
+        scenario.calibration = self.calibration
+        return scenario
+
+    def _modules(self) -> list[Module]:
+        # A project wide override changes every module.
+        if self._project_effort_modifiers:
+            return self.base.modules
+        # Overrides of modules that have since been removed from the base project are ignored.
+        modules = dict.fromkeys(self._sloc) | dict.fromkeys(self._effort_modifiers)
+        return [module for module in modules if module.project is self.base]
+
+    # Same equations as Project.estimate_effort, applied to the base project's sums with the overridden
+    # modules' contributions swapped out.
+    def estimate_effort(self) -> None:
+        aggregate_sloc, weighted_sloc = self.base.aggregates
+        for module in self._modules():
+            sloc: int = self.sloc(module)
+            eaf: float = (effort_adjustment_factor(self.effort_modifiers(module))
+                          if module in self._effort_modifiers or self._project_effort_modifiers
+                          else module.effort_adjustment_factor)
+            aggregate_sloc += sloc - module.sloc
+            weighted_sloc += sloc * eaf - module.sloc * module.effort_adjustment_factor
+
+        if aggregate_sloc <= 0:
+            self.nominal_effort = 0.0
+            self.nominal_schedule = 0.0
+            self.average_staffing = 0.0
+            return
+
+        calibration: CalibrationProfile = self.calibration if self.calibration is not None else self.base.calibration
+        E: float = calibration.B + 0.01 * scale_factor_sum(self.scale_factors)
+        effort_without_sced: float = calibration.A * (aggregate_sloc / 1000)**E * weighted_sloc / aggregate_sloc
+        self.nominal_effort = effort_without_sced * schedule_multiplier(self.schedule_factor)
+        self.nominal_schedule = estimate_schedule(effort_without_sced, E, self.schedule_factor, calibration)
+        self.average_staffing = self.nominal_effort / self.nominal_schedule
+
+    # A standalone Project with the overrides applied, for saving or editing a scenario as a project of its own.
+    def to_project(self, name: Optional[str]=None) -> Project:
+        project = Project.project_from_dict(self.base.encode())
+        project.name = name if name is not None else self.name
+        for base_module, module in zip(self.base.modules, project.modules):
+            module.effort_modifiers.update(self._project_effort_modifiers)
+            if base_module in self._sloc:
+                module.sloc = self._sloc[base_module]
+            if base_module in self._effort_modifiers:
+                module.effort_modifiers.update(self._effort_modifiers[base_module])
+        project.scale_factors.update(self._scale_factors)
+        project.schedule_factor = self.schedule_factor
+        if self.calibration is not None:
+            project.calibration = self.calibration
+        project.actual_effort = None
+        project.actual_schedule = None
+        return project
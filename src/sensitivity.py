@@ -0,0 +1,158 @@
+# Sensitivity and tornado analysis of a project estimate.
+# Every one step rating change of every effort modifier, scale factor and SCED, and a +/- x% SLOC change,
+# is evaluated in a single batched computation. All of them only change the running sums the multiple module
+# equation is built from,
+#
+#     effort = A * (S / 1000)^E * SCED * W / S    with S = sum(SLOC_i) and W = sum(SLOC_i * EAF_i)
+#
+# so each variant is a closed form update of S, W, E or SCED instead of a new call to Project.estimate_effort.
+
+from typing import Optional
+
+import numpy as np
+
+from cocomo import Project
+from constants import *
+from cost_tables import EFFORT_MODIFIERS, SCALE_FACTORS, RATING_LEVELS, RATING_CODES
+from portfolio import (EFFORT_MODIFIER_TABLE, SCALE_FACTOR_TABLE, SCHEDULE_TABLE,
+                       effort_adjustment_factors, pack_portfolio)
+
+_STEPS: tuple[int, int] = (-1, 1)
+
+
+class TornadoRow:
+    def __init__(self, driver: str, module: Optional[str], low_label: str, high_label: str,
+                 low_effort: float, high_effort: float, base_effort: float):
+        self.driver: str = driver
+        self.module: Optional[str] = module
+        self.low_label: str = low_label
+        self.high_label: str = high_label
+        self.low_effort: float = low_effort
+        self.high_effort: float = high_effort
+        self.base_effort: float = base_effort
+
+    @property
+    def swing(self) -> float:
+        return abs(self.high_effort - self.low_effort)
+
+    def __repr__(self) -> str:
+        where = f" ({self.module})" if self.module is not None else ""
+        return (f"TornadoRow({self.driver}{where}: {self.low_label} {self.low_effort:.2f}, "
+                f"{self.high_label} {self.high_effort:.2f})")
+
+
+def _step_labels(codes: np.ndarray) -> list[list[str]]:
+    # Labels of the rating one step down and one step up from each code; out of range steps are labelled "-".
+    labels: list[list[str]] = []
+    for code in codes.tolist():
+        labels.append([RATING_LEVELS[code + step].value if 0 <= code + step < len(RATING_LEVELS) else "-"
+                       for step in _STEPS])
+    return labels
+
+
+def _stepped_values(table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    # table[..., code - 1] and table[..., code + 1] stacked on a last axis of size 2; NaN where the step
+    # falls off the table or lands on a rating that is not applicable.
+    stepped = np.full(codes.shape + (2,), np.nan)
+    for column, step in enumerate(_STEPS):
+        target = codes.astype(np.int64) + step
+        valid = (target >= 0) & (target < table.shape[-1])
+        values = np.take_along_axis(table, np.clip(target, 0, table.shape[-1] - 1)[..., None], axis=-1)[..., 0]
+        stepped[..., column] = np.where(valid, values, np.nan)
+    return stepped
+
+
+class SensitivityAnalysis:
+    # Efforts after each one step change, NaN where the step is not possible:
+    #   module_effort[i, j, s]   effort modifier j of module i stepped down (s = 0) or up (s = 1)
+    #   driver_effort[j, s]      effort modifier j stepped on every module at once
+    #   scale_factor_effort[k, s], schedule_effort[s]
+    #   module_sloc_effort[i, s] SLOC of module i decreased / increased by sloc_percent
+    #   sloc_effort[s]           SLOC of every module decreased / increased by sloc_percent
+    def __init__(self, project: Project, sloc_percent: float=10.0):
+        self.project: Project = project
+        self.sloc_percent: float = sloc_percent
+
+        arrays = pack_portfolio([project])
+        sloc = arrays.sloc
+        ratings = arrays.ratings
+        eaf = effort_adjustment_factors(ratings)
+
+        project.estimate_effort()
+        self.base_effort: float = project.nominal_effort
+        aggregate_sloc: float = float(sloc.sum())
+        weighted_sloc: float = float((sloc * eaf).sum())
+        exponent: float = project.scale_exponent
+        sced: float = SCHEDULE_TABLE[RATING_CODES[project.schedule_factor]]
+
+        a: float = project.calibration.A
+
+        def effort(aggregate, weighted, exponent=exponent, sced=sced):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = a * (aggregate / 1000.0)**exponent * sced * weighted / aggregate
+            return np.where(aggregate > 0, result, 0.0)
+
+        # Effort modifiers: W changes by SLOC_i * EAF_i * (new multiplier / old multiplier - 1).
+        current = EFFORT_MODIFIER_TABLE[np.arange(len(EFFORT_MODIFIERS)), ratings]
+        table = np.broadcast_to(EFFORT_MODIFIER_TABLE, ratings.shape + (len(RATING_LEVELS),))
+        ratio = _stepped_values(table, ratings) / current[..., None]
+        delta = (sloc * eaf)[:, None, None] * (ratio - 1.0)
+        self.module_effort: np.ndarray = effort(aggregate_sloc, weighted_sloc + delta)
+        # Modules where the step is not possible keep their rating when a driver is stepped project wide.
+        self.driver_effort: np.ndarray = effort(aggregate_sloc, weighted_sloc + np.nansum(delta, axis=0))
+        self.driver_effort[np.isnan(delta).all(axis=0)] = np.nan
+
+        # Scale factors only change the exponent.
+        scale_codes = np.array([RATING_CODES[project.scale_factors[key]] for key in SCALE_FACTORS])
+        scale_current = SCALE_FACTOR_TABLE[np.arange(len(SCALE_FACTORS)), scale_codes]
+        scale_delta = _stepped_values(SCALE_FACTOR_TABLE, scale_codes) - scale_current[:, None]
+        self.scale_factor_effort: np.ndarray = effort(aggregate_sloc, weighted_sloc, exponent=exponent + 0.01 * scale_delta)
+
+        schedule_code = np.array(RATING_CODES[project.schedule_factor])
+        self.schedule_effort: np.ndarray = effort(aggregate_sloc, weighted_sloc,
+                                                  sced=_stepped_values(SCHEDULE_TABLE, schedule_code))
+
+        # SLOC changes move both S and W.
+        fraction = np.array([-sloc_percent, sloc_percent]) / 100.0
+        sloc_delta = sloc[:, None] * fraction
+        self.module_sloc_effort: np.ndarray = effort(aggregate_sloc + sloc_delta, weighted_sloc + sloc_delta * eaf[:, None])
+        self.sloc_effort: np.ndarray = effort(aggregate_sloc * (1 + fraction), weighted_sloc * (1 + fraction))
+
+        self._ratings: np.ndarray = ratings
+        self._scale_codes: np.ndarray = scale_codes
+
+    def _row(self, driver: str, module: Optional[str], labels: list[str], efforts: np.ndarray) -> Optional[TornadoRow]:
+        if np.isnan(efforts).all():
+            return None
+        low, high = [self.base_effort if np.isnan(value) else float(value) for value in efforts]
+        return TornadoRow(driver, module, labels[0], labels[1], low, high, self.base_effort)
+
+    def tornado(self, by_module: bool=False, limit: Optional[int]=None) -> list[TornadoRow]:
+        # Rows ranked by how far they swing the estimate. With by_module every module gets its own rows for the
+        # effort modifiers and SLOC, otherwise an effort modifier is stepped on all modules together.
+        rows: list[Optional[TornadoRow]] = []
+        sloc_labels = [f"-{self.sloc_percent:g}% SLOC", f"+{self.sloc_percent:g}% SLOC"]
+
+        if by_module:
+            for i, module in enumerate(self.project.modules):
+                labels = _step_labels(self._ratings[i])
+                for j, key in enumerate(EFFORT_MODIFIERS):
+                    rows.append(self._row(key.name, module.name, labels[j], self.module_effort[i, j]))
+                rows.append(self._row("SLOC", module.name, sloc_labels, self.module_sloc_effort[i]))
+        else:
+            for j, key in enumerate(EFFORT_MODIFIERS):
+                rows.append(self._row(key.name, None, ["one step down", "one step up"], self.driver_effort[j]))
+            rows.append(self._row("SLOC", None, sloc_labels, self.sloc_effort))
+
+        scale_labels = _step_labels(self._scale_codes)
+        for k, key in enumerate(SCALE_FACTORS):
+            rows.append(self._row(key.name, None, scale_labels[k], self.scale_factor_effort[k]))
+        schedule_labels = _step_labels(np.array([RATING_CODES[self.project.schedule_factor]]))[0]
+        rows.append(self._row(EffortModifier.SCED.name, None, schedule_labels, self.schedule_effort))
+
+        ranked = sorted((row for row in rows if row is not None), key=lambda row: row.swing, reverse=True)
+        return ranked if limit is None else ranked[:limit]
+
+
+def tornado(project: Project, sloc_percent: float=10.0, by_module: bool=False, limit: Optional[int]=None) -> list[TornadoRow]:
+    return SensitivityAnalysis(project, sloc_percent).tornado(by_module, limit)
@@ -0,0 +1,281 @@
+# Local HTTP/JSON estimation service, so tools that need COCOMO numbers can ask one long running process
+# instead of each importing and running the estimator themselves.
+#
+#     python src/service.py --port 8765
+#
+#     POST /estimate   a project in the format written by ProjectEncoder, answered with the same fields as a
+#                      main.py JSON report line: effort, schedule, staffing, SLOC and the module estimates
+#     GET  /stats      request, cache and batch counters and latency percentiles
+#
+# Projects that arrive within batch_delay of each other are estimated together by one estimate_portfolio
+# call, which costs little more than estimating one of them. Answers are kept in an LRU cache keyed by a
+# hash of the request body, so a repeated payload is answered without being parsed, and identical payloads
+# that arrive while the first is still being estimated wait for its answer instead of being estimated again.
+# Only the standard library's asyncio is used; the service listens on localhost unless told otherwise.
+
+from collections import OrderedDict
+from time import perf_counter
+from typing import Optional, Union
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+
+from cocomo import Project
+from instrument import OperationStats
+from main import project_result
+from portfolio import estimate_portfolio
+
+MAX_BODY_SIZE: int = 64 * 1024 * 1024
+
+_REASONS: dict[int, str] = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def decode_project(payload: bytes) -> Project:
+    try:
+        data = json.loads(payload)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        return Project.project_from_dict(data)
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"not a project: {type(error).__name__}: {error}") from None
+
+
+def _estimate_one(project: Project) -> Union[bytes, ValueError]:
+    try:
+        estimate_portfolio([project])
+    except ValueError as error:
+        return error
+    return json.dumps(project_result(project)).encode()
+
+
+# Response bodies of a batch of projects, or the error of each project that could not be estimated.
+def estimate_batch(projects: list[Project]) -> list[Union[bytes, ValueError]]:
+    try:
+        estimate_portfolio(projects)
+    except ValueError:
+        # One bad project fails the whole batch, so every project is estimated on its own to find it.
+        return [_estimate_one(project) for project in projects]
+    return [json.dumps(project_result(project)).encode() for project in projects]
+
+
+class EstimationService:
+    def __init__(self, batch_delay: float=0.002, max_batch: int=256, cache_size: int=4096):
+        self.batch_delay: float = batch_delay
+        self.max_batch: int = max_batch
+        self.cache_size: int = cache_size
+
+        self._cache: OrderedDict[bytes, bytes] = OrderedDict()
+        self._in_flight: dict[bytes, asyncio.Future] = {}
+        self._queue: list[tuple[bytes, Project, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.started: float = perf_counter()
+        self.latency: OperationStats = OperationStats()
+        self.counters: dict[str, int] = dict.fromkeys(
+            ["requests", "errors", "cache_hits", "cache_misses", "coalesced", "batches", "projects_estimated"], 0)
+
+    # The JSON response body for a project payload. Raises ValueError if the payload is not a project.
+    async def estimate(self, payload: bytes) -> bytes:
+        start: float = perf_counter()
+        key: bytes = hashlib.blake2b(payload, digest_size=16).digest()
+        body: Optional[bytes] = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.counters["cache_hits"] += 1
+        else:
+            future: Optional[asyncio.Future] = self._in_flight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+            else:
+                self.counters["cache_misses"] += 1
+                future = self._submit(key, decode_project(payload))
+            body = await asyncio.shield(future)
+        self.latency.record(perf_counter() - start)
+        return body
+
+    def _submit(self, key: bytes, project: Project) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._in_flight[key] = future
+        self._queue.append((key, project, future))
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_delay, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queue = self._queue, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    # The batch is estimated on a worker thread so the event loop keeps accepting requests meanwhile.
+    async def _run_batch(self, batch: list[tuple[bytes, Project, asyncio.Future]]) -> None:
+        self.counters["batches"] += 1
+        self.counters["projects_estimated"] += len(batch)
+        try:
+            results = await asyncio.to_thread(estimate_batch, [project for _, project, _ in batch])
+        except Exception as error:
+            results = [error] * len(batch)
+        for (key, _, future), result in zip(batch, results):
+            del self._in_flight[key]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                continue
+            future.set_result(result)
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        uptime: float = perf_counter() - self.started
+        latency: dict = self.latency.encode()
+        del latency["buckets"], latency["location"]
+        return {
+            "uptime": uptime,
+            "requests_per_second": self.counters["requests"] / uptime if uptime > 0 else 0.0,
+            "mean_batch_size": (self.counters["projects_estimated"] / self.counters["batches"]
+                                if self.counters["batches"] else 0.0),
+            "cached": len(self._cache),
+            "latency": latency,
+            **self.counters,
+        }
+
+    async def _respond(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        if path == "/estimate":
+            if method != "POST":
+                return 405, b'{"error": "use POST"}'
+            try:
+                return 200, await self.estimate(body)
+            except ValueError as error:
+                return 400, json.dumps({"error": str(error)}).encode()
+            except Exception as error:
+                return 500, json.dumps({"error": f"{type(error).__name__}: {error}"}).encode()
+        if path == "/stats":
+            if method != "GET":
+                return 405, b'{"error": "use GET"}'
+            return 200, json.dumps(self.stats()).encode()
+        return 404, json.dumps({"error": f"no such endpoint {path}"}).encode()
+
+    # One HTTP/1.1 connection, kept open for further requests unless the client asks to close it.
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line: bytes = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split(maxsplit=2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                self.counters["requests"] += 1
+                length: int = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    status, response = 413, b'{"error": "request body too large"}'
+                    keep_alive = False
+                else:
+                    status, response = await self._respond(method, path, await reader.readexactly(length))
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and not version.startswith("HTTP/1.0"))
+                if status != 200:
+                    self.counters["errors"] += 1
+
+                writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(response)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1"))
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str="127.0.0.1", port: int=8765) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+# A minimal client over one keep-alive connection. Requests on one client are sent one at a time.
+class ServiceClient:
+    def __init__(self, host: str="127.0.0.1", port: int=8765):
+        self.host: str = host
+        self.port: int = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def request(self, method: str, path: str, body: bytes=b"") -> tuple[int, bytes]:
+        async with self._lock:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                               f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            await self._writer.drain()
+
+            status: int = int((await self._reader.readline()).split()[1])
+            headers: dict[str, str] = {}
+            while (line := await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            response: bytes = await self._reader.readexactly(int(headers.get("content-length", 0)))
+            if headers.get("connection", "").lower() == "close":
+                await self.close()
+            return status, response
+
+    # Raises ValueError with the service's message if the project could not be estimated.
+    async def estimate(self, project: Union[Project, dict, bytes]) -> dict:
+        if isinstance(project, Project):
+            project = project.encode()
+        if isinstance(project, dict):
+            project = json.dumps(project).encode()
+        status, response = await self.request("POST", "/estimate", project)
+        if status != 200:
+            raise ValueError(json.loads(response)["error"])
+        return json.loads(response)
+
+    async def stats(self) -> dict:
+        return json.loads((await self.request("GET", "/stats"))[1])
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader, self._writer = None, None
+
+
+async def serve(host: str, port: int, service: EstimationService) -> None:
+    server: asyncio.Server = await service.start(host, port)
+    addresses: str = ", ".join(f"{address[0]}:{address[1]}" for address in (s.getsockname() for s in server.sockets))
+    print(f"serving COCOMO estimates on {addresses}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve COCOMO II.2000 estimates over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--batch-delay", type=float, default=2.0,
+                        help="milliseconds to wait for more projects before estimating a batch (default: 2)")
+    parser.add_argument("--max-batch", type=int, default=256, help="most projects estimated together (default: 256)")
+    parser.add_argument("--cache-size", type=int, default=4096, help="answers kept in the cache (default: 4096)")
+    args = parser.parse_args(argv)
+
+    service = EstimationService(args.batch_delay / 1000, args.max_batch, args.cache_size)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+# Monte Carlo simulation of project effort and schedule.
+# A Project is estimated many times with SLOC and ratings drawn from distributions. Trials are sampled in
+# vectorized batches, batches are spread over a process pool, and every batch is reduced into fixed size
+# histograms before it is sent back, so percentiles are available while the simulation runs and memory does
+# not grow with the number of trials.
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Union
+import math
+
+import numpy as np
+
+from cocomo import Module, Project
+from constants import *
+from cost_tables import (RATING_CODES, check_rating, effort_adjustment_factor, scale_factor_sum,
+                         schedule_multiplier, schedule_percent)
+import cost_tables
+from portfolio import estimate_schedule
+
+
+class TriangularSloc:
+    def __init__(self, low: float, mode: float, high: float):
+        if not 0 <= low <= mode <= high or low == high:
+            raise ValueError("triangular SLOC needs 0 <= low <= mode <= high and low < high")
+        self.low: float = low
+        self.mode: float = mode
+        self.high: float = high
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+class LognormalSloc:
+    def __init__(self, median: float, sigma: float):
+        if median <= 0 or sigma < 0:
+            raise ValueError("lognormal SLOC needs a positive median and a non-negative sigma")
+        self.median: float = median
+        self.sigma: float = sigma
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return self.median * np.exp(self.sigma * rng.standard_normal(size))
+
+
+SlocDistribution = Union[TriangularSloc, LognormalSloc]
+
+
+class RatingDistribution:
+    # Probabilities of the rating levels one cost driver can take. Probabilities are normalized to sum to 1.
+    def __init__(self, driver: Union[EffortModifier, ScaleFactor], probabilities: dict[RatingLevel, float]):
+        for level, probability in probabilities.items():
+            check_rating(driver, level)
+            if probability < 0:
+                raise ValueError("rating probabilities cannot be negative")
+        total: float = sum(probabilities.values())
+        if total <= 0:
+            raise ValueError("rating probabilities must sum to more than zero")
+
+        self.driver: Union[EffortModifier, ScaleFactor] = driver
+        self.levels: list[RatingLevel] = list(probabilities)
+        self.cumulative: np.ndarray = np.cumsum([probabilities[level] / total for level in self.levels])
+        self.cumulative[-1] = 1.0
+
+    def values(self, table: tuple[float, ...]) -> np.ndarray:
+        return np.array([table[RATING_CODES[level]] for level in self.levels])
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        # Indexes into self.levels.
+        return np.searchsorted(self.cumulative, rng.random(size), side="right")
+
+
+class LogHistogram:
+    # Fixed bins that are evenly spaced in log10 space between low and high. Values below low (including zero)
+    # go into the first bin and values above high into the last. Histograms with the same bins can be merged.
+    def __init__(self, low: float, high: float, bins: int=20000):
+        self.low: float = low
+        self.high: float = high
+        self.counts: np.ndarray = np.zeros(bins, dtype=np.int64)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.minimum: float = math.inf
+        self.maximum: float = -math.inf
+
+        self._log_low: float = math.log10(low)
+        self._bin_width: float = (math.log10(high) - self._log_low) / bins
+
+    def add(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        with np.errstate(divide="ignore"):
+            positions = (np.log10(values) - self._log_low) / self._bin_width
+        bins = np.clip(np.nan_to_num(positions, nan=0.0, neginf=0.0), 0, len(self.counts) - 1).astype(np.int64)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def merge(self, other: 'LogHistogram') -> None:
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        # Interpolate linearly in log space inside the bin that holds the q-th percentile.
+        rank: float = q / 100.0 * self.count
+        cumulative = np.cumsum(self.counts)
+        index: int = min(int(np.searchsorted(cumulative, rank, side="left")), len(self.counts) - 1)
+        before: int = int(cumulative[index - 1]) if index > 0 else 0
+        fraction: float = (rank - before) / int(self.counts[index]) if self.counts[index] else 0.0
+        value: float = 10**(self._log_low + (index + fraction) * self._bin_width)
+        return min(max(value, self.minimum), self.maximum)
+
+
+class SimulationSummary:
+    def __init__(self):
+        self.effort: LogHistogram = LogHistogram(1e-3, 1e8)
+        self.schedule: LogHistogram = LogHistogram(1e-3, 1e5)
+
+    @property
+    def trials(self) -> int:
+        return self.effort.count
+
+    def merge(self, other: 'SimulationSummary') -> None:
+        self.effort.merge(other.effort)
+        self.schedule.merge(other.schedule)
+
+    def effort_percentiles(self, percentiles: tuple[float, ...]=(10, 50, 90)) -> dict[float, float]:
+        return {q: self.effort.percentile(q) for q in percentiles}
+
+    def schedule_percentiles(self, percentiles: tuple[float, ...]=(10, 50, 90)) -> dict[float, float]:
+        return {q: self.schedule.percentile(q) for q in percentiles}
+
+
+class _SimulationModel:
+    # Everything a worker process needs to sample trials, packed so that it pickles without Module or Project objects.
+    # Modules without any uncertainty are folded into fixed_sloc and fixed_weighted_sloc, only the uncertain
+    # modules get a column in each batch.
+    def __init__(self):
+        self.fixed_sloc: float = 0.0
+        self.fixed_weighted_sloc: float = 0.0
+        self.sloc: np.ndarray = np.zeros(0)
+        self.eaf: np.ndarray = np.zeros(0)
+        self.sloc_distributions: list[tuple[int, SlocDistribution]] = []
+        self.module_ratings: list[tuple[int, RatingDistribution, np.ndarray]] = []
+        self.shared_ratings: list[tuple[RatingDistribution, np.ndarray]] = []
+        self.scale_factor_sum: float = 0.0
+        self.scale_factor_ratings: list[tuple[RatingDistribution, np.ndarray]] = []
+        self.schedule_multiplier: float = 1.0
+        self.schedule_percent: float = 100.0
+        self.schedule_rating: Optional[tuple[RatingDistribution, np.ndarray, np.ndarray]] = None
+        self.calibration: tuple[float, float, float, float] = (A, B, C, D)
+
+    def sample(self, trials: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        sloc = np.tile(self.sloc, (trials, 1))
+        for column, distribution in self.sloc_distributions:
+            sloc[:, column] = distribution.sample(rng, trials)
+
+        eaf = np.tile(self.eaf, (trials, 1))
+        for column, distribution, ratios in self.module_ratings:
+            eaf[:, column] *= ratios[distribution.sample(rng, trials)]
+
+        aggregate_sloc = self.fixed_sloc + sloc.sum(axis=1)
+        weighted_sloc = self.fixed_weighted_sloc + (sloc * eaf).sum(axis=1)
+        for distribution, multipliers in self.shared_ratings:
+            weighted_sloc *= multipliers[distribution.sample(rng, trials)]
+
+        scale_factors = np.full(trials, self.scale_factor_sum)
+        for distribution, deltas in self.scale_factor_ratings:
+            scale_factors += deltas[distribution.sample(rng, trials)]
+        a, b, c, d = self.calibration
+        exponent = b + 0.01 * scale_factors
+
+        if self.schedule_rating is None:
+            sced = np.full(trials, self.schedule_multiplier)
+            percent = np.full(trials, self.schedule_percent)
+        else:
+            distribution, multipliers, percents = self.schedule_rating
+            levels = distribution.sample(rng, trials)
+            sced = multipliers[levels]
+            percent = percents[levels]
+
+        effort_without_sced = np.zeros(trials)
+        nonzero = aggregate_sloc > 0
+        effort_without_sced[nonzero] = (a * (aggregate_sloc[nonzero] / 1000.0)**exponent[nonzero]
+                                        * weighted_sloc[nonzero] / aggregate_sloc[nonzero])
+        effort = effort_without_sced * sced
+        schedule = estimate_schedule(effort_without_sced, exponent, percent, b, c, d)
+        return effort, schedule
+
+
+def _run_batch(model: _SimulationModel, trials: int, seed: np.random.SeedSequence) -> SimulationSummary:
+    summary = SimulationSummary()
+    effort, schedule = model.sample(trials, np.random.default_rng(seed))
+    summary.effort.add(effort)
+    summary.schedule.add(schedule)
+    return summary
+
+
+class Simulation:
+    def __init__(self, project: Project):
+        self.project: Project = project
+        self.sloc_distributions: dict[Module, SlocDistribution] = {}
+        self.module_ratings: dict[tuple[Module, EffortModifier], RatingDistribution] = {}
+        self.shared_ratings: dict[EffortModifier, RatingDistribution] = {}
+        self.scale_factor_ratings: dict[ScaleFactor, RatingDistribution] = {}
+        self.schedule_rating: Optional[RatingDistribution] = None
+
+    def set_sloc_distribution(self, module: Module, distribution: SlocDistribution) -> None:
+        if module.project is not self.project:
+            raise ValueError(f"{module.name} is not part of {self.project.name}")
+        self.sloc_distributions[module] = distribution
+
+    # With a module the rating of that module is drawn on its own. Without one a single draw per trial sets
+    # the rating of every module in the project, e.g. the same team works on all of them.
+    def set_rating_distribution(self, driver: Union[EffortModifier, ScaleFactor],
+                                probabilities: dict[RatingLevel, float], module: Optional[Module]=None) -> None:
+        distribution = RatingDistribution(driver, probabilities)
+        if isinstance(driver, ScaleFactor):
+            self.scale_factor_ratings[driver] = distribution
+        elif driver is EffortModifier.SCED:
+            self.schedule_rating = distribution
+        elif module is None:
+            if any(key == driver for _, key in self.module_ratings):
+                raise ValueError(f"{driver.name} already has per module distributions")
+            self.shared_ratings[driver] = distribution
+        else:
+            if driver in self.shared_ratings:
+                raise ValueError(f"{driver.name} already has a project wide distribution")
+            if module.project is not self.project:
+                raise ValueError(f"{module.name} is not part of {self.project.name}")
+            self.module_ratings[(module, driver)] = distribution
+
+    def _build_model(self) -> _SimulationModel:
+        model = _SimulationModel()
+        rated_modules: set[Module] = {module for module, _ in self.module_ratings}
+        uncertain: list[Module] = [module for module in self.project.modules
+                                   if module in self.sloc_distributions or module in rated_modules]
+        columns: dict[Module, int] = {module: column for column, module in enumerate(uncertain)}
+
+        # Project wide draws replace the rating of every module, so their multiplier is factored out of each EAF.
+        def module_eaf(module: Module) -> float:
+            eaf: float = effort_adjustment_factor(module.effort_modifiers)
+            for driver in self.shared_ratings:
+                eaf /= EFFORT_MODIFIER_COST_DRIVERS[driver][module.effort_modifiers[driver]]
+            return eaf
+
+        for module in self.project.modules:
+            if module not in columns:
+                model.fixed_sloc += module.sloc
+                model.fixed_weighted_sloc += module.sloc * module_eaf(module)
+        model.sloc = np.array([float(module.sloc) for module in uncertain])
+        model.eaf = np.array([module_eaf(module) for module in uncertain])
+
+        model.sloc_distributions = [(columns[module], distribution)
+                                    for module, distribution in self.sloc_distributions.items()]
+        for (module, driver), distribution in self.module_ratings.items():
+            row = cost_tables.EFFORT_MODIFIER_TABLE[cost_tables.EFFORT_MODIFIERS.index(driver)]
+            ratios = distribution.values(row) / EFFORT_MODIFIER_COST_DRIVERS[driver][module.effort_modifiers[driver]]
+            model.module_ratings.append((columns[module], distribution, ratios))
+        for driver, distribution in self.shared_ratings.items():
+            row = cost_tables.EFFORT_MODIFIER_TABLE[cost_tables.EFFORT_MODIFIERS.index(driver)]
+            model.shared_ratings.append((distribution, distribution.values(row)))
+
+        model.calibration = self.project.calibration.constants()
+        model.scale_factor_sum = scale_factor_sum(self.project.scale_factors)
+        for driver, distribution in self.scale_factor_ratings.items():
+            row = cost_tables.SCALE_FACTOR_TABLE[cost_tables.SCALE_FACTORS.index(driver)]
+            deltas = distribution.values(row) - SCALE_FACTOR_VALUES[driver][self.project.scale_factors[driver]]
+            model.scale_factor_ratings.append((distribution, deltas))
+
+        model.schedule_multiplier = schedule_multiplier(self.project.schedule_factor)
+        model.schedule_percent = schedule_percent(self.project.schedule_factor)
+        if self.schedule_rating is not None:
+            model.schedule_rating = (self.schedule_rating,
+                                     self.schedule_rating.values(cost_tables.SCHEDULE_TABLE),
+                                     self.schedule_rating.values(cost_tables.SCHEDULE_PERCENT_TABLE))
+        return model
+
+    def run_iter(self, trials: int, batch_size: int=50_000, workers: int=1,
+                 seed: Optional[int]=None) -> Iterator[SimulationSummary]:
+        # Yields the running summary after every completed batch; the last one covers all trials.
+        # Batches are seeded from one SeedSequence, so a given seed gives the same result for any worker count.
+        model = self._build_model()
+        batch_count: int = math.ceil(trials / batch_size)
+        sizes = [batch_size] * (batch_count - 1) + [trials - batch_size * (batch_count - 1)]
+        seeds = np.random.SeedSequence(seed).spawn(batch_count)
+        summary = SimulationSummary()
+
+        if workers <= 1:
+            for size, batch_seed in zip(sizes, seeds):
+                summary.merge(_run_batch(model, size, batch_seed))
+                yield summary
+            return
+
+        # Keep only a couple of batches per worker in flight so pending work does not pile up in memory.
+        batches = iter(zip(sizes, seeds))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for size, batch_seed in batches:
+                pending.add(executor.submit(_run_batch, model, size, batch_seed))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    summary.merge(future.result())
+                    next_batch = next(batches, None)
+                    if next_batch is not None:
+                        pending.add(executor.submit(_run_batch, model, *next_batch))
+                yield summary
+
+    def run(self, trials: int, batch_size: int=50_000, workers: int=1, seed: Optional[int]=None) -> SimulationSummary:
+        summary = SimulationSummary()
+        for summary in self.run_iter(trials, batch_size, workers, seed):
+            pass
+        return summary
@@ -0,0 +1,236 @@
+# Phase split and month by month staffing profiles of estimated projects.
+#
+# The effort (PM) and schedule (TDEV) of the COCOMO II.2000 equations cover elaboration and construction.
+# The MBASE/RUP phase distribution of COCOMO II.2000 adds inception and transition on top of them:
+#
+#                   effort   schedule   (% of PM and TDEV)
+#     Inception        6       12.5
+#     Elaboration     24       37.5
+#     Construction    76       62.5
+#     Transition      12       12.5
+#
+# A staffing profile spreads the effort of that whole life cycle over its months, either evenly within each
+# phase ("phases") or along a Rayleigh curve with its peak at peak * the life cycle and cut off at the end of
+# transition ("rayleigh"). Both are taken from the cumulative effort at every month boundary, computed for a
+# whole batch of projects at once as (projects, months) arrays, so there is no Python loop over months.
+#
+#     python src/staffing.py ~/cocomo-projects --model rayleigh --output staffing.csv --phases phases.csv
+#
+# Projects are estimated and profiled chunk_size at a time, so the CSV rows of any number of projects are
+# written in constant memory.
+
+from typing import Iterable, Iterator, Optional, TextIO
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from cocomo import Project
+from journal import load_project
+from ndjson import chunked
+from portfolio import estimate_portfolio
+
+PHASES: list[str] = ["Inception", "Elaboration", "Construction", "Transition"]
+PHASE_EFFORT_PERCENT: np.ndarray = np.array([6.0, 24.0, 76.0, 12.0])
+PHASE_SCHEDULE_PERCENT: np.ndarray = np.array([12.5, 37.5, 62.5, 12.5])
+
+MODELS: list[str] = ["phases", "rayleigh"]
+
+MONTHLY_FIELDS: list[str] = ["project", "month", "phase", "effort", "staff", "cumulative_effort"]
+PHASE_FIELDS: list[str] = ["project", "phase", "start", "duration", "effort", "staff"]
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    result = np.zeros(np.broadcast_shapes(numerator.shape, denominator.shape))
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+
+class PhaseSplit:
+    # One row per project and one column per phase of PHASES; durations and starts are in months.
+    def __init__(self, effort: np.ndarray, duration: np.ndarray):
+        self.effort: np.ndarray = effort
+        self.duration: np.ndarray = duration
+        self.start: np.ndarray = np.cumsum(duration, axis=1) - duration
+
+    @property
+    def project_count(self) -> int:
+        return len(self.effort)
+
+    @property
+    def total_effort(self) -> np.ndarray:
+        return self.effort.sum(axis=1)
+
+    # Months from the start of inception to the end of transition.
+    @property
+    def total_duration(self) -> np.ndarray:
+        return self.duration.sum(axis=1)
+
+    @property
+    def staffing(self) -> np.ndarray:
+        return _divide(self.effort, self.duration)
+
+
+def phase_split(effort: np.ndarray, schedule: np.ndarray, effort_percent: np.ndarray=PHASE_EFFORT_PERCENT,
+                schedule_percent: np.ndarray=PHASE_SCHEDULE_PERCENT) -> PhaseSplit:
+    effort = np.asarray(effort, dtype=np.float64).reshape(-1, 1)
+    schedule = np.asarray(schedule, dtype=np.float64).reshape(-1, 1)
+    return PhaseSplit(effort * np.asarray(effort_percent) / 100.0, schedule * np.asarray(schedule_percent) / 100.0)
+
+
+class StaffingProfile:
+    # effort[p, m] is the effort project p spends in month m + 1, 0 after its last month. Projects of a batch
+    # last different numbers of months, so the rows are padded to the longest.
+    def __init__(self, effort: np.ndarray, duration: np.ndarray):
+        self.effort: np.ndarray = effort
+        self.duration: np.ndarray = duration
+        self.months: np.ndarray = np.ceil(duration).astype(np.int64)
+
+    # Average full time staff in every month: the effort over the part of the month the project lasts.
+    @property
+    def staff(self) -> np.ndarray:
+        month_starts = np.arange(self.effort.shape[1], dtype=np.float64)
+        return _divide(self.effort, np.clip(self.duration[:, None] - month_starts, 0.0, 1.0))
+
+    @property
+    def peak_staff(self) -> np.ndarray:
+        return self.staff.max(axis=1, initial=0.0)
+
+    def project_effort(self, project_number: int) -> np.ndarray:
+        return self.effort[project_number, :self.months[project_number]]
+
+
+# Times of the month boundaries 0, 1, 2, ... of every project, the last one moved back to where it ends.
+def _month_boundaries(duration: np.ndarray) -> np.ndarray:
+    months: int = int(np.ceil(duration.max())) if len(duration) else 0
+    return np.minimum(np.arange(months + 1, dtype=np.float64), duration[:, None])
+
+
+# Effort spent evenly over the duration of each phase.
+def phase_profile(split: PhaseSplit) -> StaffingProfile:
+    duration: np.ndarray = split.total_duration
+    times = _month_boundaries(duration)
+    # The part of each phase that is done at each boundary, (projects, boundaries, phases).
+    done = np.clip(_divide(times[:, :, None] - split.start[:, None, :], split.duration[:, None, :]), 0.0, 1.0)
+    cumulative = np.einsum("pbk,pk->pb", done, split.effort)
+    return StaffingProfile(np.diff(cumulative, axis=1), duration)
+
+
+# Effort spent along the Rayleigh curve E(t) = K * (1 - exp(-t^2 / (2 * t_p^2))), whose staffing peaks at
+# t_p = peak * duration. The curve is cut off at the end of the duration and scaled so all of K is spent.
+def rayleigh_profile(effort: np.ndarray, duration: np.ndarray, peak: float=0.4) -> StaffingProfile:
+    if peak <= 0:
+        raise ValueError("the staffing peak must be after the start of the project")
+    effort = np.asarray(effort, dtype=np.float64)
+    duration = np.asarray(duration, dtype=np.float64)
+    times = _month_boundaries(duration)
+    spent = -np.expm1(-0.5 * _divide(times, peak * duration[:, None])**2)
+    cumulative = _divide(spent, spent[:, -1:]) * effort[:, None]
+    return StaffingProfile(np.diff(cumulative, axis=1), duration)
+
+
+def staffing_profile(split: PhaseSplit, model: str="phases", peak: float=0.4) -> StaffingProfile:
+    if model == "phases":
+        return phase_profile(split)
+    if model == "rayleigh":
+        return rayleigh_profile(split.total_effort, split.total_duration, peak)
+    raise ValueError(f"{model!r} is not a staffing model, use one of {', '.join(MODELS)}")
+
+
+# The phase (position in PHASES) that each month of profile starts in.
+def month_phases(split: PhaseSplit, profile: StaffingProfile) -> np.ndarray:
+    month_starts = np.arange(profile.effort.shape[1], dtype=np.float64)
+    started = month_starts[None, :, None] >= split.start[:, None, :]
+    return np.maximum(started.sum(axis=2) - 1, 0)
+
+
+def monthly_rows(names: list[str], split: PhaseSplit, profile: StaffingProfile) -> Iterator[tuple]:
+    # Every (project, month) pair up to each project's last month, in project order.
+    project_numbers, month_numbers = np.nonzero(np.arange(profile.effort.shape[1]) < profile.months[:, None])
+    phase_names = np.array(PHASES, dtype=object)[month_phases(split, profile)[project_numbers, month_numbers]]
+    return zip(np.array(names, dtype=object)[project_numbers].tolist(), (month_numbers + 1).tolist(),
+               phase_names.tolist(), profile.effort[project_numbers, month_numbers].tolist(),
+               profile.staff[project_numbers, month_numbers].tolist(),
+               np.cumsum(profile.effort, axis=1)[project_numbers, month_numbers].tolist())
+
+
+def phase_rows(names: list[str], split: PhaseSplit) -> Iterator[tuple]:
+    count: int = len(PHASES)
+    return zip(np.repeat(np.array(names, dtype=object), count).tolist(), PHASES * split.project_count,
+               split.start.ravel().tolist(), split.duration.ravel().tolist(), split.effort.ravel().tolist(),
+               split.staffing.ravel().tolist())
+
+
+# Estimates the projects chunk_size at a time and writes one row per project month to monthly and, if
+# phases is given, one row per project phase to it. Returns the number of projects written.
+def write_staffing_csv(projects: Iterable[Project], monthly: TextIO, phases: Optional[TextIO]=None,
+                       model: str="phases", peak: float=0.4, chunk_size: int=1024) -> int:
+    monthly_writer = csv.writer(monthly)
+    monthly_writer.writerow(MONTHLY_FIELDS)
+    phase_writer = None
+    if phases is not None:
+        phase_writer = csv.writer(phases)
+        phase_writer.writerow(PHASE_FIELDS)
+
+    count: int = 0
+    for chunk in chunked(projects, chunk_size):
+        estimate = estimate_portfolio(chunk, update=False)
+        split: PhaseSplit = phase_split(estimate.project_effort, estimate.project_schedule)
+        profile: StaffingProfile = staffing_profile(split, model, peak)
+        names: list[str] = [project.name for project in chunk]
+        monthly_writer.writerows(monthly_rows(names, split, profile))
+        if phase_writer is not None:
+            phase_writer.writerows(phase_rows(names, split))
+        count += len(chunk)
+    return count
+
+
+def main(argv: Optional[list[str]]=None) -> int:
+    from main import find_project_files
+
+    parser = argparse.ArgumentParser(description="Write the monthly staffing profiles of saved COCOMO II projects.")
+    parser.add_argument("paths", nargs="+", help="project JSON files, directories of them, or glob patterns")
+    parser.add_argument("-m", "--model", choices=MODELS, default="phases",
+                        help="how effort is spread over the months (default: phases)")
+    parser.add_argument("--peak", type=float, default=0.4,
+                        help="when Rayleigh staffing peaks, as a fraction of the life cycle (default: 0.4)")
+    parser.add_argument("-o", "--output", help="monthly staffing CSV file (default: standard output)")
+    parser.add_argument("--phases", help="also write the phase split of every project to this CSV file")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="projects estimated together (default: 1024)")
+    args = parser.parse_args(argv)
+    if args.peak <= 0 or args.chunk_size < 1:
+        parser.error("--peak must be positive and --chunk-size at least 1")
+
+    files = find_project_files(args.paths)
+    if not files:
+        print("no project files found", file=sys.stderr)
+        return 1
+
+    failed: int = 0
+    def load_projects() -> Iterator[Project]:
+        nonlocal failed
+        for path in files:
+            try:
+                yield load_project(path)
+            except (OSError, ValueError, KeyError, TypeError, IndexError) as error:
+                failed += 1
+                print(f"{path}: {type(error).__name__}: {error}", file=sys.stderr)
+
+    monthly: TextIO = sys.stdout if args.output is None else open(args.output, "w", newline="", encoding="utf-8")
+    phases: Optional[TextIO] = None if args.phases is None else open(args.phases, "w", newline="", encoding="utf-8")
+    try:
+        write_staffing_csv(load_projects(), monthly, phases, args.model, args.peak, args.chunk_size)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if monthly is not sys.stdout:
+            monthly.close()
+        if phases is not None:
+            phases.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# Seeded generator of synthetic projects for benchmarks and load tests.
+# The same seed and settings always produce the same projects.
+
+from typing import Optional
+import random
+
+from cocomo import Module, Project
+from constants import *
+from cost_tables import EFFORT_MODIFIERS, SCALE_FACTORS, applicable_levels
+
+# Relative weights of the rating levels; levels a driver does not define are skipped for that driver.
+DEFAULT_RATING_WEIGHTS: dict[RatingLevel, float] = {
+    RatingLevel.VERY_LOW: 0.05,
+    RatingLevel.LOW: 0.15,
+    RatingLevel.NOMINAL: 0.5,
+    RatingLevel.HIGH: 0.2,
+    RatingLevel.VERY_HIGH: 0.08,
+    RatingLevel.EXTRA_HIGH: 0.02,
+}
+
+DEFAULT_LANGUAGE_WEIGHTS: dict[Language, float] = {
+    Language.C: 0.3,
+    Language.Cpp: 0.25,
+    Language.Java: 0.25,
+    Language.PERL: 0.1,
+    Language.UnixShellScript: 0.1,
+}
+
+
+class SyntheticGenerator:
+    def __init__(self, seed: int=0, rating_weights: Optional[dict[RatingLevel, float]]=None,
+                 language_weights: Optional[dict[Language, float]]=None, sloc_range: tuple[int, int]=(500, 50000)):
+        self.random: random.Random = random.Random(seed)
+        self.sloc_range: tuple[int, int] = sloc_range
+
+        rating_weights = rating_weights or DEFAULT_RATING_WEIGHTS
+        self._ratings: dict = {}
+        for driver in EFFORT_MODIFIERS + SCALE_FACTORS + (EffortModifier.SCED,):
+            levels = [level for level in applicable_levels(driver) if rating_weights.get(level, 0) > 0]
+            self._ratings[driver] = (levels or [RatingLevel.NOMINAL], [rating_weights.get(level, 1) for level in levels] or [1])
+
+        language_weights = language_weights or DEFAULT_LANGUAGE_WEIGHTS
+        self._languages: list[Language] = list(language_weights)
+        self._language_weights: list[float] = list(language_weights.values())
+
+    def rating(self, driver) -> RatingLevel:
+        levels, weights = self._ratings[driver]
+        return self.random.choices(levels, weights)[0]
+
+    def function_counts(self) -> dict[str, tuple[int, int, int]]:
+        return {key: tuple(self.random.randint(0, 20) for _ in range(3)) for key in FUNCTION_POINT_WEIGHTS}
+
+    def module(self, name: str) -> Module:
+        module = Module(name)
+        module.sloc = self.random.randint(*self.sloc_range)
+        module.effort_modifiers = {key: self.rating(key) for key in EFFORT_MODIFIERS}
+        module.language = self.random.choices(self._languages, self._language_weights)[0]
+        return module
+
+    def project(self, modules: int, name: Optional[str]=None) -> Project:
+        project = Project(name or f"Synthetic {modules}")
+        for key in SCALE_FACTORS:
+            project.scale_factors[key] = self.rating(key)
+        project.schedule_factor = self.rating(EffortModifier.SCED)
+        for i in range(modules):
+            project.add_module(self.module(f"Module {i + 1}"))
+        return project
+
+    def portfolio(self, projects: int, modules: tuple[int, int]=(1, 50)) -> list[Project]:
+        return [self.project(self.random.randint(*modules), f"Synthetic Project {i + 1}") for i in range(projects)]
@@ -0,0 +1,29 @@
+import unittest
+from synthetic import SyntheticGenerator
+import benchmark
+
+class TestSyntheticGenerator(unittest.TestCase):
+
+    def test_same_seed_same_project(self):
+        first = SyntheticGenerator(seed=5).project(20)
+        second = SyntheticGenerator(seed=5).project(20)
+        self.assertDictEqual(first.encode(), second.encode())
+
+    def test_ratings_are_applicable(self):
+        project = SyntheticGenerator(seed=1).project(200)
+        project.estimate_effort()
+        self.assertGreater(project.nominal_effort, 0)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        report = benchmark.run_benchmarks(modules=20, seed=0, repeat=1, only=["json_encode", "json_decode"])
+        self.assertListEqual(["json_encode", "json_decode"], list(report["results"]))
+
+        ratios = benchmark.compare(report, report)
+        self.assertDictEqual({"json_encode": 1.0, "json_decode": 1.0}, ratios)
+
+
+if __name__ == "__main__":
+    unittest.main()
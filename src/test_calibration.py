@@ -0,0 +1,128 @@
+import unittest
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from calibration import *
+from calibration_fit import *
+from cocomo import *
+from portfolio import estimate_portfolio
+
+LEVELS = [RatingLevel.LOW, RatingLevel.NOMINAL, RatingLevel.HIGH]
+
+def random_project(rng: random.Random, name: str) -> Project:
+    project: Project = Project(name)
+    project.scale_factors[ScaleFactor.PREC] = rng.choice(LEVELS)
+    project.scale_factors[ScaleFactor.TEAM] = rng.choice(LEVELS)
+    project.schedule_factor = rng.choice(LEVELS)
+    for number in range(rng.randint(1, 4)):
+        module: Module = Module(f"{name} module {number}")
+        module.sloc = rng.randint(1000, 500000)
+        module.effort_modifiers[EffortModifier.CPLX] = rng.choice(LEVELS)
+        project.add_module(module)
+    return project
+
+# Finished projects whose actual effort and schedule are exactly what the profile estimates.
+def history(profile: CalibrationProfile, count: int, seed: int=1) -> list[Project]:
+    rng = random.Random(seed)
+    projects: list[Project] = []
+    for number in range(count):
+        project = random_project(rng, f"project {number}")
+        project.calibration = profile
+        project.estimate_effort()
+        project.actual_effort = project.nominal_effort
+        project.actual_schedule = project.nominal_schedule
+        project.calibration = COCOMO_II_2000
+        projects.append(project)
+    return projects
+
+PROFILE = CalibrationProfile("Ours", 3.1, 0.97, 3.4, 0.31)
+
+class TestCalibration(unittest.TestCase):
+
+    def test_recovers_constants(self):
+        fit = calibrate_projects(history(PROFILE, 30), "Fitted")
+
+        for expected, fitted in zip(PROFILE.constants(), fit.profile.constants()):
+            self.assertAlmostEqual(expected, fitted, places=6)
+        self.assertEqual(30, fit.profile.projects)
+        self.assertEqual(30, fit.schedule_projects)
+        self.assertAlmostEqual(0.0, fit.effort_error, places=6)
+
+    def test_multipliers_only(self):
+        profile = CalibrationProfile("Ours", 3.1, COCOMO_II_2000.B, 3.4, COCOMO_II_2000.D)
+        projects = history(profile, 1)
+        projects[0].actual_schedule = None
+
+        fit = calibrate_projects(projects, "Fitted", fit_exponents=False)
+
+        self.assertAlmostEqual(3.1, fit.profile.A, places=6)
+        self.assertEqual(COCOMO_II_2000.B, fit.profile.B)
+        self.assertEqual((COCOMO_II_2000.C, COCOMO_II_2000.D), (fit.profile.C, fit.profile.D))
+        self.assertIsNone(fit.schedule_error)
+
+    def test_not_enough_history(self):
+        with self.assertRaises(ValueError):
+            calibrate_projects([], "Fitted")
+        with self.assertRaises(ValueError):
+            calibrate_projects(history(PROFILE, 1), "Fitted")
+        with self.assertRaises(ValueError):
+            CalibrationProfile("Broken", -1.0, 0.91)
+
+    def test_large_history(self):
+        rng = np.random.default_rng(5)
+        count = 100000
+        ksloc = rng.uniform(1, 1000, count)
+        scale_factor_sum = rng.uniform(0, 30, count)
+        multiplier = rng.uniform(0.5, 2, count)
+        effort = 2.5 * ksloc**(1.05 + 0.01 * scale_factor_sum) * multiplier * rng.lognormal(0, 0.1, count)
+        data = HistoricalData(ksloc, multiplier, np.ones(count), np.full(count, 100.0), scale_factor_sum, effort)
+
+        fit = calibrate(data, "Large")
+        self.assertAlmostEqual(2.5, fit.profile.A, delta=0.05)
+        self.assertAlmostEqual(1.05, fit.profile.B, delta=0.01)
+        self.assertAlmostEqual(0.1, fit.effort_error, delta=0.01)
+
+    def test_estimates_with_profile(self):
+        project = random_project(random.Random(2), "project")
+        project.estimate_effort()
+        nominal = project.nominal_effort, project.nominal_schedule
+
+        project.calibration = PROFILE
+        project.estimate_effort()
+        self.assertNotAlmostEqual(nominal[0], project.nominal_effort)
+        self.assertNotAlmostEqual(nominal[1], project.nominal_schedule)
+
+        estimate = estimate_portfolio([project], update=False)
+        self.assertAlmostEqual(project.nominal_effort, estimate.project_effort[0])
+        self.assertAlmostEqual(project.nominal_schedule, estimate.project_schedule[0])
+
+        project.actual_effort = 120.0
+        project.actual_schedule = 14.5
+        loaded = Project.project_from_dict(json.loads(json.dumps(project, cls=ProjectEncoder)))
+        self.assertEqual(PROFILE, loaded.calibration)
+        self.assertEqual((120.0, 14.5), (loaded.actual_effort, loaded.actual_schedule))
+        loaded.estimate_effort()
+        self.assertAlmostEqual(project.nominal_effort, loaded.nominal_effort)
+
+    def test_profiles_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "profiles.json")
+            self.assertListEqual([COCOMO_II_2000.name], list(load_profiles(path)))
+
+            store_profile(PROFILE, path)
+            store_profile(CalibrationProfile("Other", 2.0, 1.0), path)
+            self.assertEqual(PROFILE, get_profile("Ours", path))
+            self.assertEqual(COCOMO_II_2000, get_profile(None, path))
+            self.assertEqual(3, len(load_profiles(path)))
+            with self.assertRaises(ValueError):
+                get_profile("Missing", path)
+            with self.assertRaises(ValueError):
+                store_profile(CalibrationProfile(COCOMO_II_2000.name, 2.0, 1.0), path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -63,6 +63,99 @@ class TestCocomoProject(unittest.TestCase):
         
         self.assertAlmostEqual(997.2, project.nominal_effort, places=1)
 
+    def test_estimate_effort_after_edits(self):
+        project: Project = Project("project")
+        modules: list[Module] = []
+        for i in range(4):
+            module: Module = Module(f"module{i}")
+            module.sloc = 100000
+            project.add_module(module)
+            modules.append(module)
+        project.estimate_effort()
+
+        modules[0].sloc = 50000
+        modules[1].effort_modifiers[EffortModifier.ACAP] = RatingLevel.HIGH
+        project.remove_module(3)
+        project.scale_factors[ScaleFactor.PREC] = RatingLevel.HIGH
+        project.schedule_factor = RatingLevel.LOW
+        project.estimate_effort()
+
+        fresh: Project = Project("fresh")
+        fresh.scale_factors[ScaleFactor.PREC] = RatingLevel.HIGH
+        fresh.schedule_factor = RatingLevel.LOW
+        for module in modules[:3]:
+            copy: Module = Module(module.name)
+            copy.sloc = module.sloc
+            copy.effort_modifiers = dict(module.effort_modifiers)
+            fresh.add_module(copy)
+        fresh.estimate_effort()
+
+        self.assertAlmostEqual(fresh.nominal_effort, project.nominal_effort, places=6)
+        self.assertIsNone(modules[3].project)
+
+    def test_add_module_from_another_project(self):
+        first: Project = Project("first")
+        second: Project = Project("second")
+        moved: Module = Module("moved")
+        moved.sloc = 20000
+        kept: Module = Module("kept")
+        kept.sloc = 10000
+        first.add_module(kept)
+        first.add_module(moved)
+        first.estimate_effort()
+
+        second.add_module(moved)
+        moved.sloc = 30000
+        self.assertListEqual([kept], first.modules)
+        self.assertListEqual([moved], second.modules)
+        self.assertIs(second, moved.project)
+        self.assertEqual((10000, 10000.0), first.aggregates)
+        self.assertEqual((30000, 30000.0), second.aggregates)
+
+        first.estimate_effort()
+        alone: Project = Project("alone")
+        copy: Module = Module("kept")
+        copy.sloc = 10000
+        alone.add_module(copy)
+        alone.estimate_effort()
+        self.assertAlmostEqual(alone.nominal_effort, first.nominal_effort, places=9)
+
+    def test_project_snapshot(self):
+        project: Project = Project("project")
+        for i in range(3):
+            module: Module = Module(f"module{i}")
+            module.sloc = 10000 * (i + 1)
+            project.add_module(module)
+        project.modules[1].effort_modifiers[EffortModifier.CPLX] = RatingLevel.HIGH
+        snapshot: ProjectSnapshot = ProjectSnapshot(project)
+
+        for module, values in zip(project.modules, snapshot.modules):
+            module.estimate_effort()
+            self.assertEqual((module.nominal_effort, module.nominal_schedule, module.average_staffing),
+                             snapshot.estimate_module(values))
+        estimated: tuple = snapshot.estimate_module(snapshot.modules[1])
+
+        # Edits after the snapshot was taken do not reach it.
+        project.modules[1].sloc = 1
+        project.modules[1].effort_modifiers[EffortModifier.CPLX] = RatingLevel.LOW
+        project.scale_factors[ScaleFactor.PREC] = RatingLevel.LOW
+        self.assertEqual(estimated, snapshot.estimate_module(snapshot.modules[1]))
+        self.assertEqual(20000, snapshot.modules[1].sloc)
+        self.assertIsNone(snapshot.modules[1].effort_modifiers)
+        self.assertNotEqual(project.scale_exponent, snapshot.scale_exponent)
+
+    def test_estimate_effort_all_modules_removed(self):
+        project: Project = Project("project")
+        module: Module = Module("module")
+        module.sloc = 1000
+        project.add_module(module)
+        project.estimate_effort()
+
+        project.remove_module(0)
+        project.estimate_effort()
+
+        self.assertEqual(0.0, project.nominal_effort)
+
     def test_project_encoder(self):
         project: Project = Project("Project 1")
         project.add_module(Module("Module 1"))
@@ -100,6 +193,31 @@ class TestCocomoModule(unittest.TestCase):
         module.estimate_effort()
         self.assertAlmostEqual(348.1, module.nominal_effort, places=1)
     
+    def test_estimate_schedule_nominal(self):
+        project: Project = Project("test project")
+
+        module: Module = Module("test module")
+        project.add_module(module)
+        module.sloc = 100000
+
+        module.estimate_effort()
+        project.estimate_effort()
+        self.assertAlmostEqual(25.9, module.nominal_schedule, places=1)
+        self.assertAlmostEqual(module.nominal_schedule, project.nominal_schedule, places=6)
+        self.assertAlmostEqual(465.3 / 25.9, project.average_staffing, places=0)
+
+    def test_estimate_schedule_compressed(self):
+        project: Project = Project("test project")
+        project.schedule_factor = RatingLevel.VERY_LOW
+
+        module: Module = Module("test module")
+        project.add_module(module)
+        module.sloc = 100000
+
+        project.estimate_effort()
+        self.assertAlmostEqual(25.9 * 0.75, project.nominal_schedule, places=1)
+        self.assertAlmostEqual(465.3 * 1.43, project.nominal_effort, places=0)
+
     def test_calculate_function_points(self):
         module: Module = Module("<--test-->")
         
@@ -132,6 +250,119 @@ class TestCocomoModule(unittest.TestCase):
                       )
 
 
+    def test_estimate_effort_not_applicable_rating(self):
+        project: Project = Project("test project")
+
+        module: Module = Module("test module")
+        project.add_module(module)
+        module.sloc = 100000
+        module.effort_modifiers[EffortModifier.DATA] = RatingLevel.VERY_LOW
+
+        with self.assertRaises(ValueError):
+            module.estimate_effort()
+
+    def test_module_from_dict_not_applicable_rating(self):
+        data = Module("Module 1").encode()
+        data["effort_modifiers"]["TIME"] = "LOW"
+        with self.assertRaises(ValueError):
+            Module.module_from_dict(data)
+
+
+class TestSubsystems(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = Project("project")
+        paths = [("App", "UI"), ("App", "UI"), ("App", "Core"), ("Platform",), ()]
+        for i, path in enumerate(paths):
+            module: Module = Module(f"module{i}")
+            module.sloc = 10000 * (i + 1)
+            module.subsystem = path
+            self.project.add_module(module)
+
+    def assertSubtotals(self):
+        # Every node against a sum over the modules at or below its path.
+        for node in self.project.subsystems.walk():
+            path = node.path
+            modules = [module for module in self.project.modules if module.subsystem[:len(path)] == path]
+            self.assertEqual(sum(module.sloc for module in modules), self.project.subsystem(*path).sloc)
+            self.assertAlmostEqual(sum(module.sloc * module.effort_adjustment_factor for module in modules),
+                                   node.weighted_sloc, places=6)
+            self.assertEqual(sum(module.subsystem == path for module in modules), node.module_count)
+
+    def test_subtotals(self):
+        self.assertEqual(30000, self.project.subsystem("App", "UI").sloc)
+        self.assertEqual(60000, self.project.subsystem("App").sloc)
+        self.assertEqual(150000, self.project.subsystem().sloc)
+        self.assertSubtotals()
+
+        self.project.modules[0].sloc = 5000
+        self.project.modules[2].effort_modifiers[EffortModifier.CPLX] = RatingLevel.VERY_HIGH
+        self.assertSubtotals()
+        self.assertAlmostEqual(1.34, self.project.subsystem("App", "Core").effort_adjustment_factor)
+        with self.assertRaises(ValueError):
+            self.project.subsystem("App", "Missing")
+
+    def test_moves_and_removals(self):
+        self.project.modules[3].subsystem = ("App", "Core", "Storage")
+        self.assertEqual(["App"], list(self.project.subsystems.children))
+        self.project.modules[0].sloc = 1000
+        self.project.modules[0].subsystem = ()
+        self.assertSubtotals()
+
+        self.project.remove_module(1)
+        self.assertNotIn("UI", self.project.subsystem("App").children)
+        self.project.remove_module(1)
+        self.assertSubtotals()
+        self.assertEqual(("App", "Core", "Storage"), self.project.subsystem("App", "Core", "Storage").path)
+
+    def test_subsystem_effort(self):
+        self.project.modules[4].effort_modifiers[EffortModifier.ACAP] = RatingLevel.HIGH
+        parts: list[float] = [self.project.subsystem_effort(name) for name in ["App", "Platform"]]
+        parts.append(self.project.nominal_effort * 50000 * 0.85 / self.project.subsystems.weighted_sloc)
+        self.assertAlmostEqual(self.project.nominal_effort, sum(parts), places=9)
+        self.assertAlmostEqual(self.project.nominal_effort, self.project.subsystem_effort(), places=9)
+
+    def test_json(self):
+        data: dict = self.project.encode()
+        self.assertEqual(["App", "UI"], data["modules"][0]["subsystem"])
+        self.assertNotIn("subsystem", data["modules"][4])
+
+        copy: Project = Project.project_from_dict(json.loads(json.dumps(data)))
+        self.assertEqual([module.subsystem for module in self.project.modules],
+                         [module.subsystem for module in copy.modules])
+        self.assertEqual(60000, copy.subsystem("App").sloc)
+
+        data["modules"][0]["subsystem"] = ["App", ""]
+        with self.assertRaises(ValueError):
+            Project.project_from_dict(data)
+
+
+class TestCostTables(unittest.TestCase):
+
+    def test_very_high_ratings(self):
+        project: Project = Project("test project")
+        project.scale_factors[ScaleFactor.PREC] = RatingLevel.VERY_HIGH
+
+        module: Module = Module("test module")
+        project.add_module(module)
+        module.sloc = 100000
+        module.effort_modifiers[EffortModifier.RELY] = RatingLevel.VERY_HIGH
+
+        module.estimate_effort()
+        expected: float = 2.94 * 100**(0.91 + 0.01 * (1.24 + 3.04 + 4.24 + 3.29 + 4.68)) * 1.26
+        self.assertAlmostEqual(expected, module.nominal_effort, places=6)
+
+    def test_compile_rejects_skipped_level(self):
+        import cost_tables
+        values = {RatingLevel.LOW: 0.9, RatingLevel.NOMINAL: 1.0, RatingLevel.VERY_HIGH: 1.2}
+        with self.assertRaises(ValueError):
+            cost_tables._compile_row("TEST", values, multiplier=True)
+
+    def test_applicable_levels(self):
+        import cost_tables
+        self.assertListEqual([RatingLevel.NOMINAL, RatingLevel.HIGH, RatingLevel.VERY_HIGH, RatingLevel.EXTRA_HIGH],
+                             cost_tables.applicable_levels(EffortModifier.TIME))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import json
+import tempfile
+from pathlib import Path
+from cocomo import *
+from columnar import *
+from synthetic import SyntheticGenerator
+
+# Every column with values that differ between modules, a non-ASCII name, and modules in nested subsystems.
+def columnar_project() -> Project:
+    project: Project = Project("Columnar Project")
+    project.scale_factors[ScaleFactor.TEAM] = RatingLevel.VERY_HIGH
+    project.schedule_factor = RatingLevel.LOW
+    for i in range(5):
+        module: Module = Module(f"Modüle {i}")
+        module.sloc = 1000 * (i + 1)
+        module.function_points = 10 * i
+        module.language = Language.Java if i % 2 else Language.Cpp
+        module.effort_modifiers[EffortModifier.CPLX] = RatingLevel.EXTRA_HIGH if i % 2 else RatingLevel.LOW
+        project.add_module(module)
+    project.modules[1].subsystem = ["Server"]
+    project.modules[2].subsystem = ["Server", "Storage"]
+    project.modules[3].subsystem = ["Server"]
+    return project
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name, "project.cocomo")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        project: Project = columnar_project()
+        write_columnar(project, self.path)
+
+        with ColumnarProject(self.path) as columnar:
+            self.assertEqual(5, columnar.module_count)
+            self.assertEqual("Modüle 3", columnar.module_name(3))
+            self.assertListEqual([0, 1, 2, 1, 0], columnar.subsystem_codes.tolist())
+            copy: Project = columnar.to_project()
+            self.assertDictEqual(project.encode(), copy.encode())
+            self.assertAlmostEqual(project.subsystem_effort("Server"), copy.subsystem_effort("Server"))
+
+        # Recorded outcomes, which calibration fitting needs, survive the round trip too.
+        project.actual_effort = 120.5
+        project.actual_schedule = 14.25
+        write_columnar(project, self.path)
+        with ColumnarProject(self.path) as columnar:
+            copy: Project = columnar.to_project()
+            self.assertEqual(120.5, copy.actual_effort)
+            self.assertEqual(14.25, copy.actual_schedule)
+            self.assertDictEqual(project.encode(), copy.encode())
+
+    def test_estimate_effort(self):
+        project: Project = columnar_project()
+        project.estimate_effort()
+        write_columnar(project, self.path)
+
+        with ColumnarProject(self.path) as columnar:
+            columnar.estimate_effort()
+            self.assertAlmostEqual(project.nominal_effort, columnar.nominal_effort, places=6)
+            self.assertEqual(5, len(columnar.module_effort))
+
+    def test_json_converters(self):
+        project: Project = columnar_project()
+        json_path = Path(self.directory.name, "project.json")
+        json_path.write_text(json.dumps(project.encode()))
+
+        json_to_columnar(json_path, self.path)
+        columnar_to_json(self.path, Path(self.directory.name, "copy.json"))
+
+        copy = json.loads(Path(self.directory.name, "copy.json").read_text())
+        self.assertDictEqual(project.encode(), copy)
+
+    def test_empty_project(self):
+        write_columnar(Project("Empty"), self.path)
+        with ColumnarProject(self.path) as columnar:
+            self.assertListEqual([], columnar.to_project().modules)
+
+        # Projects without subsystems have no subsystem column.
+        project: Project = SyntheticGenerator(6).project(3)
+        write_columnar(project, self.path)
+        with ColumnarProject(self.path) as columnar:
+            self.assertIsNone(columnar.subsystem_codes)
+            self.assertNotIn("subsystems", columnar.header)
+            self.assertDictEqual(project.encode(), columnar.to_project().encode())
+
+    def test_not_columnar(self):
+        self.path.write_text("{}")
+        with self.assertRaises(ValueError):
+            ColumnarProject(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
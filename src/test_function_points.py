@@ -0,0 +1,116 @@
+import unittest
+import io
+import random
+import tempfile
+from pathlib import Path
+
+from cocomo import *
+from columnar import ColumnarProject, write_columnar
+from cost_tables import LANGUAGE_CODES, sloc_per_function_point
+from function_points import *
+
+COUNTS = {
+    "EI": (5, 10, 2),
+    "EO":  (3, 8, 1),
+    "ILF": (6, 17, 8),
+    "EIF": (10, 10, 5),
+    "EQ":  (2, 5, 0),
+}
+
+def counts_csv(rows: list[tuple[str, str, dict]], with_language: bool=True) -> io.StringIO:
+    header = ["module"] + (["language"] if with_language else []) + COUNT_COLUMNS
+    lines = [",".join(header)]
+    for name, language, counts in rows:
+        values = [str(count) for component in COUNTS for count in counts[component]]
+        lines.append(",".join([name] + ([language] if with_language else []) + values))
+    return io.StringIO("\n".join(lines) + "\n")
+
+class TestFunctionPoints(unittest.TestCase):
+
+    def test_matches_scalar_counting(self):
+        rng = random.Random(3)
+        function_counts = [{key: tuple(rng.randint(0, 20) for _ in range(3)) for key in COUNTS} for _ in range(50)]
+
+        points = function_points(pack_function_counts(function_counts))
+
+        module: Module = Module("module")
+        for counts, value in zip(function_counts, points.tolist()):
+            module.calculate_function_points(counts)
+            self.assertEqual(module.function_points, value)
+
+    def test_language_ratios(self):
+        self.assertEqual(128, sloc_per_function_point(Language.C))
+        self.assertEqual(128, sloc_per_function_point("C"))
+        self.assertEqual(13, sloc_per_function_point(Language.Query))
+        self.assertEqual(107, sloc_per_function_point(Language.UnixShellScript))
+        self.assertEqual(107, sloc_per_function_point(Language.Fortran77))
+        for language in Language:
+            self.assertGreater(sloc_per_function_point(language), 0)
+        with self.assertRaises(ValueError):
+            sloc_per_function_point("Cobol 2023")
+
+        module: Module = Module("module")
+        module.function_points = 100
+        module.language = Language.Java
+        module.function_points_to_sloc()
+        self.assertEqual(5300, module.sloc)
+
+    def test_language_codes(self):
+        codes = language_codes([Language.Cpp, "C++", "Cpp"])
+        self.assertListEqual([LANGUAGE_CODES[Language.Cpp]] * 3, codes.tolist())
+        with self.assertRaises(ValueError):
+            language_codes(["Klingon"])
+
+    def test_invalid_counts(self):
+        with self.assertRaises(ValueError):
+            function_points([[1, 2, 3]])
+        negative = pack_function_counts([COUNTS])
+        negative[0, 0, 0] = -1
+        with self.assertRaises(ValueError):
+            function_points(negative)
+
+    def test_read_csv(self):
+        counts = read_function_counts(counts_csv([("a", "Java", COUNTS), ("b", "C++", COUNTS)]))
+        self.assertListEqual(["a", "b"], counts.names)
+        self.assertListEqual([654, 654], counts.function_points.tolist())
+        self.assertListEqual([654 * 53, 654 * 55], counts.sloc.tolist())
+
+        with self.assertRaises(ValueError):
+            read_function_counts(io.StringIO("module,EI_low\na,1\n"))
+
+    def test_update_project(self):
+        project: Project = Project("project")
+        existing: Module = Module("a")
+        existing.language = Language.Java
+        project.add_module(existing)
+
+        added = update_project(project, read_function_counts(counts_csv([("a", "", COUNTS), ("b", "", COUNTS)], False)))
+
+        self.assertEqual(1, added)
+        self.assertListEqual(["a", "b"], [module.name for module in project.modules])
+        self.assertEqual(654 * 53, existing.sloc)
+        self.assertEqual(654 * 128, project.modules[1].sloc)
+        self.assertEqual(654, project.modules[1].function_points)
+
+    def test_update_columnar(self):
+        project: Project = Project("project")
+        for name in ("a", "b", "c"):
+            module: Module = Module(name)
+            module.sloc = 1000
+            project.add_module(module)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "project.cocomo")
+            write_columnar(project, path)
+            with ColumnarProject(path, writable=True) as columnar:
+                update_columnar(columnar, read_function_counts(counts_csv([("c", "Java", COUNTS)])))
+            with ColumnarProject(path) as columnar:
+                self.assertListEqual([1000, 1000, 654 * 53], columnar.sloc.tolist())
+                self.assertListEqual([0, 0, 654], columnar.function_points.tolist())
+                self.assertEqual(Language.Java, columnar.to_project().modules[2].language)
+                with self.assertRaises(ValueError):
+                    update_columnar(columnar, read_function_counts(counts_csv([("a", "C", COUNTS)])))
+
+
+if __name__ == "__main__":
+    unittest.main()
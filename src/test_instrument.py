@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import json
+import pstats
+import tempfile
+import time
+from pathlib import Path
+
+from cocomo import *
+import instrument
+from instrument import *
+
+@timed("test.add")
+def add(a: int, b: int) -> int:
+    return a + b
+
+@timed("test.sleep")
+async def sleep() -> str:
+    await asyncio.sleep(0)
+    return "done"
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        instrument.disable()
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_disabled_records_nothing(self):
+        self.assertEqual(3, add(1, 2))
+        with timer("test.block"):
+            pass
+        increment("test.counter")
+        self.assertEqual({"timers": {}, "counters": {}}, snapshot())
+
+    def test_records_when_enabled(self):
+        instrument.enable()
+        for _ in range(10):
+            add(1, 2)
+        self.assertEqual("done", asyncio.run(sleep()))
+        with timer("test.block"):
+            time.sleep(0.002)
+        increment("test.counter", 5)
+        project: Project = Project("project")
+        project.add_module(Module("module"))
+        project.estimate_effort()
+        Project.project_from_dict(project.encode())
+
+        data = snapshot()
+        self.assertEqual(10, data["timers"]["test.add"]["count"])
+        self.assertEqual(1, data["timers"]["test.sleep"]["count"])
+        self.assertEqual(1, data["timers"]["estimate.project"]["count"])
+        self.assertEqual(1, data["timers"]["json.decode"]["count"])
+        self.assertEqual(5, data["counters"]["test.counter"])
+        block = data["timers"]["test.block"]
+        self.assertGreaterEqual(block["min"], 0.002)
+        self.assertEqual(1, sum(block["buckets"]))
+        self.assertLessEqual(block["p50"], block["max"])
+        self.assertIn("| test.add | 10 |", format_snapshot(data))
+
+    def test_histogram(self):
+        for seconds in [0.0000005, 0.0015, 0.0015, 0.0015, 2.0]:
+            INSTRUMENTATION.record("test.fixed", seconds)
+        stats = snapshot()["timers"]["test.fixed"]
+        # 1.5 ms falls in the bucket below 2^11 us, 2 s in the one below 2^21 us.
+        self.assertEqual(1, stats["buckets"][0])
+        self.assertEqual(3, stats["buckets"][11])
+        self.assertEqual(1, stats["buckets"][21])
+        self.assertAlmostEqual(0.002048, stats["p50"])
+        self.assertAlmostEqual(2.0, stats["p99"])
+
+    def test_merge_worker_snapshot(self):
+        result, worker_data = call_with_snapshot(add, 2, 3)
+        self.assertEqual(5, result)
+        self.assertFalse(instrument.is_enabled())
+        self.assertEqual({"timers": {}, "counters": {}}, snapshot())
+
+        INSTRUMENTATION.merge(worker_data)
+        INSTRUMENTATION.merge(worker_data)
+        self.assertEqual(2, snapshot()["timers"]["test.add"]["count"])
+
+    def test_write_profile(self):
+        instrument.enable()
+        add(1, 2)
+        with timer("test.block"):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = Path(directory, "profile.json")
+            write_profile(json_path)
+            self.assertEqual(1, json.loads(json_path.read_text())["timers"]["test.add"]["count"])
+
+            write_profile(Path(directory, "profile.prof"))
+            stats = pstats.Stats(str(Path(directory, "profile.prof")))
+            functions = {key[2]: value for key, value in stats.stats.items()}
+            self.assertEqual(1, functions["test.add"][1])
+            self.assertIn("test.block", functions)
+
+            with self.assertRaises(ValueError):
+                write_profile(Path(directory, "profile.txt"), "text")
+
+
+if __name__ == "__main__":
+    unittest.main()
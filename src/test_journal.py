@@ -0,0 +1,140 @@
+import unittest
+import json
+import tempfile
+from pathlib import Path
+
+from cocomo import *
+from journal import *
+from synthetic import SyntheticGenerator
+
+# Makes one edit of every kind to project and records it in journal.
+def edit(project: Project, journal: ProjectJournal) -> None:
+    project.modules[0].sloc = 12345
+    journal.set_sloc(project.modules[0])
+    project.modules[1].effort_modifiers[EffortModifier.CPLX] = RatingLevel.VERY_HIGH
+    journal.set_effort_modifier(project.modules[1], EffortModifier.CPLX)
+    project.scale_factors[ScaleFactor.PMAT] = RatingLevel.HIGH
+    journal.set_scale_factor(ScaleFactor.PMAT)
+    project.schedule_factor = RatingLevel.LOW
+    journal.set_schedule_factor()
+    module: Module = Module("added")
+    module.sloc = 500
+    project.add_module(module, 1)
+    journal.add_module(module)
+    project.remove_module(3)
+    journal.remove_module(3)
+    project.move_module(0, 2)
+    journal.move_module(0, 2)
+    project.modules[0].name = "renamed"
+    journal.rename_module(project.modules[0])
+    project.name = "edited"
+    journal.rename_project()
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name, "project.json")
+        self.project: Project = Project("project")
+        for i in range(3):
+            module: Module = Module(f"module {i}")
+            module.sloc = 1000 * (i + 1)
+            self.project.add_module(module)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay(self):
+        project: Project = self.project
+        saved: list = project.encode()["modules"]
+        journal = ProjectJournal(self.path, project)
+        journal.compact()
+        edit(project, journal)
+        journal.close()
+
+        self.assertEqual(9, len(list(read_journal(self.path))))
+        self.assertEqual(project.encode(), load_project(self.path).encode())
+        # The snapshot itself is still the project as it was saved.
+        self.assertEqual(saved, json.loads(self.path.read_text())["modules"])
+
+        # Journaling carries on where the reopened file left off.
+        journal = ProjectJournal.open(self.path)
+        self.assertEqual(9, journal.sequence)
+        journal.project.modules[0].sloc = 1
+        journal.set_sloc(journal.project.modules[0])
+        journal.close()
+        self.assertEqual(1, load_project(self.path).modules[0].sloc)
+
+    def test_compaction(self):
+        project: Project = self.project
+        journal = ProjectJournal(self.path, project, compact_after=4)
+        journal.compact()
+        edit(project, journal)
+        journal.flush()
+        # Two compactions after 4 and 8 edits, then one edit in the journal.
+        self.assertEqual([9], [entry["seq"] for entry in read_journal(self.path)])
+        self.assertEqual(8, json.loads(self.path.read_text())[SEQUENCE_KEY])
+        journal.close()
+        self.assertEqual(project.encode(), load_project(self.path).encode())
+
+    def test_crash_recovery(self):
+        project: Project = self.project
+        journal = ProjectJournal(self.path, project)
+        journal.compact()
+        edit(project, journal)
+        journal.flush()
+        stale: str = journal_path(self.path).read_text()
+        journal.compact()
+        journal.close()
+        self.assertFalse(journal_path(self.path).exists())
+
+        # As if the process died after writing the snapshot but before dropping the journal, and again
+        # half way through appending an entry.
+        journal_path(self.path).write_text(stale + '{"seq": 10, "op": "set_sl')
+        self.assertEqual(project.encode(), load_project(self.path).encode())
+
+        journal_path(self.path).write_text('{"seq": 10, "op": "format_disk"}\n')
+        with self.assertRaises(ValueError):
+            load_project(self.path)
+
+    def test_positions_follow_module_edits(self):
+        project: Project = self.project
+        journal = ProjectJournal(self.path, project)
+        journal.compact()
+        last: Module = project.modules[2]
+        last.sloc = 1
+        journal.set_sloc(last)
+        project.move_module(2, 0)
+        journal.move_module(2, 0)
+        last.sloc = 2
+        journal.set_sloc(last)
+        journal.flush()
+        self.assertEqual([2, 0], [entry["module"] for entry in read_journal(self.path) if entry["op"] == "set_sloc"])
+
+        with self.assertRaises(ValueError):
+            journal.set_sloc(Module("elsewhere"))
+        journal.close()
+        self.assertEqual(project.encode(), load_project(self.path).encode())
+
+    def test_edits_are_appended(self):
+        project: Project = SyntheticGenerator(0).project(5000)
+        journal = ProjectJournal(self.path, project, compact_after=10000)
+        journal.compact()
+        journal.flush()
+        snapshot: bytes = self.path.read_bytes()
+
+        for i in range(2000):
+            module: Module = project.modules[i]
+            module.sloc += 1
+            journal.set_sloc(module)
+        journal.close()
+
+        # Each edit adds one short line and leaves the snapshot alone.
+        self.assertEqual(snapshot, self.path.read_bytes())
+        lines: list[str] = journal_path(self.path).read_text().splitlines()
+        self.assertEqual(2000, len(lines))
+        self.assertLess(max(len(line) for line in lines), 64)
+        self.assertEqual(project.encode(), load_project(self.path).encode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import csv
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from cocomo import *
+import main
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for i in range(3):
+            project: Project = Project(f"Project {i}")
+            module: Module = Module("Module 1")
+            module.sloc = 10000 * (i + 1)
+            project.add_module(module)
+            Path(self.directory.name, f"project{i}.json").write_text(json.dumps(project.encode()))
+        Path(self.directory.name, "broken.json").write_text("{")
+        Path(self.directory.name, "notes.txt").write_text("not a project")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_csv_report(self):
+        output = Path(self.directory.name, "report.csv")
+        status: int = main.main([self.directory.name, "--jobs", "2", "--chunk-size", "1", "--output", str(output)])
+
+        rows = list(csv.DictReader(io.StringIO(output.read_text())))
+        self.assertEqual(1, status)
+        self.assertListEqual(["broken.json", "project0.json", "project1.json", "project2.json"],
+                             [Path(row["file"]).name for row in rows])
+        self.assertTrue(rows[0]["error"])
+        self.assertEqual("10000", rows[1]["sloc"])
+
+    def test_json_report(self):
+        output = Path(self.directory.name, "report.json")
+        status: int = main.main([str(Path(self.directory.name, "project*.json")), "--jobs", "1",
+                                 "--format", "json", "--output", str(output)])
+
+        results = json.loads(output.read_text())
+        self.assertEqual(0, status)
+        self.assertListEqual(["Project 0", "Project 1", "Project 2"], [result["project"] for result in results])
+
+    def test_does_not_import_textual(self):
+        code = "import sys, main; main.main([sys.argv[1], '--jobs', '1', '--output', sys.argv[2]]); print('textual' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code, str(Path(self.directory.name, "project0.json")),
+                                 str(Path(self.directory.name, "out.csv"))],
+                                cwd=Path(__file__).parent, capture_output=True, text=True)
+        self.assertEqual("False", result.stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
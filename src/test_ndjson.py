@@ -0,0 +1,63 @@
+import unittest
+import io
+from cocomo import *
+from ndjson import *
+
+def make_projects(count: int) -> list[Project]:
+    projects: list[Project] = []
+    for i in range(count):
+        project: Project = Project(f"project {i}")
+        for j in range(i % 3 + 1):
+            module: Module = Module(f"module {j}")
+            module.sloc = 1000 * (i + j + 1)
+            project.add_module(module)
+        projects.append(project)
+    return projects
+
+class TestNdjson(unittest.TestCase):
+
+    def test_round_trip(self):
+        projects = make_projects(5)
+        buffer = io.StringIO()
+        self.assertEqual(5, write_projects(projects, buffer))
+
+        buffer.seek(0)
+        loaded = list(read_projects(buffer))
+
+        self.assertListEqual([project.encode() for project in projects], [project.encode() for project in loaded])
+
+    def test_split_modules_round_trip(self):
+        projects = make_projects(4)
+        buffer = io.StringIO()
+        lines: int = write_projects(projects, buffer, split_modules=True)
+        self.assertEqual(4 + sum(len(project.modules) for project in projects), lines)
+
+        buffer.seek(0)
+        loaded = list(read_projects(buffer))
+
+        self.assertListEqual([project.encode() for project in projects], [project.encode() for project in loaded])
+
+    def test_orphan_module_record(self):
+        buffer = io.StringIO('{"name": "Module 1", "project": "missing", "effort_modifiers": {}}\n')
+        with self.assertRaises(ValueError):
+            list(read_records(buffer))
+
+    def test_estimate_records_keeps_order(self):
+        projects = make_projects(30)
+        for project in projects:
+            project.estimate_effort()
+
+        records = estimate_records(project_records(projects), jobs=2, chunk_size=4)
+        efforts = [record["nominal_effort"] for record in records]
+
+        for project, effort in zip(projects, efforts):
+            self.assertAlmostEqual(project.nominal_effort, effort, places=6)
+        self.assertEqual(len(projects), len(efforts))
+
+    def test_filter_records(self):
+        records = filter_records(project_records(make_projects(6)), lambda record: len(record["modules"]) == 2)
+        self.assertListEqual(["project 1", "project 4"], [record["name"] for record in records])
+
+
+if __name__ == "__main__":
+    unittest.main()
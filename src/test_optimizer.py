@@ -0,0 +1,114 @@
+import unittest
+from itertools import product
+
+from cocomo import *
+from cost_tables import applicable_levels
+from optimizer import *
+from synthetic import SyntheticGenerator
+
+def estimate(project: Project) -> float:
+    project.estimate_effort()
+    return project.nominal_effort
+
+DRIVERS = (EffortModifier.TOOL, EffortModifier.ACAP, EffortModifier.SITE, ScaleFactor.PMAT)
+
+class TestOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = Project("project")
+        for i in range(3):
+            module: Module = Module(f"module {i}")
+            module.sloc = 10000 * (i + 1)
+            self.project.add_module(module)
+        self.project.modules[2].effort_modifiers[EffortModifier.TOOL] = RatingLevel.HIGH
+        self.project.modules[0].effort_modifiers[EffortModifier.ACAP] = RatingLevel.LOW
+
+    # An unchanged copy of the test project, for tests that edit their project.
+    def copy(self) -> Project:
+        return Project.project_from_dict(self.project.encode())
+
+    def test_matches_exhaustive_search(self):
+        # Every combination of keeping the current ratings or setting a rating on all modules, by change count.
+        best: dict[int, float] = {}
+        for levels in product(*[[None] + applicable_levels(driver) for driver in DRIVERS]):
+            project: Project = self.copy()
+            changes: int = 0
+            for driver, level in zip(DRIVERS, levels):
+                if level is None:
+                    continue
+                if isinstance(driver, ScaleFactor):
+                    changes += project.scale_factors[driver] != level
+                    project.scale_factors[driver] = level
+                else:
+                    changes += any(module.effort_modifiers[driver] != level for module in project.modules)
+                    for module in project.modules:
+                        module.effort_modifiers[driver] = level
+            best[changes] = min(best.get(changes, float("inf")), estimate(project))
+
+        front = pareto_front(self.project, controllable=DRIVERS)
+
+        self.assertAlmostEqual(estimate(self.project), front[0].effort, places=6)
+        for configuration in front:
+            cheapest = min(effort for changes, effort in best.items() if changes <= configuration.cost)
+            self.assertAlmostEqual(cheapest, configuration.effort, places=6)
+            project: Project = self.copy()
+            configuration.apply(project)
+            self.assertAlmostEqual(estimate(project), configuration.effort, places=6)
+            self.assertEqual(configuration.cost, configuration.changes)
+        self.assertListEqual(sorted(best)[:len(front)], [configuration.cost for configuration in front])
+
+    def test_constraints(self):
+        project: Project = self.project
+        controllable = CONTROLLABLE_DRIVERS + (EffortModifier.RELY,)
+
+        unconstrained = optimize(project, controllable=controllable)
+        self.assertEqual(RatingLevel.VERY_LOW, unconstrained.effort_modifiers[EffortModifier.RELY])
+
+        fixed = optimize(project, controllable=controllable, fixed={EffortModifier.RELY: RatingLevel.HIGH})
+        self.assertEqual(RatingLevel.HIGH, fixed.effort_modifiers[EffortModifier.RELY])
+        self.assertEqual(len(fixed.effort_modifiers) + len(fixed.scale_factors) - 1, fixed.changes)
+        configured: Project = self.copy()
+        fixed.apply(configured)
+        self.assertAlmostEqual(estimate(configured), fixed.effort, places=6)
+
+        capped = optimize(project, max_cost=2)
+        self.assertEqual(2, capped.changes)
+        self.assertLess(capped.effort, estimate(project))
+        self.assertGreater(capped.effort, optimize(project).effort)
+
+        target: float = estimate(project) / 2
+        cheapest = RatingOptimizer(project).cheapest(target)
+        self.assertLessEqual(cheapest.effort, target)
+        self.assertGreater(RatingOptimizer(project).optimize(cheapest.cost - 1).effort, target)
+        self.assertIsNone(RatingOptimizer(project, controllable=[EffortModifier.SITE]).cheapest(target))
+
+    def test_levels_and_costs(self):
+        project: Project = self.project
+        optimizer = RatingOptimizer(project, controllable=[EffortModifier.PCAP, EffortModifier.SITE],
+                                    levels={EffortModifier.PCAP: [RatingLevel.HIGH]},
+                                    change_costs={EffortModifier.SITE: 5})
+
+        front = optimizer.pareto_front()
+        self.assertListEqual([0, 1, 5, 6], [configuration.cost for configuration in front])
+        self.assertEqual({EffortModifier.PCAP: RatingLevel.HIGH}, front[1].effort_modifiers)
+        self.assertEqual(2, front[-1].changes)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RatingOptimizer(self.project, controllable=[EffortModifier.SCED])
+        with self.assertRaises(ValueError):
+            RatingOptimizer(self.project, fixed={EffortModifier.TIME: RatingLevel.LOW})
+        with self.assertRaises(ValueError):
+            RatingOptimizer(Project("empty"))
+
+    def test_large_project(self):
+        project: Project = SyntheticGenerator(4).project(5000)
+        front = pareto_front(project)
+
+        configuration = front[len(front) // 2]
+        configuration.apply(project)
+        self.assertAlmostEqual(1.0, estimate(project) / configuration.effort, places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from calibration import CalibrationProfile
+from cocomo import *
+from parallel import *
+from portfolio import pack_portfolio
+from synthetic import SyntheticGenerator
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = SyntheticGenerator(3).project(500)
+        self.project.scale_factors[ScaleFactor.PREC] = RatingLevel.LOW
+        self.project.schedule_factor = RatingLevel.HIGH
+        self.project.calibration = CalibrationProfile("Ours", 3.1, 0.93)
+
+    def assertMatchesScalar(self, estimate):
+        self.project.estimate_effort()
+        self.assertAlmostEqual(self.project.nominal_effort, estimate.project_effort[0], places=6)
+        self.assertAlmostEqual(self.project.nominal_schedule, estimate.project_schedule[0], places=6)
+        for module, effort, schedule in zip(self.project.modules, estimate.module_effort, estimate.module_schedule):
+            module.estimate_effort()
+            self.assertAlmostEqual(module.nominal_effort, effort, places=9)
+            self.assertAlmostEqual(module.nominal_schedule, schedule, places=9)
+
+    def test_matches_scalar_estimates(self):
+        for jobs in [1, 3]:
+            with self.subTest(jobs=jobs):
+                self.assertMatchesScalar(estimate_parallel(self.project, jobs, update=False, min_rows=100))
+                self.assertMatchesScalar(estimate_arrays_parallel(pack_portfolio([self.project]), jobs, min_rows=100))
+
+    def test_update(self):
+        estimate = estimate_parallel(self.project, 2, min_rows=100)
+        self.assertEqual(estimate.project_effort[0], self.project.nominal_effort)
+        self.assertEqual(estimate.module_effort[-1], self.project.modules[-1].nominal_effort)
+        self.assertEqual(estimate.project_staffing[0], self.project.average_staffing)
+
+        empty: Project = Project("empty")
+        estimate_parallel(empty, 2)
+        self.assertEqual(0.0, empty.nominal_effort)
+
+    def test_invalid_rating(self):
+        # RatingDict does not check ratings, so only the estimate notices this one; the error comes from a worker.
+        self.project.modules[400].effort_modifiers[EffortModifier.RELY] = RatingLevel.EXTRA_HIGH
+        with self.assertRaisesRegex(ValueError, "module row 400"):
+            estimate_parallel(self.project, 3, min_rows=100)
+
+    def test_shards(self):
+        self.assertEqual([(0, 10)], shards(10, 4, 50))
+        self.assertEqual([(0, 50), (50, 101)], shards(101, 4, 50))
+        self.assertEqual([(0, 250), (250, 500), (500, 750), (750, 1000)], shards(1000, 4, 50))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import random
+from cocomo import *
+from portfolio import *
+
+def make_project(name: str, module_count: int, rng: random.Random) -> Project:
+    project: Project = Project(name)
+    project.schedule_factor = rng.choice([RatingLevel.LOW, RatingLevel.NOMINAL, RatingLevel.HIGH])
+    for key in project.scale_factors:
+        project.scale_factors[key] = rng.choice([RatingLevel.LOW, RatingLevel.NOMINAL, RatingLevel.HIGH])
+    for i in range(module_count):
+        module: Module = Module(f"module {i}")
+        module.sloc = rng.randint(0, 50000)
+        for key in module.effort_modifiers:
+            module.effort_modifiers[key] = rng.choice([RatingLevel.NOMINAL, RatingLevel.HIGH])
+        project.add_module(module)
+    return project
+
+class TestEstimatePortfolio(unittest.TestCase):
+
+    def test_matches_scalar_estimates(self):
+        rng = random.Random(7)
+        projects = [make_project(f"project {i}", rng.randint(1, 8), rng) for i in range(20)]
+        estimate = estimate_portfolio(projects, update=False)
+
+        for number, project in enumerate(projects):
+            project.estimate_effort()
+            self.assertAlmostEqual(project.nominal_effort, estimate.project_effort[number], places=6)
+            self.assertAlmostEqual(project.nominal_schedule, estimate.project_schedule[number], places=6)
+            module_results = zip(project.modules, estimate.project_module_effort(number),
+                                 estimate.project_module_schedule(number))
+            for module, module_effort, module_schedule in module_results:
+                module.estimate_effort()
+                self.assertAlmostEqual(module.nominal_effort, module_effort, places=6)
+                self.assertAlmostEqual(module.nominal_schedule, module_schedule, places=6)
+
+    def test_update_writes_back(self):
+        project: Project = Project("project")
+        module1: Module = Module("module1")
+        module1.sloc = 100000
+        module2: Module = Module("module2")
+        module2.sloc = 100000
+        project.add_module(module1)
+        project.add_module(module2)
+
+        estimate_portfolio([project])
+
+        self.assertAlmostEqual(997.2, project.nominal_effort, places=1)
+        self.assertAlmostEqual(465.3, module1.nominal_effort, places=1)
+
+    def test_empty_project(self):
+        estimate = estimate_portfolio([Project("empty"), Project("also empty")])
+        self.assertListEqual([0.0, 0.0], estimate.project_effort.tolist())
+        self.assertEqual(0, len(estimate.module_effort))
+
+    def test_undefined_rating(self):
+        project: Project = Project("project")
+        module: Module = Module("module")
+        module.sloc = 1000
+        module.effort_modifiers[EffortModifier.TIME] = RatingLevel.VERY_LOW
+        project.add_module(module)
+        with self.assertRaises(ValueError):
+            estimate_portfolio([project])
+
+
+if __name__ == "__main__":
+    unittest.main()
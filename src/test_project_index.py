@@ -0,0 +1,97 @@
+import unittest
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from cocomo import *
+import project_index
+from project_index import *
+
+def write_project(directory: Path, file_name: str, name: str, sloc: list[int]) -> Project:
+    project: Project = Project(name)
+    for i, value in enumerate(sloc):
+        module: Module = Module(f"module {i}")
+        module.sloc = value
+        project.add_module(module)
+    Path(directory, file_name).write_text(json.dumps(project.encode()))
+    return project
+
+class TestProjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.directory: Path = Path(self.temporary_directory.name)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_lists_only_projects(self):
+        write_project(self.directory, "b.json", "Project B", [1000])
+        write_project(self.directory, "a.json", "Project A", [100000, 50000])
+        Path(self.directory, "notes.txt").write_text("not a project")
+        Path(self.directory, "other.json").write_text("[1, 2, 3]")
+        Path(self.directory, "folder.json").mkdir()
+
+        summaries = scan_directory(self.directory)
+
+        self.assertListEqual(["a.json", "b.json"], [summary.file_name for summary in summaries])
+        self.assertEqual("Project A", summaries[0].name)
+        self.assertEqual(2, summaries[0].modules)
+        self.assertEqual(150000, summaries[0].sloc)
+        self.assertAlmostEqual(2.94, summaries[1].effort, places=2)
+        self.assertTrue(Path(self.directory, INDEX_FILE_NAME).exists())
+
+    def test_unchanged_files_are_not_parsed(self):
+        write_project(self.directory, "a.json", "Project A", [1000])
+        scan_directory(self.directory)
+
+        with mock.patch.object(project_index, "summarize_file", wraps=summarize_file) as summarize:
+            scan_directory(self.directory)
+            self.assertEqual(0, summarize.call_count)
+
+            write_project(self.directory, "a.json", "Renamed Project", [2000, 3000])
+            stat = Path(self.directory, "a.json").stat()
+            os.utime(Path(self.directory, "a.json"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            summaries = scan_directory(self.directory)
+            self.assertEqual(1, summarize.call_count)
+
+        self.assertEqual("Renamed Project", summaries[0].name)
+        self.assertEqual(5000, summaries[0].sloc)
+
+    def test_corrupt_index_is_rebuilt(self):
+        write_project(self.directory, "a.json", "Project A", [1000])
+        Path(self.directory, INDEX_FILE_NAME).write_text("{ not json")
+
+        self.assertEqual("Project A", scan_directory(self.directory)[0].name)
+        self.assertEqual(INDEX_VERSION, json.loads(Path(self.directory, INDEX_FILE_NAME).read_text())["version"])
+
+    def test_listing_cache(self):
+        index: ProjectIndex = ProjectIndex()
+        write_project(self.directory, "a.json", "Project A", [1000])
+        first = index.listing(self.directory)
+        self.assertIs(first, index.listing(self.directory))
+
+        write_project(self.directory, "b.json", "Project B", [1000])
+        os.utime(self.directory, ns=(0, os.stat(self.directory).st_mtime_ns + 1000))
+        self.assertEqual(2, len(index.listing(self.directory)))
+
+    def test_record_project(self):
+        index: ProjectIndex = ProjectIndex()
+        project = write_project(self.directory, "a.json", "Project A", [1000])
+        index.listing(self.directory)
+
+        project.modules[0].sloc = 100000
+        Path(self.directory, "a.json").write_text(json.dumps(project.encode()))
+        index.record_project(Path(self.directory, "a.json"), project)
+
+        with mock.patch.object(project_index, "summarize_file", wraps=summarize_file) as summarize:
+            summaries = index.listing(self.directory)
+            self.assertEqual(0, summarize.call_count)
+        self.assertEqual(100000, summaries[0].sloc)
+        self.assertAlmostEqual(465.3, summaries[0].effort, places=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+
+from cocomo import *
+from report import *
+from synthetic import SyntheticGenerator
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = SyntheticGenerator(4).project(20)
+        self.project.name = "Widgets | <b>"
+        self.project.modules[0].name = "a|b <c>"
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_csv(self):
+        path: str = os.path.join(self.directory.name, "report.csv")
+        self.assertTrue(export_report(self.project, path))
+        with open(path, newline="") as report:
+            rows: list[list[str]] = list(csv.reader(report))
+        # The report leaves the modules as they were.
+        self.assertTrue(all(module.nominal_effort == 0.0 for module in self.project.modules))
+        self.project.estimate_effort()
+        for module in self.project.modules:
+            module.estimate_effort()
+
+        self.assertEqual(COLUMNS, rows[0])
+        self.assertEqual(len(self.project.modules) + 2, len(rows))
+        for module, row in zip(self.project.modules, rows[1:]):
+            self.assertEqual(module.name, row[0])
+            self.assertEqual(module.sloc, int(row[1]))
+            self.assertEqual(module.nominal_effort, float(row[2]))
+            self.assertEqual(module.effort_adjustment_factor, float(row[5]))
+            multipliers: float = 1.0
+            for value in row[6:]:
+                multipliers *= float(value)
+            self.assertAlmostEqual(module.effort_adjustment_factor, multipliers, places=12)
+        self.assertEqual(self.project.nominal_effort, float(rows[-1][2]))
+        self.assertEqual(sum(module.sloc for module in self.project.modules), int(rows[-1][1]))
+
+    def test_markdown_and_html_escape_names(self):
+        output = io.StringIO()
+        write_report(self.project, MarkdownReportWriter(output))
+        markdown: str = output.getvalue()
+        self.assertIn("| a\\|b <c> |", markdown)
+        self.assertEqual(len(self.project.modules) + 3, markdown.count("\n|"))
+
+        output = io.StringIO()
+        write_report(self.project, HtmlReportWriter(output))
+        page: str = output.getvalue()
+        self.assertIn("<title>Widgets | &lt;b&gt; - Effort Estimate</title>", page)
+        self.assertIn("<td>a|b &lt;c&gt;</td>", page)
+        self.assertEqual(len(self.project.modules), page.count("<tr><td>"))
+
+    def test_rows_are_streamed(self):
+        # Every row reaches the writer before the next module is read.
+        project: Project = self.project
+        read: list[str] = []
+
+        class RecordingWriter(ReportWriter):
+            def row(self, values: list) -> None:
+                self.output.append((values[0], list(read)))
+
+        def module_values():
+            for module in project.modules:
+                read.append(module.name)
+                yield ModuleValues(module, ratings=True)
+
+        rows: list = []
+        write_report(ProjectSnapshot(project, module_values()), RecordingWriter(rows))
+        for i, (name, before) in enumerate(rows):
+            self.assertEqual(project.modules[i].name, name)
+            self.assertEqual(i + 1, len(before))
+
+    def test_snapshot(self):
+        # Edits made while a report is written from a snapshot do not reach the report.
+        snapshot: ProjectSnapshot = ProjectSnapshot(
+            self.project, [ModuleValues(module, ratings=True) for module in self.project.modules])
+        expected = io.StringIO()
+        write_report(self.project, CsvReportWriter(expected))
+
+        module: Module = self.project.modules[0]
+        module.sloc += 1000
+        module.effort_modifiers[EffortModifier.CPLX] = RatingLevel.EXTRA_HIGH
+        self.project.add_module(Module("added"))
+        output = io.StringIO()
+        write_report(snapshot, CsvReportWriter(output))
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+        with self.assertRaises(TypeError):
+            ReportWriter(output)
+
+    def test_cancelled(self):
+        output = io.StringIO()
+        self.assertFalse(write_report(self.project, CsvReportWriter(output), cancelled=lambda: True))
+        self.assertEqual(COLUMNS, next(csv.reader(io.StringIO(output.getvalue()))))
+        self.assertEqual(1, output.getvalue().count("\n"))
+
+        # A cancelled export leaves an earlier report as it was and no partial file.
+        path: str = os.path.join(self.directory.name, "report.csv")
+        with open(path, "w") as report:
+            report.write("earlier")
+        self.assertFalse(export_report(self.project, path, cancelled=lambda: True))
+        self.assertEqual(["report.csv"], os.listdir(self.directory.name))
+        with open(path) as report:
+            self.assertEqual("earlier", report.read())
+
+    def test_main(self):
+        project_path: str = os.path.join(self.directory.name, "widgets.json")
+        with open(project_path, "w") as project_file:
+            json.dump(self.project.encode(), project_file)
+        report_path: str = os.path.join(self.directory.name, "widgets.html")
+
+        self.assertEqual(0, main([project_path, "--output", report_path]))
+        with open(report_path) as report:
+            self.assertTrue(report.read().startswith("<!DOCTYPE html>"))
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(1, main([project_path, "--output", os.path.join(self.directory.name, "widgets.txt")]))
+        with self.assertRaises(ValueError):
+            format_for_path("widgets.txt")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+
+from calibration import CalibrationProfile
+from cocomo import *
+from scenario import *
+from synthetic import SyntheticGenerator
+
+def estimate(target) -> tuple[float, float]:
+    target.estimate_effort()
+    return target.nominal_effort, target.nominal_schedule
+
+class TestScenario(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = Project("project")
+        for i in range(4):
+            module: Module = Module(f"module {i}")
+            module.sloc = 10000 * (i + 1)
+            self.project.add_module(module)
+        self.project.modules[3].effort_modifiers[EffortModifier.CPLX] = RatingLevel.HIGH
+
+    def assertEstimatesEqual(self, expected: tuple[float, float], actual: tuple[float, float]):
+        for first, second in zip(expected, actual):
+            self.assertAlmostEqual(first, second, places=6)
+
+    def test_matches_edited_copy(self):
+        project: Project = self.project
+        base_estimate = estimate(project)
+        scenario = Scenario(project, "faster")
+        scenario.set_sloc(project.modules[0], 25000)
+        scenario.set_effort_modifier(project.modules[3], EffortModifier.CPLX, RatingLevel.VERY_HIGH)
+        scenario.set_project_effort_modifier(EffortModifier.TOOL, RatingLevel.HIGH)
+        scenario.set_scale_factor(ScaleFactor.PMAT, RatingLevel.HIGH)
+        scenario.set_schedule_factor(RatingLevel.LOW)
+        scenario.calibration = CalibrationProfile("Ours", 3.0, 0.95)
+
+        copy: Project = Project.project_from_dict(project.encode())
+        copy.modules[0].sloc = 25000
+        copy.modules[3].effort_modifiers[EffortModifier.CPLX] = RatingLevel.VERY_HIGH
+        for module in copy.modules:
+            module.effort_modifiers[EffortModifier.TOOL] = RatingLevel.HIGH
+        copy.scale_factors[ScaleFactor.PMAT] = RatingLevel.HIGH
+        copy.schedule_factor = RatingLevel.LOW
+        copy.calibration = scenario.calibration
+
+        self.assertEstimatesEqual(estimate(copy), estimate(scenario))
+        self.assertEstimatesEqual(estimate(copy), estimate(scenario.to_project()))
+        self.assertEqual(RatingLevel.VERY_HIGH, scenario.effort_modifiers(project.modules[3])[EffortModifier.CPLX])
+        # The base project is untouched.
+        self.assertEstimatesEqual(base_estimate, estimate(project))
+        self.assertEqual(RatingLevel.NOMINAL, project.scale_factors[ScaleFactor.PMAT])
+
+        scenario.revert()
+        self.assertEqual(0, scenario.override_count)
+        self.assertEstimatesEqual(base_estimate, estimate(scenario))
+
+    def test_follows_base_edits(self):
+        project: Project = self.project
+        scenario = Scenario(project, "bigger")
+        scenario.set_sloc(project.modules[1], 50000)
+        project.modules[2].sloc = 1000
+        project.modules[1].effort_modifiers[EffortModifier.ACAP] = RatingLevel.HIGH
+        removed: Module = project.modules[3]
+        scenario.set_effort_modifier(removed, EffortModifier.RELY, RatingLevel.HIGH)
+        project.remove_module(3)
+
+        expected = scenario.to_project()
+        self.assertEqual(3, len(expected.modules))
+        self.assertEstimatesEqual(estimate(expected), estimate(scenario))
+
+        scenario.revert(project.modules[1])
+        self.assertEstimatesEqual(estimate(project), estimate(scenario))
+        with self.assertRaises(ValueError):
+            scenario.set_sloc(removed, 100)
+
+    def test_project_effort_modifier_covers_new_modules(self):
+        project: Project = self.project
+        scenario = Scenario(project, "tools")
+        scenario.set_effort_modifier(project.modules[0], EffortModifier.TOOL, RatingLevel.LOW)
+        scenario.set_project_effort_modifier(EffortModifier.TOOL, RatingLevel.HIGH)
+        added: Module = Module("added")
+        added.sloc = 20000
+        project.add_module(added)
+
+        self.assertEqual(RatingLevel.HIGH, scenario.effort_modifiers(project.modules[0])[EffortModifier.TOOL])
+        self.assertEqual(RatingLevel.HIGH, scenario.effort_modifiers(added)[EffortModifier.TOOL])
+        copy: Project = scenario.to_project()
+        self.assertTrue(all(module.effort_modifiers[EffortModifier.TOOL] == RatingLevel.HIGH for module in copy.modules))
+        self.assertEstimatesEqual(estimate(copy), estimate(scenario))
+
+        # A single module can still be set apart afterwards.
+        scenario.set_effort_modifier(added, EffortModifier.TOOL, RatingLevel.NOMINAL)
+        self.assertEqual(RatingLevel.NOMINAL, scenario.effort_modifiers(added)[EffortModifier.TOOL])
+        self.assertEstimatesEqual(estimate(scenario.to_project()), estimate(scenario))
+
+    def test_derive(self):
+        project: Project = self.project
+        first = Scenario(project, "first")
+        first.set_effort_modifier(project.modules[0], EffortModifier.PCAP, RatingLevel.HIGH)
+        second = first.derive("second")
+        second.set_effort_modifier(project.modules[0], EffortModifier.PCAP, RatingLevel.LOW)
+
+        self.assertEqual(RatingLevel.HIGH, first.effort_modifiers(project.modules[0])[EffortModifier.PCAP])
+        self.assertGreater(estimate(second)[0], estimate(first)[0])
+        with self.assertRaises(ValueError):
+            first.set_effort_modifier(project.modules[0], EffortModifier.TIME, RatingLevel.LOW)
+
+    def test_many_scenarios(self):
+        project: Project = SyntheticGenerator(2).project(5000)
+        project.estimate_effort()
+        scenarios: list[Scenario] = []
+        for i in range(1000):
+            scenario = Scenario(project, f"scenario {i}")
+            scenario.set_sloc(project.modules[i], project.modules[i].sloc + 1000)
+            scenario.set_effort_modifier(project.modules[-i - 1], EffortModifier.TOOL, RatingLevel.VERY_HIGH)
+            scenarios.append(scenario)
+
+        # Each estimate visits only the two overridden modules, not the 5000 of the base project.
+        for scenario in scenarios:
+            self.assertEqual(2, scenario.override_count)
+            self.assertEqual(2, len(scenario._modules()))
+        for scenario in scenarios[::100]:
+            self.assertAlmostEqual(1.0, estimate(scenario.to_project())[0] / estimate(scenario)[0], places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import math
+from cocomo import *
+from sensitivity import *
+
+def estimate(project: Project) -> float:
+    project.estimate_effort()
+    return project.nominal_effort
+
+class TestSensitivity(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = Project("project")
+        for i in range(3):
+            module: Module = Module(f"module {i}")
+            module.sloc = 10000 * (i + 1)
+            self.project.add_module(module)
+        self.project.modules[2].effort_modifiers[EffortModifier.TIME] = RatingLevel.HIGH
+
+    def test_module_steps_match_estimate(self):
+        project: Project = self.project
+        analysis = SensitivityAnalysis(project)
+
+        project.modules[1].effort_modifiers[EffortModifier.ACAP] = RatingLevel.HIGH
+        self.assertAlmostEqual(estimate(project), analysis.module_effort[1, 8, 1], places=6)
+        project.modules[1].effort_modifiers[EffortModifier.ACAP] = RatingLevel.NOMINAL
+
+        # TIME has no Low rating, so module 0 cannot step down.
+        self.assertTrue(math.isnan(analysis.module_effort[0, 5, 0]))
+        project.modules[2].effort_modifiers[EffortModifier.TIME] = RatingLevel.NOMINAL
+        self.assertAlmostEqual(estimate(project), analysis.module_effort[2, 5, 0], places=6)
+
+    def test_project_steps_match_estimate(self):
+        project: Project = self.project
+        analysis = SensitivityAnalysis(project, sloc_percent=20)
+
+        project.scale_factors[ScaleFactor.PMAT] = RatingLevel.LOW
+        self.assertAlmostEqual(estimate(project), analysis.scale_factor_effort[4, 0], places=6)
+        project.scale_factors[ScaleFactor.PMAT] = RatingLevel.NOMINAL
+
+        project.schedule_factor = RatingLevel.LOW
+        self.assertAlmostEqual(estimate(project), analysis.schedule_effort[0], places=6)
+        project.schedule_factor = RatingLevel.NOMINAL
+
+        for module in project.modules:
+            module.sloc = module.sloc * 1.2
+        self.assertAlmostEqual(estimate(project), analysis.sloc_effort[1], places=6)
+
+    def test_tornado_is_ranked(self):
+        rows = tornado(self.project)
+        swings = [row.swing for row in rows]
+        self.assertListEqual(sorted(swings, reverse=True), swings)
+        self.assertIn("SCED", [row.driver for row in rows])
+
+    def test_tornado_by_module(self):
+        rows = tornado(self.project, by_module=True, limit=5)
+        self.assertEqual(5, len(rows))
+        self.assertEqual("module 2", rows[0].module)
+
+
+if __name__ == "__main__":
+    unittest.main()
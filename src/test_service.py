@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+import json
+
+from cocomo import *
+from service import *
+from synthetic import SyntheticGenerator
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = EstimationService(batch_delay=0.01, cache_size=64)
+        self.server = await self.service.start("127.0.0.1", 0)
+        self.port: int = self.server.sockets[0].getsockname()[1]
+        self.clients: list[ServiceClient] = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def client(self) -> ServiceClient:
+        self.clients.append(ServiceClient("127.0.0.1", self.port))
+        return self.clients[-1]
+
+    async def test_estimate(self):
+        project: Project = SyntheticGenerator(0).project(10)
+        result: dict = await self.client().estimate(project)
+
+        project.estimate_effort()
+        self.assertAlmostEqual(project.nominal_effort, result["effort"], places=9)
+        self.assertAlmostEqual(project.nominal_schedule, result["schedule"], places=9)
+        self.assertEqual(sum(module.sloc for module in project.modules), result["sloc"])
+        self.assertEqual(10, len(result["modules"]))
+
+        # The same payload again is answered from the cache.
+        self.assertEqual(result, await self.client().estimate(project))
+        stats: dict = await self.client().stats()
+        self.assertEqual(1, stats["cache_hits"])
+        self.assertEqual(1, stats["projects_estimated"])
+        self.assertEqual(3, stats["requests"])
+        self.assertEqual(2, stats["latency"]["count"])
+
+    async def test_concurrent_requests_are_batched(self):
+        generator = SyntheticGenerator(1)
+        projects: list[Project] = [generator.project(5) for _ in range(40)]
+        clients: list[ServiceClient] = [self.client() for _ in projects]
+        # Every project twice, so half the requests arrive while an identical one is being estimated.
+        results: list[dict] = await asyncio.gather(*(client.estimate(project) for client, project in
+                                                     zip(clients + clients, projects + projects)))
+
+        for project, result in zip(projects + projects, results):
+            project.estimate_effort()
+            self.assertAlmostEqual(project.nominal_effort, result["effort"], places=9)
+        stats: dict = self.service.stats()
+        self.assertEqual(40, stats["projects_estimated"])
+        self.assertLess(stats["batches"], 10)
+        self.assertEqual(40, stats["coalesced"] + stats["cache_hits"])
+
+    async def test_errors(self):
+        client: ServiceClient = self.client()
+        with self.assertRaises(ValueError):
+            await client.estimate(b"[1, 2]")
+        broken: dict = Project("broken").encode()
+        broken["schedule factor"] = "EXTRA_HIGH"
+        with self.assertRaises(ValueError):
+            await client.estimate(broken)
+        self.assertEqual(404, (await client.request("GET", "/nothing"))[0])
+        self.assertEqual(405, (await client.request("GET", "/estimate"))[0])
+
+        # The connection is still usable after errors.
+        self.assertEqual(0.0, (await client.estimate(Project("empty")))["effort"])
+        self.assertEqual(4, self.service.stats()["errors"])
+
+    async def test_cache_eviction(self):
+        client: ServiceClient = self.client()
+        generator = SyntheticGenerator(2)
+        projects: list[Project] = [generator.project(2) for _ in range(65)]
+        for project in projects:
+            await client.estimate(project)
+        self.assertEqual(64, self.service.stats()["cached"])
+
+        # The oldest answer was evicted, the newest is still cached.
+        await client.estimate(projects[-1])
+        await client.estimate(projects[0])
+        stats: dict = self.service.stats()
+        self.assertEqual(1, stats["cache_hits"])
+        self.assertEqual(66, stats["projects_estimated"])
+
+if __name__ == '__main__':
+    unittest.main()
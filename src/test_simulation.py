@@ -0,0 +1,58 @@
+import unittest
+from cocomo import *
+from simulation import *
+
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.project: Project = Project("project")
+        for i in range(5):
+            module: Module = Module(f"module {i}")
+            module.sloc = 20000
+            self.project.add_module(module)
+
+    def test_no_uncertainty_matches_estimate(self):
+        project: Project = self.project
+        project.estimate_effort()
+
+        summary = Simulation(project).run(1000, batch_size=300, seed=1)
+
+        self.assertEqual(1000, summary.trials)
+        for value in summary.effort_percentiles().values():
+            self.assertAlmostEqual(project.nominal_effort, value, places=6)
+
+    def test_percentiles_are_ordered(self):
+        project: Project = self.project
+        simulation = Simulation(project)
+        simulation.set_sloc_distribution(project.modules[0], TriangularSloc(10000, 20000, 60000))
+        simulation.set_rating_distribution(EffortModifier.ACAP, {RatingLevel.LOW: 1, RatingLevel.HIGH: 1})
+        simulation.set_rating_distribution(ScaleFactor.PREC, {RatingLevel.LOW: 1, RatingLevel.HIGH: 3})
+
+        summary = simulation.run(20000, batch_size=5000, seed=2)
+        effort = summary.effort_percentiles()
+        schedule = summary.schedule_percentiles()
+
+        self.assertLess(effort[10], effort[50])
+        self.assertLess(effort[50], effort[90])
+        self.assertLess(schedule[10], schedule[90])
+
+    def test_same_seed_same_result_with_workers(self):
+        project: Project = self.project
+        simulation = Simulation(project)
+        simulation.set_sloc_distribution(project.modules[1], LognormalSloc(20000, 0.3))
+        simulation.set_rating_distribution(EffortModifier.CPLX, {RatingLevel.NOMINAL: 1, RatingLevel.HIGH: 1},
+                                           module=project.modules[2])
+
+        serial = simulation.run(4000, batch_size=1000, seed=3)
+        parallel = simulation.run(4000, batch_size=1000, workers=2, seed=3)
+
+        self.assertEqual(serial.effort_percentiles(), parallel.effort_percentiles())
+
+    def test_not_applicable_rating(self):
+        simulation = Simulation(self.project)
+        with self.assertRaises(ValueError):
+            simulation.set_rating_distribution(EffortModifier.TIME, {RatingLevel.LOW: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
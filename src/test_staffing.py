@@ -0,0 +1,74 @@
+import unittest
+import csv
+import io
+
+import numpy as np
+
+from cocomo import *
+from staffing import *
+from synthetic import SyntheticGenerator
+
+class TestStaffing(unittest.TestCase):
+
+    def setUp(self):
+        self.projects: list[Project] = SyntheticGenerator(5).portfolio(30) + [Project("empty")]
+        for project in self.projects:
+            project.estimate_effort()
+        self.split: PhaseSplit = phase_split([project.nominal_effort for project in self.projects],
+                                             [project.nominal_schedule for project in self.projects])
+
+    def test_phase_split(self):
+        project: Project = self.projects[0]
+        self.assertAlmostEqual(project.nominal_effort, self.split.effort[0, 1:3].sum())
+        self.assertAlmostEqual(project.nominal_schedule, self.split.duration[0, 1:3].sum())
+        self.assertAlmostEqual(1.18 * project.nominal_effort, self.split.total_effort[0])
+        self.assertAlmostEqual(1.25 * project.nominal_schedule, self.split.total_duration[0])
+        self.assertAlmostEqual(0.5 * project.nominal_schedule, self.split.start[0, 2])
+        self.assertEqual(0.0, self.split.total_effort[-1])
+
+    def test_profiles_spend_all_effort(self):
+        for model in MODELS:
+            with self.subTest(model=model):
+                profile: StaffingProfile = staffing_profile(self.split, model)
+                np.testing.assert_allclose(self.split.total_effort, profile.effort.sum(axis=1))
+                self.assertTrue((profile.effort >= 0).all())
+                for p in range(len(self.projects)):
+                    self.assertEqual(int(np.ceil(self.split.total_duration[p])), len(profile.project_effort(p)))
+                    self.assertTrue((profile.effort[p, profile.months[p]:] == 0).all())
+        with self.assertRaises(ValueError):
+            staffing_profile(self.split, "linear")
+
+    def test_phase_profile(self):
+        # Staff is constant inside a phase, so a month wholly inside construction has its staffing.
+        profile: StaffingProfile = phase_profile(self.split)
+        month: int = int(np.ceil(self.split.start[0, 2]))
+        self.assertAlmostEqual(self.split.staffing[0, 2], profile.staff[0, month])
+        self.assertEqual(PHASES.index("Construction"), month_phases(self.split, profile)[0, month])
+
+    def test_rayleigh_profile(self):
+        profile: StaffingProfile = rayleigh_profile([100.0], [20.0], peak=0.5)
+        self.assertEqual(20, len(profile.project_effort(0)))
+        self.assertIn(int(np.argmax(profile.staff[0])), [9, 10])
+        self.assertAlmostEqual(100.0, profile.effort.sum())
+        with self.assertRaises(ValueError):
+            rayleigh_profile([100.0], [20.0], peak=0.0)
+
+    def test_write_staffing_csv(self):
+        monthly, phases = io.StringIO(), io.StringIO()
+        self.assertEqual(len(self.projects), write_staffing_csv(self.projects, monthly, phases, chunk_size=7))
+
+        rows: list[dict] = list(csv.DictReader(io.StringIO(monthly.getvalue())))
+        profile: StaffingProfile = phase_profile(self.split)
+        self.assertEqual(int(profile.months.sum()), len(rows))
+        first: list[dict] = [row for row in rows if row["project"] == self.projects[0].name]
+        self.assertEqual(list(range(1, profile.months[0] + 1)), [int(row["month"]) for row in first])
+        self.assertAlmostEqual(self.split.total_effort[0], float(first[-1]["cumulative_effort"]), places=6)
+        self.assertEqual("Inception", first[0]["phase"])
+        self.assertEqual("Transition", first[-1]["phase"])
+
+        phase_table: list[dict] = list(csv.DictReader(io.StringIO(phases.getvalue())))
+        self.assertEqual(len(PHASES) * len(self.projects), len(phase_table))
+        self.assertEqual(PHASES, [row["phase"] for row in phase_table[:4]])
+
+if __name__ == '__main__':
+    unittest.main()